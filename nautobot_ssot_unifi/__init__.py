@@ -6,6 +6,7 @@ from importlib import metadata
 from nautobot.apps import NautobotAppConfig, nautobot_database_ready
 
 from nautobot_ssot_unifi.sigals import nautobot_database_ready_callback
+from nautobot_ssot_unifi.unifi import DEFAULT_DNS_CACHE_TTL
 
 __version__ = metadata.version(__name__)
 
@@ -22,7 +23,28 @@ class NautobotSSOTUnifiConfig(NautobotAppConfig):
     required_settings = []
     min_version = "2.0.0"
     max_version = "2.9999"
-    default_settings = {}
+    default_settings = {
+        "max_concurrent_sites": 8,
+        "fetch_queue_size": 8,
+        "session_cache_timeout": 3600,
+        "retry_attempts": 4,
+        "retry_backoff": 0.5,
+        "retry_backoff_max": 30,
+        "requests_per_second": 0,
+        "request_burst": None,
+        "circuit_breaker_threshold": 5,
+        "circuit_breaker_timeout": 30,
+        "connection_limit": 100,
+        "connection_limit_per_host": 0,
+        "keepalive_timeout": 15,
+        "dns_cache_ttl": DEFAULT_DNS_CACHE_TTL,
+        "compress_responses": True,
+        "listener_debounce": 5,
+        "job_log_summary": True,
+        "port_policy": "all",
+        "bulk_create": False,
+        "transaction_chunk_size": 0,
+    }
     caching_config = {}
 
     def ready(self):
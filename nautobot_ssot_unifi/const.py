@@ -30,8 +30,16 @@ UNIFI_MAP = {
         "role": "Firewall",
         "napalm_driver": "napalm_unifi.usg",
     },
+    "unifi": {
+        "platform": "Unifi Device",
+        "role": "Unifi Device",
+        "napalm_driver": "",
+    },
 }
 
+# The `UNIFI_MAP` type of models that are not in the hardware catalog, or whose type is not supported.
+UNIFI_DEFAULT_TYPE = "unifi"
+
 UNIFI_SSOT_TAG = "unifi-ssot"
 
 UNIFI_SSOT_INTERFACE_TYPES = {
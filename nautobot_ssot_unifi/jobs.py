@@ -1,39 +1,68 @@
 """Jobs for Unifi SSoT integration."""
 
-import csv
+import collections
+import contextlib
+import datetime
 import logging
-from os import path
+import time
+import tracemalloc
 from urllib.parse import urlparse
 
+from django.conf import settings
 from django.core.exceptions import ValidationError
 
-from nautobot.apps.jobs import BooleanVar, Job, ObjectVar, register_jobs
+from nautobot.apps.jobs import BooleanVar, Job, MultiObjectVar, ObjectVar, register_jobs
 
 from nautobot.dcim.models import Controller, LocationType, Location
-from nautobot.extras.models import ExternalIntegration, SecretsGroup, SecretsGroupAssociation
+from nautobot.extras.models import SecretsGroup, SecretsGroupAssociation
 from nautobot.extras.choices import SecretsGroupAccessTypeChoices, SecretsGroupSecretTypeChoices
 
-from netutils.dns import fqdn_to_ip
-
 from nautobot_ssot.jobs.base import DataSource
 
 from nautobot_ssot_unifi.ssot import adapters
+from nautobot_ssot_unifi.utils.nautobot import get_controller_source, get_device_fingerprints
+from nautobot_ssot_unifi.utils.unifi import get_hardware_catalog
 
 name = "Unifi SSoT"  # pylint: disable=invalid-name
 
+PLUGIN_SETTINGS = settings.PLUGINS_CONFIG["nautobot_ssot_unifi"]
+
+
+@contextlib.contextmanager
+def timed(times, step):
+    """Add the seconds spent in the `with` block to `times[step]`."""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        times[step] += time.monotonic() - started
+
 
 class UnifiDataSource(DataSource, Job):
     """Unifi SSoT Data Source."""
 
     debug: bool = BooleanVar(description="Enable for more verbose debug logging", default=False)
-    controller: Controller = ObjectVar(description="Unifi Controller to sync with", model=Controller)
+    full_sync: bool = BooleanVar(
+        description="Compare the interfaces and IP addresses of every device, even when the device has not changed since the last sync",
+        default=False,
+    )
+    site_by_site: bool = BooleanVar(
+        description="Load, compare and sync one Unifi site at a time, so that memory depends on the largest site rather than on all of them",
+        default=False,
+    )
+    controller: Controller = ObjectVar(description="Unifi Controller to sync with", model=Controller, required=False)
+    controllers = MultiObjectVar(
+        description="Additional Unifi Controllers to sync with. All controllers are synced in a single run.",
+        model=Controller,
+        required=False,
+    )
     location_type: LocationType = ObjectVar(
         description="Default location type. If locations are added, this location type will be used for the new locations.",
         model=LocationType,
         required=False,
     )
     default_location: Location = ObjectVar(
-        description="Override the 'default' site with this location. If not specified, the controller's location will be used.",
+        description="Override the 'default' site with this location. If not specified, each controller's location will be used.",
         model=Location,
         required=False,
     )
@@ -47,17 +76,33 @@ class UnifiDataSource(DataSource, Job):
         description = "Sync information from Unifi to Nautobot"
         has_sensitive_variables = False
 
+    @staticmethod
+    def get_selected_controllers(controller, controllers):
+        """Get the distinct controllers selected in the `controller` and `controllers` variables."""
+        selected = [controller] if controller else []
+        selected.extend(other for other in controllers or [] if other not in selected)
+        return selected
+
     @classmethod
     def validate_data(cls, data, files=None):
-        """Validate that the controller and secrets are appropriate for Unifi."""
+        """Validate that the controllers and secrets are appropriate for Unifi."""
         validated_data = super().validate_data(data, files)
-        controller: Controller = validated_data["controller"]
+        controllers = cls.get_selected_controllers(validated_data.get("controller"), validated_data.get("controllers"))
+        if not controllers:
+            raise ValidationError({"controller": "Select at least one Unifi controller to sync with."})
+        for controller in controllers:
+            cls.validate_controller(controller)
+        return validated_data
+
+    @staticmethod
+    def validate_controller(controller: Controller):
+        """Validate that a controller and its secrets are appropriate for Unifi."""
         remote_url = controller.external_integration.remote_url
         url = urlparse(remote_url)
         if url.scheme not in ["http", "https"]:
             raise ValidationError(
                 {
-                    "controller": f"Unifi SSoT requires either HTTP or HTTPS for the external integration, not {url.scheme} that is currently specified in the remote url {remote_url}"
+                    "controller": f"Unifi SSoT requires either HTTP or HTTPS for the external integration of {controller}, not {url.scheme} that is currently specified in the remote url {remote_url}"
                 }
             )
 
@@ -73,66 +118,220 @@ class UnifiDataSource(DataSource, Job):
         except SecretsGroupAssociation.DoesNotExist as error:
             raise ValidationError(
                 {
-                    "controller": "The controller's external integration must include a secrets group with HTTP username and password."
+                    "controller": f"The external integration of {controller} must include a secrets group with HTTP username and password."
                 }
             ) from error
 
-        return validated_data
-
     def load_source_adapter(self):
         """Load data from Unifi into DiffSync models."""
-        external_integration: ExternalIntegration = self.controller.external_integration
-        url = urlparse(external_integration.remote_url)
-        secrets_group: SecretsGroup = external_integration.secrets_group
-        username = secrets_group.get_secret_value(
-            access_type=SecretsGroupAccessTypeChoices.TYPE_HTTP, secret_type=SecretsGroupSecretTypeChoices.TYPE_USERNAME
-        )
-        password = secrets_group.get_secret_value(
-            access_type=SecretsGroupAccessTypeChoices.TYPE_HTTP, secret_type=SecretsGroupSecretTypeChoices.TYPE_PASSWORD
-        )
-
-        default_location_name = self.default_location.name
-        default_location_type = self.default_location_type.name
         self.source_adapter = adapters.UnifiAdapter(
             job=self,
-            controller_name=self.controller.name,
-            default_location_type=default_location_type,
-            default_location_name=default_location_name,
-        )
-        self.source_adapter.load(
-            host=fqdn_to_ip(url.hostname),
-            port=(url.port or 443),
-            username=username,
-            password=password,
-            verify_cert=external_integration.verify_ssl,
-            timeout=external_integration.timeout,
+            max_concurrent_sites=PLUGIN_SETTINGS["max_concurrent_sites"],
+            fetch_queue_size=PLUGIN_SETTINGS["fetch_queue_size"],
+            log_summary=PLUGIN_SETTINGS["job_log_summary"],
+            port_policy=PLUGIN_SETTINGS["port_policy"],
+            device_fingerprints=(
+                {} if self.full_sync else get_device_fingerprints([controller.name for controller in self.controllers])
+            ),
         )
+        try:
+            self.source_adapter.load([self.get_controller_source(controller) for controller in self.controllers])
+        finally:
+            self.log_request_metrics(self.source_adapter)
+
+    def log_request_metrics(self, source):
+        """Log a summary of the requests sent to each controller and keep it for the job result.
+
+        The latency of a request is the time the controller took to answer,
+        the download rate shows how fast the answers came in, and the load
+        time of a controller also includes the time spent loading its devices.
+
+        Args:
+            source (UnifiAdapter | SiteStream): What loaded the controllers.
+        """
+        self.request_metrics = {}
+        for name, metrics in sorted(source.request_metrics.items()):
+            load_time = source.load_times[name]
+            summary = metrics.summary()
+            self.request_metrics[name] = {"load_time": round(load_time, 3), "endpoints": summary}
+            self.logger.info("Loaded the Unifi Controller %s in %.2fs", name, load_time)
+            for endpoint, endpoint_summary in summary.items():
+                self.logger.info(
+                    "Unifi Controller %s, %s: %d requests (%d retries, %d errors, statuses %s), %d bytes at %s B/s, "
+                    "latency p50 %ss p95 %ss max %ss",
+                    name,
+                    endpoint,
+                    endpoint_summary["requests"],
+                    endpoint_summary["retries"],
+                    endpoint_summary["errors"],
+                    endpoint_summary["statuses"],
+                    endpoint_summary["bytes"],
+                    endpoint_summary["bytes_per_second"],
+                    endpoint_summary["latency"]["p50"],
+                    endpoint_summary["latency"]["p95"],
+                    endpoint_summary["latency"]["max"],
+                )
+
+    def get_controller_source(self, controller: Controller) -> adapters.ControllerSource:
+        """Get the location defaults and client options for loading a controller."""
+        return get_controller_source(controller, self.default_location, self.default_location_type)
 
     def load_target_adapter(self):
         """Load data from Nautobot into DiffSync models."""
-        self.target_adapter = adapters.UnifiNautobotAdapter(job=self, sync=self.sync)
+        self.target_adapter = adapters.UnifiNautobotAdapter(
+            job=self,
+            sync=self.sync,
+            bulk_create=PLUGIN_SETTINGS["bulk_create"],
+            transaction_chunk_size=PLUGIN_SETTINGS["transaction_chunk_size"],
+            unchanged_devices=self.source_adapter.unchanged_devices,
+            skipped_interfaces=self.source_adapter.skipped_interfaces,
+            controller_names=[controller.name for controller in self.controllers],
+            source_adapter=self.source_adapter,
+        )
         self.target_adapter.load()
 
+    def execute_sync(self):
+        """Sync the differences, committing the writes in chunks when `transaction_chunk_size` is set."""
+        with self.target_adapter.chunked_transactions():
+            super().execute_sync()
+
+    def sync_data(self, memory_profiling):
+        """Load, compare and sync all the sites at once or, in site by site mode, one site at a time."""
+        if not self.site_by_site:
+            super().sync_data(memory_profiling)
+        elif self.sync:
+            self.sync_sites(memory_profiling)
+
+    def sync_sites(self, memory_profiling):
+        """Load, compare and sync the sites of the controllers one at a time.
+
+        The next site is fetched while the current one is synced. Nautobot
+        is only loaded for the site's location (and the devices of the site),
+        so the devices a site no longer has are removed. Locations, device
+        types, prefixes and IP addresses that are no longer used are left
+        alone, as are the devices of sites removed from a controller.
+
+        The sync record gets the total time of each step, and the summary
+        of all the sites' diffs rather than the diffs themselves.
+        """
+        if memory_profiling:
+            tracemalloc.start()
+        device_fingerprints = (
+            {} if self.full_sync else get_device_fingerprints([controller.name for controller in self.controllers])
+        )
+        stream = adapters.SiteStream([self.get_controller_source(controller) for controller in self.controllers])
+        times = collections.Counter()
+        summary = collections.Counter()
+        sites = iter(stream)
+        try:
+            while True:
+                # Waiting for the site to be fetched counts as loading the source.
+                with timed(times, "source_load"):
+                    site = next(sites, None)
+                if site is None:
+                    break
+                summary.update(self.sync_site(*site, device_fingerprints, times))
+                # The devices of the site are not needed while waiting for the next one.
+                del site
+        finally:
+            sites.close()
+            self.log_request_metrics(stream)
+
+        self.sync.source_load_time = datetime.timedelta(seconds=times["source_load"])
+        self.sync.target_load_time = datetime.timedelta(seconds=times["target_load"])
+        self.sync.diff_time = datetime.timedelta(seconds=times["diff"])
+        if not self.dryrun:
+            self.sync.sync_time = datetime.timedelta(seconds=times["sync"])
+        self.sync.summary = dict(summary)
+        if memory_profiling:
+            self.sync.sync_memory_final, self.sync.sync_memory_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        self.sync.save()
+        self.logger.info("Synced all the sites: %s", dict(summary))
+
+    def sync_site(
+        self,
+        controller,
+        site_name,
+        devices,
+        device_fingerprints,
+        times,
+    ):  # pylint: disable=too-many-arguments
+        """Load, compare and sync a single site.
+
+        Args:
+            controller (ControllerSource): The controller of the site.
+            site_name (str): The Unifi site name.
+            devices (List[DeviceRecord]): The devices of the site.
+            device_fingerprints (Dict[str, str]): The fingerprints stored in Nautobot.
+            times (Counter[str]): The seconds spent in each step, which are added to.
+
+        Returns:
+            Dict[str, int]: The summary of the site's diff.
+        """
+        with timed(times, "source_load"):
+            self.source_adapter = adapters.UnifiAdapter(
+                job=self,
+                log_summary=PLUGIN_SETTINGS["job_log_summary"],
+                port_policy=PLUGIN_SETTINGS["port_policy"],
+                device_fingerprints=device_fingerprints,
+            )
+            self.source_adapter.load_devices(controller, site_name, devices)
+
+        with timed(times, "target_load"):
+            self.target_adapter = adapters.UnifiNautobotAdapter(
+                job=self,
+                sync=self.sync,
+                bulk_create=PLUGIN_SETTINGS["bulk_create"],
+                transaction_chunk_size=PLUGIN_SETTINGS["transaction_chunk_size"],
+                unchanged_devices=self.source_adapter.unchanged_devices,
+                skipped_interfaces=self.source_adapter.skipped_interfaces,
+                controller_names=[controller.name],
+                limit_to=self.source_adapter,
+                scope_site=(controller.name, controller.location_name(site_name)),
+            )
+            self.target_adapter.load()
+
+        with timed(times, "diff"):
+            diff = self.source_adapter.diff_to(self.target_adapter, flags=self.diffsync_flags)
+        self.logger.info("Site %s of the Unifi Controller %s: %s", site_name, controller.name, diff.summary())
+
+        if not self.dryrun:
+            with timed(times, "sync"), self.target_adapter.chunked_transactions():
+                self.source_adapter.sync_to(self.target_adapter, flags=self.diffsync_flags, diff=diff)
+        return diff.summary()
+
     def run(
-        self, dryrun, debug, controller, default_location, location_type, *args, **kwargs
-    ):  # pylint: disable=arguments-differ,too-many-arguments,attribute-defined-outside-init
+        self,
+        dryrun,
+        debug,
+        full_sync=False,
+        site_by_site=False,
+        controller=None,
+        controllers=None,
+        default_location=None,
+        location_type=None,
+        *args,
+        **kwargs,
+    ):  # pylint: disable=arguments-differ,too-many-arguments,attribute-defined-outside-init,keyword-arg-before-vararg
         """Perform data synchronization."""
         self.dryrun = dryrun
         self.debug = debug
-        self.controller = controller
-        self.default_location = default_location or controller.location
-        self.default_location_type = location_type or self.default_location.location_type
-        self.hardware_models = {}
+        self.full_sync = full_sync
+        self.site_by_site = site_by_site
+        self.controllers = self.get_selected_controllers(controller, controllers)
+        self.default_location = default_location
+        self.default_location_type = location_type
         if self.debug:
             self.logger.setLevel(logging.DEBUG)
         else:
             self.logger.setLevel(logging.INFO)
-        with open(path.join(path.dirname(__file__), "hardware_models.csv"), encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for record in reader:
-                self.hardware_models[record["model"]] = record
+        self.hardware_models = get_hardware_catalog()
+        self.request_metrics = {}
 
         super().run(dryrun=self.dryrun, *args, **kwargs)
+        # Stored as the job result, per controller and endpoint.
+        return {"request_metrics": self.request_metrics}
 
 
 register_jobs(UnifiDataSource)
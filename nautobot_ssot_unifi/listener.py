@@ -0,0 +1,231 @@
+"""Event driven synchronization of Unifi devices.
+
+The `EventListener` connects to the event websocket of every site of some
+controllers. Device messages and events are collected for a short while
+(so that a burst of messages about a device results in a single sync) and
+then only the devices they mention are synced, using the same adapters
+and models as the `UnifiDataSource` job. Devices whose fingerprint has not
+changed are not synced at all.
+
+The listener only ever adds and updates devices. Devices that are removed
+from a controller, or renamed, are cleaned up by the next run of the job.
+"""
+
+import asyncio
+import dataclasses
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from aiounifi.errors import AiounifiException
+from asgiref.sync import sync_to_async
+from diffsync.enum import DiffSyncFlags
+from django.db import close_old_connections, transaction
+
+from nautobot_ssot_unifi.ssot import adapters
+from nautobot_ssot_unifi.ssot.models import DeviceModel
+from nautobot_ssot_unifi.unifi import Client, DeviceRecord, SiteClient
+from nautobot_ssot_unifi.unifi.retry import RetryPolicy
+from nautobot_ssot_unifi.utils.nautobot import get_device_fingerprints
+from nautobot_ssot_unifi.utils.unifi import get_hardware_catalog
+
+# Messages whose data items are (complete or partial) devices.
+DEVICE_MESSAGES = frozenset(("device:add", "device:sync", "device:update", "unifi-device:sync"))
+
+# Events about devices, and the keys holding the MAC address of the device.
+DEVICE_EVENT_PREFIXES = ("EVT_SW_", "EVT_AP_", "EVT_GW_")
+DEVICE_EVENT_KEYS = ("sw", "ap", "gw")
+
+# The keys a device item needs to be synced without fetching the device again.
+DEVICE_KEYS = ("mac", "name", "model", "serial", "port_table")
+
+
+def get_device_changes(message: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Set[str]]:
+    """Find the devices a websocket message is about.
+
+    Args:
+        message (Dict[str, Any]): The decoded websocket message.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Set[str]]: The complete raw devices in the message, and the MAC
+            addresses of the other devices it mentions, which need to be fetched.
+    """
+    kind = message.get("meta", {}).get("message")
+    devices, macs = [], set()
+    for item in message.get("data", []):
+        if not isinstance(item, dict):
+            continue
+        if kind in DEVICE_MESSAGES:
+            if all(key in item for key in DEVICE_KEYS):
+                devices.append(item)
+            elif "mac" in item:
+                macs.add(item["mac"])
+        elif kind == "events" and str(item.get("key", "")).startswith(DEVICE_EVENT_PREFIXES):
+            macs.update(item[key] for key in DEVICE_EVENT_KEYS if item.get(key))
+    return devices, macs
+
+
+@dataclasses.dataclass
+class PendingChanges:
+    """The devices of a site waiting to be synced.
+
+    Attributes:
+        devices (Dict[str, DeviceRecord]): The devices received in full, by MAC address.
+        macs (Set[str]): The MAC addresses of the devices that have to be fetched.
+    """
+
+    devices: Dict[str, DeviceRecord] = dataclasses.field(default_factory=dict)
+    macs: Set[str] = dataclasses.field(default_factory=set)
+
+    def __bool__(self):
+        """Whether any device is waiting."""
+        return bool(self.devices or self.macs)
+
+
+class EventListener:
+    """Sync Unifi devices to Nautobot as the controllers report changes.
+
+    The listener stands in for the job the adapters normally run in: it
+    provides the `logger` and `hardware_models` they use.
+    """
+
+    def __init__(
+        self,
+        controllers: Iterable[adapters.ControllerSource],
+        debounce: float = 5.0,
+        logger: Optional[logging.Logger] = None,
+        port_policy: str = "all",
+    ):
+        """Create a new listener.
+
+        Args:
+            controllers (Iterable[ControllerSource]): The controllers to listen to.
+            debounce (float, optional): How long (in seconds) changes are collected before they are synced.
+            logger (logging.Logger, optional): Where progress is logged. Defaults to this module's logger.
+            port_policy (str, optional): Which ports are synced as interfaces, as for the job. Defaults to all.
+        """
+        self.controllers = list(controllers)
+        self.debounce = debounce
+        self.port_policy = port_policy
+        self.logger = logger or logging.getLogger(__name__)
+        self.hardware_models = get_hardware_catalog()
+        self.fingerprints: Dict[str, str] = {}
+
+    def run(self):
+        """Listen until interrupted."""
+        self.fingerprints = get_device_fingerprints([controller.name for controller in self.controllers])
+        asyncio.run(self.listen())
+
+    async def listen(self):
+        """Listen to every site of every controller."""
+        await adapters.gather(*(self._listen_controller(controller) for controller in self.controllers))
+
+    async def _listen_controller(self, controller: adapters.ControllerSource):
+        client = Client(endpoints=adapters.UnifiAdapter.endpoints, **controller.client_options)
+        try:
+            sites = await client.get_sites()
+            self.logger.info("Listening to %d sites of the Unifi Controller %s", len(sites), controller.name)
+            await adapters.gather(*(self._listen_site(controller, client.for_site(site.name)) for site in sites))
+        finally:
+            await client.logout()
+
+    async def _listen_site(self, controller: adapters.ControllerSource, site_client: SiteClient):
+        pending = PendingChanges()
+        flush: Optional[asyncio.Task] = None
+        retry_policy: RetryPolicy = site_client.client.retry_policy
+        retry = 0
+        try:
+            while True:
+                try:
+                    async for message in site_client.listen():
+                        retry = 0
+                        devices, macs = get_device_changes(message)
+                        for device in devices:
+                            record = DeviceRecord.from_raw(device)
+                            if self._has_changed(controller, site_client.site, record):
+                                pending.devices[device["mac"]] = record
+                        pending.macs.update(macs)
+                        if pending and (flush is None or flush.done()):
+                            flush = asyncio.ensure_future(self._flush(controller, site_client, pending))
+                except AiounifiException as error:
+                    retry += 1
+                    self.logger.warning(
+                        "Lost the events of site %s of the Unifi Controller %s, changes may have been missed: %s",
+                        site_client.site,
+                        controller.name,
+                        error,
+                    )
+                    await asyncio.sleep(retry_policy.delay(retry))
+        finally:
+            if flush is not None:
+                flush.cancel()
+
+    def _has_changed(self, controller: adapters.ControllerSource, site_name: str, device: DeviceRecord) -> bool:
+        unique_id = DeviceModel.create_unique_id(
+            name=device.name,
+            controller_managed_device_group__name="default",
+            controller_managed_device_group__controller__name=controller.name,
+        )
+        return self.fingerprints.get(unique_id) != device.fingerprint(
+            controller.location_name(site_name), port_policy=self.port_policy
+        )
+
+    async def _flush(self, controller: adapters.ControllerSource, site_client: SiteClient, pending: PendingChanges):
+        """Sync the pending changes of a site, `debounce` seconds after the first one came in.
+
+        Changes that arrive while a sync is running are synced afterwards.
+        """
+        while pending:
+            await asyncio.sleep(self.debounce)
+            devices = list(pending.devices.values())
+            macs = pending.macs - pending.devices.keys()
+            pending.devices, pending.macs = {}, set()
+            try:
+                if macs:
+                    for device in await site_client.get_devices_by_mac(macs):
+                        if self._has_changed(controller, site_client.site, device):
+                            devices.append(device)
+                if devices:
+                    await sync_to_async(self.sync_devices)(controller, site_client.site, devices)
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                # A failed sync must not stop the listener. The next change, or job run, tries again.
+                self.logger.error(
+                    "Failed to sync the devices of site %s of the Unifi Controller %s: %s",
+                    site_client.site,
+                    controller.name,
+                    error,
+                )
+
+    def sync_devices(self, controller: adapters.ControllerSource, site_name: str, devices: List[DeviceRecord]):
+        """Sync some devices of a controller site to Nautobot.
+
+        Only the given devices (and the objects they use) are loaded and
+        compared, so the rest of Nautobot is left untouched.
+
+        Args:
+            controller (ControllerSource): The controller the devices belong to.
+            site_name (str): The Unifi site name of the devices.
+            devices (List[DeviceRecord]): The devices to sync.
+        """
+        close_old_connections()
+        source = adapters.UnifiAdapter(job=self, port_policy=self.port_policy)
+        source.load_devices(controller, site_name, devices)
+        target = adapters.UnifiNautobotAdapter(
+            job=self,
+            skipped_interfaces=source.skipped_interfaces,
+            controller_names=[controller.name],
+            limit_to=source,
+        )
+        target.load()
+        with transaction.atomic():
+            diff = target.sync_from(source, flags=DiffSyncFlags.CONTINUE_ON_FAILURE)
+        # Devices with a failed write are synced again by their next change, or by the job.
+        for device in source.get_all("device"):
+            if DeviceModel.device_key(device.get_identifiers()) not in target.failed_devices:
+                self.fingerprints[device.get_unique_id()] = device.unifi_fingerprint
+        self.logger.info(
+            "Synced %s from site %s of the Unifi Controller %s: %s",
+            ", ".join(sorted(device.name for device in devices)),
+            site_name,
+            controller.name,
+            diff.summary(),
+        )
@@ -0,0 +1 @@
+"""Management commands for nautobot_ssot_unifi."""
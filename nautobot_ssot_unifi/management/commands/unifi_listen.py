@@ -0,0 +1,65 @@
+"""Listen to Unifi controller events and sync the devices that change."""
+
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from nautobot.dcim.models import Controller, Location
+
+from nautobot_ssot_unifi.listener import EventListener
+from nautobot_ssot_unifi.utils.nautobot import get_controller_source
+
+PLUGIN_SETTINGS = settings.PLUGINS_CONFIG["nautobot_ssot_unifi"]
+
+
+class Command(BaseCommand):
+    """Run the Unifi event listener until interrupted."""
+
+    help = "Listen to the events of Unifi controllers and sync the devices that change to Nautobot."
+
+    def add_arguments(self, parser):
+        """Add the command line arguments."""
+        parser.add_argument("controllers", nargs="+", help="The names of the Nautobot controllers to listen to.")
+        parser.add_argument(
+            "--default-location",
+            help="The name of the location of the 'default' Unifi site. Defaults to each controller's location.",
+        )
+        parser.add_argument(
+            "--debounce",
+            type=float,
+            default=PLUGIN_SETTINGS["listener_debounce"],
+            help="How long (in seconds) changes are collected before they are synced.",
+        )
+
+    def handle(self, *args, **options):
+        """Listen to the controllers."""
+        controllers = list(Controller.objects.filter(name__in=options["controllers"]))
+        missing = set(options["controllers"]) - {controller.name for controller in controllers}
+        if missing:
+            raise CommandError(f"Unknown controllers: {', '.join(sorted(missing))}")
+        default_location = None
+        if options["default_location"]:
+            try:
+                default_location = Location.objects.get(name=options["default_location"])
+            except Location.DoesNotExist as error:
+                raise CommandError(f"Unknown location: {options['default_location']}") from error
+            except Location.MultipleObjectsReturned as error:
+                raise CommandError(f"More than one location is called {options['default_location']}") from error
+
+        logger = logging.getLogger("nautobot_ssot_unifi.listener")
+        handler = logging.StreamHandler(self.stdout)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel({0: logging.WARNING, 1: logging.INFO}.get(options["verbosity"], logging.DEBUG))
+
+        listener = EventListener(
+            [get_controller_source(controller, default_location) for controller in controllers],
+            debounce=options["debounce"],
+            logger=logger,
+            port_policy=PLUGIN_SETTINGS["port_policy"],
+        )
+        try:
+            listener.run()
+        except KeyboardInterrupt:
+            pass
@@ -46,6 +46,13 @@ def nautobot_database_ready_callback(
     )
     custom_field.content_types.add(ContentType.objects.get_for_model(Interface))
 
+    custom_field, _ = CustomField.objects.get_or_create(
+        label="Unifi Fingerprint",
+        key="unifi_fingerprint",
+        type="text",
+    )
+    custom_field.content_types.add(ContentType.objects.get_for_model(Device))
+
     manufacturer, _ = Manufacturer.objects.get_or_create(name=UNIFI_MANUFACTURER)
 
     content_type = ContentType.objects.get_for_model(Device)
@@ -1,25 +1,59 @@
 """Adapters for diffsync models between Unifi and Nautobot."""
 
-from typing import Any, Dict, List
+import asyncio
+import contextlib
+import dataclasses
+import queue
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Type
 from diffsync import Adapter
 
 from asgiref.sync import sync_to_async, async_to_sync
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Model
 
 from diffsync.diff import Diff
 from diffsync.enum import DiffSyncFlags
 from nautobot.apps.jobs import Job
 from nautobot.dcim.models import Device
+from nautobot.extras.models import Status, Tag, TaggedItem
 from nautobot.ipam.models import IPAddress
 
 from nautobot_ssot.contrib import NautobotAdapter
 from structlog import BoundLogger
 
-from nautobot_ssot_unifi.const import UNIFI_MAP, UNIFI_SSOT_INTERFACE_TYPES
+from nautobot_ssot_unifi.const import UNIFI_SSOT_INTERFACE_TYPES, UNIFI_SSOT_TAG
 from nautobot_ssot_unifi.ssot import models
 
-from nautobot_ssot_unifi.unifi import Client
+from nautobot_ssot_unifi.unifi import PORT_POLICIES, Client, DeviceRecord, RequestMetrics
+from nautobot_ssot_unifi.utils.ipam import Address, AddressCache
+from nautobot_ssot_unifi.utils.joblog import JobLogBuffer
+from nautobot_ssot_unifi.utils.transactions import ChunkedTransaction
 
-from netaddr import IPNetwork
+# The number of devices the fetch stage hands over to the transform stage at once.
+DEVICE_BATCH_SIZE = 100
+
+# The number of objects of a model the Nautobot adapter writes at once in bulk create mode.
+BULK_CREATE_BATCH_SIZE = 1000
+
+
+async def gather(*coroutines):
+    """Run coroutines concurrently, like `asyncio.gather`.
+
+    Unlike `asyncio.gather`, the remaining coroutines are cancelled as soon
+    as one of them fails, so that nothing is left running in the background.
+    """
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
 
 
 class UnifiAdapterMixin:
@@ -49,12 +83,299 @@ class UnifiAdapterMixin:
 class UnifiNautobotAdapter(UnifiAdapterMixin, NautobotAdapter):
     """Adapter to connect to Nautobot."""
 
-    _primary_ips: List[Dict[str, Any]]
+    _fingerprints: Dict[Tuple[str, str, str], str]
+    _primary_ips: Dict[Tuple[str, str, str], Dict[str, Optional[str]]]
+    _queued_creates: Dict[str, List[models.QueuedCreate]]
+    _tagged: Dict[Type[Model], Set[uuid.UUID]]
+    _untagged: Dict[Type[Model], Set[uuid.UUID]]
+
+    def __init__(
+        self,
+        *args,
+        job,
+        sync=None,
+        bulk_create: bool = False,
+        transaction_chunk_size: int = 0,
+        unchanged_devices: Optional[Set[Tuple[str, str, str]]] = None,
+        skipped_interfaces: Optional[Dict[Tuple[str, str, str], List[str]]] = None,
+        controller_names: Optional[Iterable[str]] = None,
+        source_adapter: Optional[Adapter] = None,
+        limit_to: Optional[Adapter] = None,
+        scope_site: Optional[Tuple[str, str]] = None,
+        **kwargs,
+    ):
+        """Initialize the adapter.
 
-    def __init__(self, *args, job, sync=None, **kwargs):
-        """Initialize the adapter."""
+        Args:
+            *args: Additional positional arguments needed by the parent adapter.
+            job (Job): The Nautobot job instance that is running this sync.
+            sync (Sync, optional): The SSoT sync record.
+            bulk_create (bool, optional): Whether interfaces, IP addresses and IP address assignments are
+                queued when created, and written in batches with `bulk_create`. Defaults to False.
+            transaction_chunk_size (int, optional): Within `chunked_transactions`, commit the writes in
+                transactions of this many objects of a single model type. Defaults to 0, which leaves
+                every write to commit on its own.
+            unchanged_devices (Set[Tuple[str, str, str]], optional): Devices (name, device group
+                name and controller name) whose interfaces and IP address assignments are not loaded,
+                because the source adapter found them unchanged.
+            skipped_interfaces (Dict[Tuple[str, str, str], List[str]], optional): The labels of the
+                interfaces, by device, that the port policy left out of the source adapter. They (and their
+                IP address assignments) are not loaded either, so that they are left alone.
+            controller_names (Iterable[str], optional): Only load the objects of these controllers, and the
+                shared objects of `source_adapter`. Defaults to the objects of every controller.
+            source_adapter (Adapter, optional): The source adapter of a sync scoped to some controllers. The
+                shared objects (locations, device types, prefixes and IP addresses) it has are loaded, so
+                that those already in Nautobot are not created again. Defaults to every tagged shared object.
+            limit_to (Adapter, optional): Only load the objects this (source) adapter has, and
+                everything that belongs to its devices. Used to sync some devices without
+                touching the rest of Nautobot.
+            scope_site (Tuple[str, str], optional): The controller name and location name of a Unifi site.
+                Together with `limit_to`, the devices the controller has at the location are loaded
+                too, so that those the site no longer has are removed.
+            **kwargs: Additional keyword arguments needed by the parent adapter.
+        """
         super().__init__(*args, job=job, sync=sync, **kwargs)
-        self._primary_ips = []
+        self._fingerprints = {}
+        self._primary_ips = {}
+        # The devices (name, device group name and controller name) that had a write fail.
+        self.failed_devices: Set[Tuple[str, str, str]] = set()
+        self.bulk_create = bulk_create
+        self._queued_creates = {}
+        self.transaction_chunk_size = transaction_chunk_size
+        self._transactions: Optional[ChunkedTransaction] = None
+        self._tagged = {}
+        self._untagged = {}
+        self.unchanged_devices = unchanged_devices or set()
+        self.skipped_interfaces = skipped_interfaces or {}
+        self.controller_names = None if controller_names is None else sorted(set(controller_names))
+        self.source_adapter = source_adapter
+        self.limit_to = limit_to
+        self.scope_site = scope_site
+
+    # The objects every created (or deleted) model refers to are looked up once per
+    # sync, in the adapter's ORM cache, rather than once per object.
+    @property
+    def active_status(self) -> Status:
+        """The status of the created objects."""
+        return self.get_from_orm_cache({"name": "Active"}, Status)
+
+    @property
+    def unifi_tag(self) -> Tag:
+        """The tag of the synchronized objects."""
+        return self.get_from_orm_cache({"name": UNIFI_SSOT_TAG}, Tag)
+
+    @contextlib.contextmanager
+    def chunked_transactions(self):
+        """Commit the writes made in the `with` block in chunks of `transaction_chunk_size` objects.
+
+        A chunk never holds objects of two model types, and the writes of `sync_complete`
+        get a chunk of their own. The queued tags are written in each chunk before it is
+        committed. When the block raises, the current chunk is rolled back and the earlier
+        ones stay committed, tags included.
+        """
+        if not self.transaction_chunk_size:
+            yield
+            return
+        with ChunkedTransaction(self.transaction_chunk_size, before_commit=self.apply_tags) as self._transactions:
+            try:
+                yield
+            finally:
+                self.job.logger.info("Committed the writes in %d transactions", self._transactions.chunks)
+                self._transactions = None
+
+    def transaction_step(self, modelname: str, count: int = 1):
+        """Count objects of a model about to be written in the current transaction chunk, if any."""
+        if self._transactions is not None:
+            self._transactions.step(modelname, count)
+
+    def queue_create(self, model: models.NautobotModel, ids: Dict[str, Any], attrs: Dict[str, Any]):
+        """Queue a model to be written in bulk.
+
+        DiffSync creates the models type by type, in the order of `top_level`, so the
+        queued models of the previous types are written first, which keeps the foreign
+        keys of the queued models resolvable. A full batch is written before the next
+        model is queued, so that every model written has already been added to the
+        adapter, and a model that fails can be removed from it.
+        """
+        modelname = model.get_type()
+        if modelname not in self._queued_creates:
+            self.flush_creates()
+        elif len(self._queued_creates[modelname]) >= BULK_CREATE_BATCH_SIZE:
+            self.flush_creates(modelname)
+        self._queued_creates.setdefault(modelname, []).append((model, ids, attrs))
+
+    def flush_creates(self, modelname: Optional[str] = None):
+        """Write the queued models, of a single type or of all of them, to the database."""
+        for name in [modelname] if modelname else list(self._queued_creates):
+            queued = self._queued_creates.pop(name, None)
+            if queued:
+                getattr(self, name).bulk_create_objects(self, queued)
+
+    def device_failed(self, key: Tuple[str, str, str]):
+        """Record that a write of a device, or of an object that belongs to it, failed.
+
+        Args:
+            key (Tuple[str, str, str]): The device name, device group name and controller name.
+        """
+        self.failed_devices.add(key)
+
+    def queue_fingerprint(self, ids: Dict[str, Any], fingerprint: str):
+        """Queue the fingerprint of a device to be stored when the sync completes.
+
+        Args:
+            ids (Dict[str, Any]): The identifiers of the device.
+            fingerprint (str): The fingerprint of the device in the source.
+        """
+        key = (
+            ids["name"],
+            ids["controller_managed_device_group__name"],
+            ids["controller_managed_device_group__controller__name"],
+        )
+        self._fingerprints[key] = fingerprint
+
+    def set_fingerprints(self):
+        """Store the queued fingerprints of the devices that synced without failures.
+
+        The fingerprint is what lets the next sync skip the interfaces and IP address
+        assignments of a device, so a device with a failed write keeps its previous
+        fingerprint, and is compared in full again. The devices are read with a single
+        query and written with a single `bulk_update`.
+        """
+        fingerprints, self._fingerprints = self._fingerprints, {}
+        if self.failed_devices:
+            self.job.logger.warning(
+                "Some objects of %d devices failed to sync, their fingerprints are not updated: %s",
+                len(self.failed_devices),
+                ", ".join(sorted(name for name, _, _ in self.failed_devices)),
+            )
+            for key in self.failed_devices:
+                fingerprints.pop(key, None)
+        if not fingerprints:
+            return
+        devices = []
+        for device in Device.objects.filter(models.devices_condition(fingerprints)).select_related(
+            "controller_managed_device_group__controller"
+        ):
+            device._custom_field_data["unifi_fingerprint"] = fingerprints[  # pylint: disable=protected-access
+                (
+                    device.name,
+                    device.controller_managed_device_group.name,
+                    device.controller_managed_device_group.controller.name,
+                )
+            ]
+            devices.append(device)
+        Device.objects.bulk_update(devices, ["_custom_field_data"])
+
+    def queue_primary_ips(self, ids: Dict[str, Any], primary_ips: Dict[str, Optional[str]]):
+        """Queue the primary IP addresses of a device to be set when the sync completes.
+
+        Args:
+            ids (Dict[str, Any]): The identifiers of the device.
+            primary_ips (Dict[str, Optional[str]]): The hosts of the primary IP addresses to set (or, when None,
+                to clear), by device field (`primary_ip4` or `primary_ip6`).
+        """
+        if primary_ips:
+            key = (
+                ids["name"],
+                ids["controller_managed_device_group__name"],
+                ids["controller_managed_device_group__controller__name"],
+            )
+            self._primary_ips.setdefault(key, {}).update(primary_ips)
+
+    def set_primary_ips(self):
+        """Set the queued primary IP addresses of the devices.
+
+        The devices, and the IP addresses assigned to their interfaces, are each read
+        with a single query, and the devices are written with a single `bulk_update`.
+        """
+        primary_ips, self._primary_ips = self._primary_ips, {}
+        if not primary_ips:
+            return
+        devices = {
+            (
+                device.name,
+                device.controller_managed_device_group.name,
+                device.controller_managed_device_group.controller.name,
+            ): device
+            for device in Device.objects.filter(models.devices_condition(primary_ips)).select_related(
+                "controller_managed_device_group__controller"
+            )
+        }
+        addresses = {}
+        for pk, host, ip_version, device_id in IPAddress.objects.filter(
+            host__in={host for hosts in primary_ips.values() for host in hosts.values() if host},
+            interfaces__device__in=devices.values(),
+        ).values_list("pk", "host", "ip_version", "interfaces__device_id"):
+            addresses[(device_id, host)] = (pk, ip_version)
+
+        fields, updated = set(), []
+        for key, hosts in primary_ips.items():
+            device = devices.get(key)
+            if device is None:
+                self.job.logger.error("Unable to set the primary IP addresses of %s, the device was not found", key[0])
+                self.device_failed(key)
+                continue
+            for field, host in hosts.items():
+                pk, ip_version = addresses.get((device.pk, host), (None, None)) if host else (None, None)
+                if host and ip_version != (4 if field == "primary_ip4" else 6):
+                    self.job.logger.error(
+                        "Unable to set %s of %s to %s, no such address is assigned to the device", field, device, host
+                    )
+                    self.device_failed(key)
+                    continue
+                setattr(device, f"{field}_id", pk)
+                fields.add(field)
+            updated.append(device)
+        if fields:
+            Device.objects.bulk_update(updated, sorted(fields))
+
+    def tag_objects(self, model_class: Type[Model], pks: Iterable[uuid.UUID]):
+        """Queue some objects to be tagged with the UNIFI_SSOT_TAG when the sync completes."""
+        self._tagged.setdefault(model_class, set()).update(pks)
+
+    def untag_objects(self, model_class: Type[Model], pks: Iterable[uuid.UUID]):
+        """Queue some objects to have the UNIFI_SSOT_TAG removed when the sync completes."""
+        self._untagged.setdefault(model_class, set()).update(pks)
+
+    def apply_tags(self):
+        """Add and remove the queued tags, with a single insert or delete per content type.
+
+        The tagged item rows are written directly, so the `m2m_changed` signals
+        (and the change log entries) of `tags.add` and `tags.remove` are skipped.
+        """
+        untagged, self._untagged = self._untagged, {}
+        tagged, self._tagged = self._tagged, {}
+        for model_class, pks in untagged.items():
+            TaggedItem.objects.filter(
+                content_type=ContentType.objects.get_for_model(model_class),
+                object_id__in=pks,
+                tag=self.unifi_tag,
+            ).delete()
+        for model_class, pks in tagged.items():
+            content_type = ContentType.objects.get_for_model(model_class)
+            TaggedItem.objects.bulk_create(
+                [TaggedItem(content_type=content_type, object_id=pk, tag=self.unifi_tag) for pk in pks],
+                ignore_conflicts=True,
+            )
+
+    def _handle_single_parameter(self, parameters, parameter_name, database_object, diffsync_model):
+        """Intern string parameters.
+
+        Each database row comes with its own copy of the values it shares
+        with many other rows, such as the device and controller names of
+        interfaces. Interning them keeps a single copy in memory.
+        """
+        super()._handle_single_parameter(parameters, parameter_name, database_object, diffsync_model)
+        value = parameters.get(parameter_name)
+        if type(value) is str:  # pylint: disable=unidiomatic-typecheck
+            parameters[parameter_name] = sys.intern(value)
+
+    def _load_objects(self, diffsync_model):
+        """Load the models, restricted by the model's `scope_queryset`."""
+        parameter_names = self._get_parameter_names(diffsync_model)
+        queryset = diffsync_model.scope_queryset(diffsync_model._get_queryset(), self)
+        for database_object in queryset:
+            self._load_single_object(database_object, diffsync_model, parameter_names)
 
     def sync_complete(
         self,
@@ -63,163 +384,480 @@ class UnifiNautobotAdapter(UnifiAdapterMixin, NautobotAdapter):
         flags: DiffSyncFlags = DiffSyncFlags.NONE,
         logger: BoundLogger | None = None,
     ) -> None:
-        """Update devices with their primary IPs once the sync is complete."""
-        for info in self._primary_ips:
-            device = Device.objects.get(**info["device"])
-            for ip in ["primary_ip4", "primary_ip6"]:
-                if info[ip]:
-                    setattr(device, ip, IPAddress.objects.get(host=info[ip]))
-            device.validated_save()
+        """Write the queued objects, and update devices with their primary IPs and fingerprints, once the sync is complete."""
+        self.flush_creates()
+        self.transaction_step("sync_complete")
+        self.set_primary_ips()
+        self.set_fingerprints()
+        self.apply_tags()
+
+
+@dataclasses.dataclass(frozen=True)
+class ControllerSource:
+    """A Unifi controller the source adapter loads from.
+
+    Attributes:
+        name (str): The name of the Nautobot controller.
+        default_location_type (str): The name of the location type to use when creating new locations.
+        default_location_name (str): The name of the location to use when the Unifi site is `default`.
+        client_options (Dict[str, Any]): The keyword arguments used to create the controller's `Client`
+            (host, port, credentials, retry policy, ...).
+    """
+
+    name: str
+    default_location_type: str
+    default_location_name: str
+    client_options: Dict[str, Any] = dataclasses.field(default_factory=dict)
+
+    def location_name(self, site_name: str) -> str:
+        """Get the name of the Nautobot location of a Unifi site."""
+        return self.default_location_name if site_name == "default" else site_name
 
 
 class UnifiAdapter(UnifiAdapterMixin, Adapter):
     """Adapter to connect to Unifi."""
 
+    # The only controller collections the adapter reads.
+    endpoints = ("sites", "devices")
+
     def __init__(
-        self, *args, job: Job, controller_name: str, default_location_type: str, default_location_name: str, **kwargs
+        self,
+        *args,
+        job: Job,
+        max_concurrent_sites: int = 8,
+        fetch_queue_size: int = 8,
+        device_fingerprints: Optional[Dict[str, str]] = None,
+        log_summary: bool = True,
+        port_policy: str = "all",
+        **kwargs,
     ):
         """Initialize the unifi source adapter.
 
-        This adapter will read data from a Unifi Controller and create
-        diffsync models based on the data received.
+        This adapter will read data from one or more Unifi Controllers and
+        create diffsync models based on the data received.
 
         Args:
             *args: Additional positional arguments needed by the parent DiffSync adapter.
             job (Job): The Nautobot job instance that is running this sync.
-            controller_name (str): The device controller name.
-            default_location_type (str): The name of the location type to use when creating new locations.
-            default_location_name (str): The name of the location to use when the Unifi site is `default`.
+            max_concurrent_sites (int): The maximum number of sites to fetch from each controller at once.
+            fetch_queue_size (int): The maximum number of device batches (of `DEVICE_BATCH_SIZE` devices)
+                fetched but not yet loaded. Fetching pauses while the queue is full, which caps the memory
+                used by the device lists in flight.
+            device_fingerprints (Dict[str, str], optional): The fingerprints stored in Nautobot, keyed by
+                device unique ID. The interfaces and IP address assignments of devices whose fingerprint
+                has not changed are not loaded.
+            log_summary (bool): Whether the objects that are loaded are counted per site and logged as a
+                summary, rather than logged one by one.
+            port_policy (str): Which ports of the devices are loaded as interfaces (see `PORT_POLICIES`):
+                `all`, `enabled`, `up` or `addressed` (ports with an IP address, and uplinks).
             **kwargs: Additional keyword arguments needed by the parent DiffSync adapter.
         """
         super(*args, **kwargs).__init__()
         self.job = job
-        self.controller_name = controller_name
-        self.default_location_type = default_location_type
-        self.default_location_name = default_location_name
+        self.max_concurrent_sites = max_concurrent_sites
+        self.fetch_queue_size = fetch_queue_size
+        self.device_fingerprints = device_fingerprints or {}
+        self.job_log = JobLogBuffer(job, summarize=log_summary)
+        if port_policy not in PORT_POLICIES:
+            raise ValueError(f"Unknown port policy '{port_policy}', expected one of {', '.join(PORT_POLICIES)}")
+        self.port_policy = port_policy
+        # The labels of the interfaces the port policy left out, by device (name, device group and controller).
+        self.skipped_interfaces: Dict[Tuple[str, str, str], List[str]] = {}
+        self.unchanged_devices: Set[Tuple[str, str, str]] = set()
+        # The networks of the addresses of the devices, and the identifiers of the prefixes and IP
+        # addresses already added, so that each is computed and built once per run.
+        self.addresses = AddressCache()
+        self._prefix_keys: Set[Tuple[str, int]] = set()
+        self._ip_address_keys: Set[Tuple[str, int]] = set()
+        # The requests sent to, and the time spent loading, each controller by name.
+        self.request_metrics: Dict[str, RequestMetrics] = {}
+        self.load_times: Dict[str, float] = {}
         self.debug = kwargs.get("debug", False)
 
-    @sync_to_async
-    def _debug(self, *args, **kwargs):
-        self.job.logger.debug(*args, **kwargs)
+    # Records are logged in the event loop and written to the database in bulk, so
+    # that logging does not cost a thread hop and a database write per record.
+    async def _debug(self, *args, **kwargs):
+        self.job_log.debug(*args, **kwargs)
+        await self._flush_log()
+
+    async def _added(self, obj, scope: Optional[str] = None):
+        self.job_log.added(obj, scope)
+        await self._flush_log()
+
+    async def _info(self, *args, **kwargs):
+        self.job_log.info(*args, **kwargs)
+        await self._flush_log(force=True)
+
+    async def _warning(self, *args, **kwargs):
+        self.job_log.warning(*args, **kwargs)
+        await self._flush_log(force=True)
 
-    @sync_to_async
-    def _info(self, *args, **kwargs):
-        self.job.logger.info(*args, **kwargs)
+    async def _error(self, *args, **kwargs):
+        self.job_log.error(*args, **kwargs)
+        await self._flush_log(force=True)
 
-    def _create_interface(self, device, interface_name, interface_type, port_id):
+    async def _flush_log(self, force: bool = False):
+        if force or self.job_log.full:
+            await sync_to_async(self.job_log.flush)()
+
+    def _create_interface(self, device_identifiers: Dict[str, str], interface_name, interface_type, port_id):
         return self.interface(
-            **{f"device__{key}": value for key, value in device.get_identifiers().items()},
+            **device_identifiers,
             label=interface_name,
             type=interface_type,
             unifi_port_id=port_id,
         )
 
-    async def _assign_ip(self, ip: str, netmask: str, interface: str) -> IPNetwork:
-        ip_address = IPNetwork(f"{ip}/{netmask}")
-        prefix, created = self.get_or_add_model_instance(
-            self.prefix(
-                network=str(ip_address.network),
-                prefix_length=ip_address.prefixlen,
+    @staticmethod
+    def _device_addresses(devices: Iterable[DeviceRecord]) -> Iterable[Tuple[str, str]]:
+        for unifi_device in devices:
+            for port in unifi_device.ports:
+                if port.ip:
+                    yield port.ip, port.netmask
+            config_network = unifi_device.config_network
+            if config_network and config_network.type == "static":
+                yield config_network.ip, config_network.netmask
+
+    async def _add_ip_address(self, ip: str, netmask: str) -> Tuple[Address, bool]:
+        address = self.addresses.get(ip, netmask)
+        # Management networks are shared by thousands of devices, so the prefix (and the
+        # IP address) models are only built the first time they are seen.
+        prefix_key = (address.network, address.prefix_length)
+        if prefix_key not in self._prefix_keys:
+            self._prefix_keys.add(prefix_key)
+            prefix, created = self.get_or_add_model_instance(
+                self.prefix(network=address.network, prefix_length=address.prefix_length)
             )
-        )
-        if created:
-            await self._debug("Added prefix %s", prefix)
+            if created:
+                await self._added(prefix)
 
-        _, created = self.get_or_add_model_instance(
+        ip_address_key = (address.host, address.prefix_length)
+        if ip_address_key in self._ip_address_keys:
+            return address, False
+        self._ip_address_keys.add(ip_address_key)
+        ip_address, created = self.get_or_add_model_instance(
             self.ip_address(
-                host=str(ip_address.ip),
-                mask_length=ip_address.prefixlen,
-                parent__network=str(ip_address.network),
-                parent__prefix_length=ip_address.prefixlen,
+                host=address.host,
+                mask_length=address.prefix_length,
+                parent__network=address.network,
+                parent__prefix_length=address.prefix_length,
             )
         )
+        if created:
+            await self._added(ip_address)
+        return address, created
+
+    async def _assign_ip(
+        self,
+        ip: str,
+        netmask: str,
+        interface: models.InterfaceModel,
+        interface_device_identifiers: Dict[str, str],
+        scope: Optional[str] = None,
+    ) -> Address:  # pylint: disable=too-many-arguments
+        address, created = await self._add_ip_address(ip, netmask)
         if created:
             self.add(interface)
+            await self._added(interface, scope)
             assignment = self.ip_address_to_interface(
-                **{f"interface__{key}": value for key, value in interface.get_identifiers().items()},
+                **interface_device_identifiers,
+                interface__label=interface.label,
                 ip_address__host=ip,
             )
             self.add(assignment)
-        return ip_address
+        return address
 
     @async_to_sync
-    async def load(self, host, port, username, password, verify_cert, timeout):
-        """Asynchronously load data from unifi."""
-        self.client = Client(
-            host=host,
-            port=port,
-            username=username,
-            password=password,
-            verify_cert=verify_cert,
-            timeout=timeout,
+    async def load(self, controllers: Iterable[ControllerSource]):
+        """Asynchronously load data from unifi.
+
+        Loading is a pipeline of two stages running in a single event loop.
+        The fetch stage streams the device lists of all the controllers'
+        sites concurrently (up to `max_concurrent_sites` at a time per
+        controller) and puts the devices, in batches, on a bounded queue.
+        The transform stage builds the DiffSync models of each batch as it
+        comes in, while the next batches are being received.
+
+        Args:
+            controllers (Iterable[ControllerSource]): The controllers to load.
+        """
+        queue: "asyncio.Queue[Optional[Tuple[ControllerSource, models.SiteModel, List[DeviceRecord]]]]" = asyncio.Queue(
+            maxsize=self.fetch_queue_size
         )
-        await self._info("Loading data from the Unifi Controller %s", self.job.controller)
+
+        async def fetch():
+            await gather(*(self._load_controller(controller, queue) for controller in controllers))
+            await queue.put(None)
+
+        try:
+            # If either stage fails, the other one is cancelled rather than left waiting on the queue.
+            await gather(fetch(), self._transform(queue))
+        finally:
+            await sync_to_async(self.job_log.close)()
+
+    async def _transform(self, queue: asyncio.Queue):
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            controller, site, devices = batch
+            self.addresses.resolve(self._device_addresses(devices))
+            for unifi_device in devices:
+                await self._load_device(controller, site, unifi_device)
+            # Building models does not wait for anything, so let the fetch stage read its responses.
+            await asyncio.sleep(0)
+
+    async def _load_controller(self, controller: ControllerSource, queue: asyncio.Queue):
+        started = time.monotonic()
+        client = Client(endpoints=self.endpoints, **controller.client_options)
+        await self._info("Loading data from the Unifi Controller %s", controller.name)
         self.add(
             self.device_group(
                 name="default",
-                controller__name=self.controller_name,
+                controller__name=controller.name,
             )
         )
-        for site in await self.client.get_sites():
-            site_name = site.name
-            self.client.site = site_name
-            if site_name == "default":
-                site_name = self.default_location_name
-                location_type__name = self.default_location_type
-            site = self.site(name=site_name, location_type__name=location_type__name)
-            await self._debug("Added site %s", site)
-            self.add(site)
-
-            for unifi_device in await self.client.get_devices():
-                unifi_info = self.job.hardware_models[unifi_device.model]
-                unifi_type = unifi_info["type"]
-                if unifi_type == "usw":
-                    if "lite" in unifi_info["name"].lower():
-                        unifi_type = "usw_lite"
-                    elif "flex" in unifi_info["name"].lower():
-                        unifi_type = "usw_flex"
-
-                device_type = self.device_type(
-                    model=unifi_device.model,
-                    part_number=unifi_info["sku"],
+        try:
+            semaphore = asyncio.Semaphore(self.max_concurrent_sites)
+            await gather(
+                *(
+                    self._load_site(semaphore, queue, controller, client, unifi_site.name)
+                    for unifi_site in await client.get_sites()
                 )
-                _, created = self.get_or_add_model_instance(device_type)
-                if created:
-                    await self._debug("Added device type %s", device_type)
-
-                device = self.device(
-                    name=unifi_device.name,
-                    controller_managed_device_group__name="default",
-                    controller_managed_device_group__controller__name=self.job.controller.name,
-                    location__name=site.name,
-                    device_type__model=unifi_device.model,
-                    role__name=UNIFI_MAP[unifi_type]["role"],
-                    serial=unifi_device.raw["serial"],
-                    platform__name=UNIFI_MAP[unifi_type]["platform"],
+            )
+        except Exception:
+            await self._error("Failed to load data from the Unifi Controller %s", controller.name)
+            raise
+        finally:
+            await client.logout()
+            self.request_metrics[controller.name] = client.metrics
+            self.load_times[controller.name] = time.monotonic() - started
+
+    async def _load_site(
+        self,
+        semaphore: asyncio.Semaphore,
+        queue: asyncio.Queue,
+        controller: ControllerSource,
+        client: Client,
+        site_name: str,
+    ):  # pylint: disable=too-many-arguments
+        async with semaphore:
+            site = await self._add_site(controller, site_name)
+            devices = []
+            async for unifi_device in client.for_site(site_name).iter_devices():
+                devices.append(unifi_device)
+                if len(devices) == DEVICE_BATCH_SIZE:
+                    await queue.put((controller, site, devices))
+                    devices = []
+            if devices:
+                await queue.put((controller, site, devices))
+
+    @async_to_sync
+    async def load_devices(self, controller: ControllerSource, site_name: str, devices: Iterable[DeviceRecord]):
+        """Load some devices that have already been fetched from a controller site.
+
+        Args:
+            controller (ControllerSource): The controller the devices were fetched from.
+            site_name (str): The Unifi site name of the devices.
+            devices (Iterable[DeviceRecord]): The devices.
+        """
+        self.get_or_add_model_instance(self.device_group(name="default", controller__name=controller.name))
+        site = await self._add_site(controller, site_name)
+        devices = list(devices)
+        self.addresses.resolve(self._device_addresses(devices))
+        try:
+            for unifi_device in devices:
+                await self._load_device(controller, site, unifi_device)
+        finally:
+            await sync_to_async(self.job_log.close)()
+
+    async def _add_site(self, controller: ControllerSource, site_name: str) -> models.SiteModel:
+        # Controllers can share locations, so the site may already have been added.
+        site, created = self.get_or_add_model_instance(
+            self.site(name=controller.location_name(site_name), location_type__name=controller.default_location_type)
+        )
+        if created:
+            await self._added(site)
+        return site
+
+    async def _load_device(self, controller: ControllerSource, site: models.SiteModel, unifi_device: DeviceRecord):
+        hardware_model = self.job.hardware_models.get(unifi_device.model)
+        device_type = self.device_type(
+            model=unifi_device.model,
+            part_number=hardware_model.sku,
+        )
+        _, created = self.get_or_add_model_instance(device_type)
+        if created:
+            await self._added(device_type)
+            if not hardware_model.known:
+                await self._warning(
+                    "The Unifi model %s is not in the hardware catalog, its devices are synced with the %s platform",
+                    unifi_device.model,
+                    hardware_model.platform,
                 )
-                await self._debug("Adding device %s", device)
-                self.add(device)
-                for port in unifi_device.raw["port_table"]:
-                    interface = self._create_interface(
-                        device,
-                        port["name"],
-                        UNIFI_SSOT_INTERFACE_TYPES[port.get("media", "other").lower()],
-                        port["port_idx"],
-                    )
-                    if "ip" in port:
-                        await self._assign_ip(port["ip"], port["netmask"], interface)
-                    else:
-                        self.add(interface)
-
-                if unifi_device.raw["config_network"] and unifi_device.raw["config_network"]["type"] == "static":
-                    interface = self._create_interface(device, "mgmt", UNIFI_SSOT_INTERFACE_TYPES["other"], -1)
-                    await self._debug("Setting management interface info: %s", unifi_device.raw["config_network"])
-                    ip_address = await self._assign_ip(
-                        unifi_device.raw["config_network"]["ip"],
-                        unifi_device.raw["config_network"]["netmask"],
-                        interface,
-                    )
-                    if ip_address.version == 4:
-                        device.primary_ip4__host = str(ip_address.ip)
-                    else:
-                        device.primary_ip6__host = str(ip_address.ip)
+
+        device = self.device(
+            name=unifi_device.name,
+            controller_managed_device_group__name="default",
+            controller_managed_device_group__controller__name=controller.name,
+            location__name=site.name,
+            device_type__model=unifi_device.model,
+            role__name=hardware_model.role,
+            serial=unifi_device.serial,
+            platform__name=hardware_model.platform,
+            unifi_fingerprint=unifi_device.fingerprint(site.name, port_policy=self.port_policy),
+        )
+        scope = f"on site {site.name}"
+        self.add(device)
+        await self._added(device, scope)
+
+        config_network = unifi_device.config_network
+        if config_network and config_network.type != "static":
+            config_network = None
+
+        device_key = (
+            device.name,
+            device.controller_managed_device_group__name,
+            device.controller_managed_device_group__controller__name,
+        )
+        if self.device_fingerprints.get(device.get_unique_id()) == device.unifi_fingerprint:
+            # Nothing below the device has changed since the last sync, so its interfaces
+            # and IP address assignments are neither loaded nor compared. The (shared)
+            # IP addresses and prefixes are still loaded so that they are kept.
+            self.unchanged_devices.add(device_key)
+            for port in unifi_device.ports:
+                if port.ip:
+                    await self._add_ip_address(port.ip, port.netmask)
+            if config_network:
+                address, _ = await self._add_ip_address(config_network.ip, config_network.netmask)
+                self._set_primary_ip(device, address)
+            return
+
+        # The identifiers of the device, as used by its interfaces and IP address assignments, are
+        # built once. Every model then shares the same dictionary values rather than copies.
+        device_identifiers = {f"device__{key}": value for key, value in device.get_identifiers().items()}
+        interface_device_identifiers = {f"interface__{key}": value for key, value in device_identifiers.items()}
+        port_filter = PORT_POLICIES[self.port_policy]
+        for port in unifi_device.ports:
+            if not port_filter(port):
+                # Neither the interface nor its IP address assignment are synced, but the IP
+                # address is kept, like those of unchanged devices.
+                self.skipped_interfaces.setdefault(device_key, []).append(port.name)
+                if port.ip:
+                    await self._add_ip_address(port.ip, port.netmask)
+                continue
+            interface = self._create_interface(
+                device_identifiers,
+                port.name,
+                UNIFI_SSOT_INTERFACE_TYPES[port.media.lower()],
+                port.port_idx,
+            )
+            if port.ip:
+                await self._assign_ip(port.ip, port.netmask, interface, interface_device_identifiers, scope)
+            else:
+                self.add(interface)
+                await self._added(interface, scope)
+
+        if config_network:
+            interface = self._create_interface(device_identifiers, "mgmt", UNIFI_SSOT_INTERFACE_TYPES["other"], -1)
+            if not self.job_log.summarize:
+                await self._debug("Setting management interface info: %s", config_network)
+            address = await self._assign_ip(
+                config_network.ip, config_network.netmask, interface, interface_device_identifiers, scope
+            )
+            self._set_primary_ip(device, address)
+
+    @staticmethod
+    def _set_primary_ip(device: models.DeviceModel, address: Address):
+        if address.version == 4:
+            device.primary_ip4__host = address.host
+        else:
+            device.primary_ip6__host = address.host
+
+
+class _Stopped(Exception):
+    """Raised in the fetching thread of a `SiteStream` when its consumer has stopped."""
+
+
+class SiteStream:
+    """Fetch the devices of all the sites of some controllers, one site at a time.
+
+    Sites are fetched in a background thread, with its own event loop, while
+    the consumer works on the previous ones. At most `prefetch` fetched sites
+    wait for the consumer, so memory depends on the largest sites rather than
+    on all of them.
+    """
+
+    def __init__(self, controllers: Iterable[ControllerSource], prefetch: int = 1):
+        """Create a new stream.
+
+        Args:
+            controllers (Iterable[ControllerSource]): The controllers to fetch, in order.
+            prefetch (int, optional): How many sites are fetched ahead of the consumer. Defaults to 1.
+        """
+        self.controllers = list(controllers)
+        self.prefetch = prefetch
+        # Like the source adapter: the requests sent to, and the time spent fetching, each controller by name.
+        self.request_metrics: Dict[str, RequestMetrics] = {}
+        self.load_times: Dict[str, float] = {}
+
+    def __iter__(self) -> Iterator[Tuple[ControllerSource, str, List[DeviceRecord]]]:
+        """Iterate over the controller, Unifi site name and devices of every site.
+
+        Raises:
+            Exception: Any error fetching the sites. Leaving the loop early stops fetching.
+        """
+        sites: "queue.Queue" = queue.Queue(maxsize=self.prefetch)
+        stopped = threading.Event()
+
+        def put(item):
+            while not stopped.is_set():
+                try:
+                    sites.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            raise _Stopped
+
+        def fetch():
+            try:
+                asyncio.run(self._fetch(put))
+                put(None)
+            except _Stopped:
+                pass
+            except BaseException as error:  # pylint: disable=broad-exception-caught
+                try:
+                    put(error)
+                except _Stopped:
+                    pass
+
+        thread = threading.Thread(target=fetch, name="unifi-site-stream", daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = sites.get()
+                if item is None:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stopped.set()
+            thread.join()
+
+    async def _fetch(self, put):
+        for controller in self.controllers:
+            started = time.monotonic()
+            waited = 0.0
+            client = Client(endpoints=UnifiAdapter.endpoints, **controller.client_options)
+            try:
+                for unifi_site in await client.get_sites():
+                    devices = [device async for device in client.for_site(unifi_site.name).iter_devices()]
+                    # Nothing else runs in this event loop, so it can block until the consumer is ready.
+                    waiting = time.monotonic()
+                    put((controller, unifi_site.name, devices))
+                    waited += time.monotonic() - waiting
+            finally:
+                await client.logout()
+                self.request_metrics[controller.name] = client.metrics
+                self.load_times[controller.name] = time.monotonic() - started - waited
@@ -1,20 +1,279 @@
 """Nautobot DiffSync models for Unifi SSoT."""
 
-from typing import TYPE_CHECKING, Annotated, Optional
+from typing import TYPE_CHECKING, Annotated, Any, Dict, Iterable, List, Optional, Tuple
+import abc
 import uuid
 
+from diffsync.enum import DiffSyncStatus
+from diffsync.exceptions import ObjectCrudException
+from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist, ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
 from nautobot_ssot.contrib import NautobotModel, CustomFieldAnnotation
 
-from nautobot.extras.models import Tag, Status
 from nautobot.dcim.models import DeviceType, Device, Location, ControllerManagedDeviceGroup, Interface
+from nautobot.extras.models import CustomField
 from nautobot.ipam.models import IPAddress, Prefix, IPAddressToInterface
 from nautobot.ipam.choices import PrefixTypeChoices
 
 from nautobot_ssot_unifi.const import UNIFI_MANUFACTURER, UNIFI_SSOT_TAG
 
+from netaddr import IPAddress as NetaddrIPAddress
+
 if TYPE_CHECKING:
     from nautobot_ssot_unifi.ssot.adapters import UnifiNautobotAdapter
 
+# A model created in bulk mode, waiting to be written: the DiffSync model, its identifiers and its attributes.
+QueuedCreate = Tuple[NautobotModel, Dict[str, Any], Dict[str, Any]]
+
+
+def exclude_devices(queryset, devices: Iterable[Tuple[str, str, str]], prefix: str = ""):
+    """Exclude the objects that belong to the given devices from a queryset.
+
+    Args:
+        queryset (QuerySet): The queryset to filter.
+        devices (Iterable[Tuple[str, str, str]]): The devices to exclude, as tuples of the
+            device name, the controller managed device group name and the controller name.
+        prefix (str, optional): The lookup path from the queryset's model to the device,
+            such as `device__`. Defaults to the device itself.
+
+    Returns:
+        QuerySet: The filtered queryset.
+    """
+    groups = {}
+    for name, group_name, controller_name in devices:
+        groups.setdefault((group_name, controller_name), set()).add(name)
+    for (group_name, controller_name), names in groups.items():
+        queryset = queryset.exclude(
+            **{
+                f"{prefix}name__in": names,
+                f"{prefix}controller_managed_device_group__name": group_name,
+                f"{prefix}controller_managed_device_group__controller__name": controller_name,
+            }
+        )
+    return queryset
+
+
+def exclude_interfaces(queryset, interfaces: Dict[Tuple[str, str, str], List[str]], prefix: str = ""):
+    """Exclude the given interfaces, and the objects that belong to them, from a queryset.
+
+    The interfaces are looked up with a single query, by device group and
+    controller and by label, and matched to their devices in Python. The
+    queryset then excludes their primary keys, so the size of the condition
+    does not depend on how differently the devices' ports were left out.
+
+    Args:
+        queryset (QuerySet): The queryset to filter.
+        interfaces (Dict[Tuple[str, str, str], List[str]]): The labels of the interfaces to exclude,
+            by device (name, controller managed device group name and controller name).
+        prefix (str, optional): The lookup path from the queryset's model to the interface,
+            such as `interface__`. Defaults to the interface itself.
+
+    Returns:
+        QuerySet: The filtered queryset.
+    """
+    if not interfaces:
+        return queryset
+    labels = {key: set(device_labels) for key, device_labels in interfaces.items()}
+    interface_ids = [
+        pk
+        for pk, label, *key in Interface.objects.filter(
+            devices_condition(labels, prefix="device__"),
+            label__in=set().union(*labels.values()),
+        ).values_list(
+            "pk",
+            "label",
+            "device__name",
+            "device__controller_managed_device_group__name",
+            "device__controller_managed_device_group__controller__name",
+        )
+        if label in labels.get(tuple(key), ())
+    ]
+    return queryset.exclude(**{f"{prefix}pk__in": interface_ids})
+
+
+def devices_condition(devices: Iterable[Tuple[str, str, str]], prefix: str = "") -> Q:
+    """Get the condition matching the objects that belong to the given devices.
+
+    Args:
+        devices (Iterable[Tuple[str, str, str]]): The devices, as tuples of the device name,
+            the controller managed device group name and the controller name.
+        prefix (str, optional): The lookup path from the queryset's model to the device,
+            such as `device__`. Defaults to the device itself.
+
+    Returns:
+        Q: The condition.
+    """
+    groups = {}
+    for name, group_name, controller_name in devices:
+        groups.setdefault((group_name, controller_name), set()).add(name)
+    condition = Q(pk__in=[])
+    for (group_name, controller_name), names in groups.items():
+        condition |= Q(
+            **{
+                f"{prefix}name__in": names,
+                f"{prefix}controller_managed_device_group__name": group_name,
+                f"{prefix}controller_managed_device_group__controller__name": controller_name,
+            }
+        )
+    return condition
+
+
+def include_identifiers(queryset, identifiers: Iterable[Dict[str, Any]]):
+    """Only keep the objects matching any of the given identifiers in a queryset.
+
+    The objects are looked up with a single query, with a `__in` condition per
+    identifier field, and those whose combination of values was not given
+    (such as a prefix length of another network) are left out in Python. The
+    queryset is then filtered by primary key, so the size of the conditions
+    does not grow with the number of objects.
+
+    Args:
+        queryset (QuerySet): The queryset to filter.
+        identifiers (Iterable[Dict[str, Any]]): The identifiers (as returned by
+            `get_identifiers`) of the objects to keep.
+
+    Returns:
+        QuerySet: The filtered queryset.
+    """
+    identifiers = list(identifiers)
+    if not identifiers:
+        return queryset.none()
+    fields = list(identifiers[0])
+    keys = {tuple(ids[field] for field in fields) for ids in identifiers}
+    candidates = queryset.filter(
+        **{f"{field}__in": {key[index] for key in keys} for index, field in enumerate(fields)}
+    ).values_list("pk", *fields)
+    return queryset.filter(pk__in={pk for pk, *key in candidates if tuple(key) in keys})
+
+
+class ScopedQuerysetMixin:
+    """Mixin that lets the adapter narrow down what is loaded from Nautobot.
+
+    Models that belong to a device set `_device_lookup` to the lookup path
+    from the model to its device. Models that belong to a controller set
+    `_controller_lookup` to the lookup path from the model to the name of
+    its controller. Models shared by the controllers set `_shared` instead.
+    """
+
+    _device_lookup: Optional[str] = None
+    _controller_lookup: Optional[str] = None
+    _shared: bool = False
+
+    @classmethod
+    def scope_queryset(cls, queryset, adapter: "UnifiNautobotAdapter"):
+        """Restrict the queryset loaded by the adapter.
+
+        When the adapter is scoped to some controllers, only the objects of
+        those controllers are loaded. Shared objects (locations, device
+        types, prefixes and IP addresses) are loaded when the adapter's
+        source adapter has them, whether or not a device uses them, or by
+        their tag alone when there is no source adapter. Those the source
+        adapter no longer has keep their tag, as another controller may still
+        use them.
+
+        When the adapter is limited to the contents of another adapter, only
+        the objects that adapter has are loaded. For models that belong to a
+        device, that means all of the objects of the devices it has and, when
+        the adapter is also scoped to a site, all of the objects of the
+        controller's devices at the site's location.
+
+        Args:
+            queryset (QuerySet): The queryset from `get_queryset`.
+            adapter (UnifiNautobotAdapter): The adapter loading the objects.
+
+        Returns:
+            QuerySet: The queryset that should be loaded.
+        """
+        if adapter.controller_names is not None:
+            if cls._device_lookup is not None:
+                queryset = queryset.filter(
+                    **{
+                        f"{cls._device_lookup}controller_managed_device_group__controller__name__in": (
+                            adapter.controller_names
+                        )
+                    }
+                )
+            elif cls._controller_lookup is not None:
+                # Lookups through reverse relations match an object once per related object.
+                queryset = queryset.filter(
+                    pk__in=cls._model.objects.filter(
+                        **{f"{cls._controller_lookup}__in": adapter.controller_names}
+                    ).values("pk")
+                )
+            elif cls._shared and adapter.source_adapter is not None:
+                queryset = include_identifiers(
+                    queryset, [obj.get_identifiers() for obj in adapter.source_adapter.get_all(cls._modelname)]
+                )
+        if adapter.limit_to is not None:
+            if cls._device_lookup is not None:
+                devices = [
+                    (
+                        device.name,
+                        device.controller_managed_device_group__name,
+                        device.controller_managed_device_group__controller__name,
+                    )
+                    for device in adapter.limit_to.get_all("device")
+                ]
+                condition = devices_condition(devices, prefix=cls._device_lookup)
+                if adapter.scope_site is not None:
+                    controller_name, location_name = adapter.scope_site
+                    condition |= Q(
+                        **{
+                            f"{cls._device_lookup}location__name": location_name,
+                            f"{cls._device_lookup}controller_managed_device_group__controller__name": controller_name,
+                        }
+                    )
+                queryset = queryset.filter(condition)
+            else:
+                queryset = include_identifiers(
+                    queryset, [obj.get_identifiers() for obj in adapter.limit_to.get_all(cls._modelname)]
+                )
+        return queryset
+
+
+class DeviceFailureMixin:
+    """Mixin that reports the failed writes of a device, and of the objects that belong to it, to the adapter.
+
+    The adapter does not store the fingerprint of a device that had a failure,
+    so that the next sync compares all of its objects again.
+    """
+
+    @classmethod
+    def device_key(cls, ids: Dict[str, Any]) -> Tuple[str, str, str]:
+        """Get the device (name, device group name and controller name) an object belongs to, from its identifiers."""
+        return (
+            ids[f"{cls._device_lookup}name"],
+            ids[f"{cls._device_lookup}controller_managed_device_group__name"],
+            ids[f"{cls._device_lookup}controller_managed_device_group__controller__name"],
+        )
+
+    @classmethod
+    def create(cls, adapter: "UnifiNautobotAdapter", ids, attrs):
+        """Create the object, reporting its device when it fails."""
+        try:
+            return super().create(adapter, ids, attrs)
+        except ObjectCrudException:
+            adapter.device_failed(cls.device_key(ids))
+            raise
+
+    def update(self, attrs):
+        """Update the object, reporting its device when it fails."""
+        try:
+            return super().update(attrs)
+        except ObjectCrudException:
+            self.adapter.device_failed(self.device_key(self.get_identifiers()))
+            raise
+
+    def delete(self):
+        """Delete the object, reporting its device when it fails."""
+        try:
+            return super().delete()
+        except ObjectCrudException:
+            self.adapter.device_failed(self.device_key(self.get_identifiers()))
+            raise
+
 
 class ActiveStatusMixin:
     """A mixin that sets the status to active upon creation."""
@@ -22,11 +281,26 @@ class ActiveStatusMixin:
     @classmethod
     def create(cls, adapter: "UnifiNautobotAdapter", ids, attrs):
         """This overridden method makes sure to set the object status as `Active` when created."""
-        attrs["status_id"] = Status.objects.get(name="Active").id
+        attrs["status_id"] = adapter.active_status.id
         return super().create(adapter, ids, attrs)
 
 
-class UnifiModelMixin:
+class TransactionChunkMixin:
+    """Mixin that counts the writes of a model in the adapter's transaction chunks."""
+
+    @classmethod
+    def _update_obj_with_parameters(cls, obj, parameters, adapter: "UnifiNautobotAdapter"):
+        """Save the object in the adapter's current transaction chunk."""
+        adapter.transaction_step(cls._modelname)
+        super()._update_obj_with_parameters(obj, parameters, adapter)
+
+    def delete(self):
+        """Delete the object in the adapter's current transaction chunk."""
+        self.adapter.transaction_step(self._modelname)
+        return super().delete()
+
+
+class UnifiModelMixin(TransactionChunkMixin, ScopedQuerysetMixin):
     """Mixin to provide standard functionality for all Unifi Nautobot models."""
 
     @classmethod
@@ -42,7 +316,7 @@ class UnifiModelMixin:
         database (by identifier). If found, rather than "creating" a
         new object the existing object will be tagged with the UNIFI_SSOT_TAG
         and then updated with the attributes. If not found then
-        the object is created.
+        the object is created. Tags are added when the sync completes.
 
         Args:
             adapter (UnifiNautobotAdapter): The diffsync adapter.
@@ -52,27 +326,194 @@ class UnifiModelMixin:
         Returns:
             NautobotModel: The diffsync model created/updated.
         """
+        adapter.flush_creates()
         try:
-            obj = cls._model.objects.get(**ids)
-            obj.tags.add(Tag.objects.get(name=UNIFI_SSOT_TAG))
-            return cls(**{**ids, **attrs, "pk": obj.pk})
+            pk = cls._model.objects.values_list("pk", flat=True).get(**ids)
         except cls._model.DoesNotExist:
-            model = super().create(adapter, ids, attrs)
-            cls._model.objects.get(**ids).tags.add(Tag.objects.get(name=UNIFI_SSOT_TAG))
-            return model
+            return super().create(adapter, ids, attrs)
+        adapter.tag_objects(cls._model, [pk])
+        return cls(**{**ids, **attrs, "pk": pk})
+
+    @classmethod
+    def _update_obj_with_parameters(cls, obj, parameters, adapter: "UnifiNautobotAdapter"):
+        """Save the object, and queue it for tagging with the UNIFI_SSOT_TAG when it is new."""
+        new = obj._state.adding  # pylint: disable=protected-access
+        super()._update_obj_with_parameters(obj, parameters, adapter)
+        if new:
+            adapter.tag_objects(cls._model, [obj.pk])
+
+    @classmethod
+    def tag_objects(cls, adapter: "UnifiNautobotAdapter", pks: Iterable[uuid.UUID]):
+        """Queue some objects for tagging with the UNIFI_SSOT_TAG.
+
+        Args:
+            adapter (UnifiNautobotAdapter): The diffsync adapter.
+            pks (Iterable[UUID]): The primary keys of the objects.
+        """
+        adapter.tag_objects(cls._model, pks)
+
+    def update(self, attrs):
+        """Update the object, once the objects queued for creation have been written."""
+        self.adapter.flush_creates()
+        return super().update(attrs)
 
     def delete(self):
-        """Remove the UNIFI_SSOT_TAG from a model.
+        """Remove the UNIFI_SSOT_TAG from a model, or delete it for models that set `_perform_delete`.
 
         Returns:
             NautobotModel: Returns `self`
         """
-        self.get_from_db().tags.remove(Tag.objects.get(name=UNIFI_SSOT_TAG))
+        self.adapter.flush_creates()
         if getattr(self, "_perform_delete", False):
+            # Deleting the object deletes its tag assignments too.
             return super().delete()
+        self.adapter.untag_objects(self._model, [self.pk])
         return self
 
 
+class BulkCreateMixin(abc.ABC):
+    """Mixin for the models the adapter can create in bulk.
+
+    When the adapter's `bulk_create` is set, `create` only queues the object.
+    The adapter then writes the queued objects of a model, in batches, with
+    `bulk_create_objects`: foreign keys are resolved (by the model's
+    `bulk_prepare`), conflicts and existing objects are found, and the
+    objects are validated, with a few queries per batch rather than per
+    object.
+
+    The objects that cannot be written in bulk, because they conflict with
+    other objects or need the checks of the model's `clean`, go through the
+    regular `create`. Objects written in bulk get no change log entries, as
+    their `save` is not called.
+
+    As the writes happen after DiffSync's `create` returned, a failed object
+    is not raised to DiffSync. It is logged, marked with the `ERROR` status,
+    removed from the adapter and, for the objects of a device, reported as
+    a failure of the device.
+    """
+
+    @classmethod
+    def create(cls, adapter: "UnifiNautobotAdapter", ids, attrs):
+        """Queue the object in bulk mode, or create it."""
+        if not adapter.bulk_create:
+            return super().create(adapter, ids, attrs)
+        model = cls.create_base(adapter=adapter, ids=ids, attrs=attrs)
+        adapter.queue_create(model, ids, attrs)
+        return model
+
+    @classmethod
+    @abc.abstractmethod
+    def bulk_prepare(cls, queued: List[QueuedCreate]):
+        """Build the database objects of a batch of queued models.
+
+        Args:
+            queued (List[QueuedCreate]): The queued models.
+
+        Returns:
+            Tuple[List[Tuple[QueuedCreate, Model]], List[Tuple[QueuedCreate, UUID]], List[QueuedCreate]]: The
+                queued models with their new object, those with the primary key of their existing object,
+                and those that must be created one by one.
+        """
+
+    @classmethod
+    def bulk_validate(cls, objects: List[Any]) -> List[Optional[ValidationError]]:
+        """Validate the fields of a batch of new objects, without querying the database per object.
+
+        The foreign keys were resolved from the database, so they are not checked again. Custom
+        field values are validated, and defaulted, like `CustomFieldModel.clean` does.
+
+        Args:
+            objects (List[Model]): The new objects.
+
+        Returns:
+            List[Optional[ValidationError]]: The error of each object, None when it is valid.
+        """
+        exclude = [field.name for field in cls._model._meta.fields if field.is_relation]
+        custom_fields = (
+            {custom_field.key: custom_field for custom_field in CustomField.objects.get_for_model(cls._model)}
+            if hasattr(cls._model, "_custom_field_data")
+            else {}
+        )
+        errors = []
+        for obj in objects:
+            try:
+                obj.clean_fields(exclude=exclude)
+                if custom_fields:
+                    for key, value in obj._custom_field_data.items():
+                        if key in custom_fields:
+                            obj._custom_field_data[key] = custom_fields[key].validate(value)
+                    for custom_field in custom_fields.values():
+                        if custom_field.key not in obj._custom_field_data:
+                            if custom_field.default is not None:
+                                obj._custom_field_data[custom_field.key] = custom_field.default
+                            elif custom_field.required:
+                                raise ValidationError(f"Missing required custom field '{custom_field.key}'.")
+                errors.append(None)
+            except ValidationError as error:
+                errors.append(error)
+        return errors
+
+    @classmethod
+    def bulk_create_objects(cls, adapter: "UnifiNautobotAdapter", queued: List[QueuedCreate]):
+        """Write a batch of queued models to the database.
+
+        Args:
+            adapter (UnifiNautobotAdapter): The diffsync adapter.
+            queued (List[QueuedCreate]): The queued models.
+        """
+        new, existing, one_by_one = cls.bulk_prepare(queued)
+        valid = []
+        for (item, obj), error in zip(new, cls.bulk_validate([obj for _, obj in new])):
+            if error is None:
+                valid.append((item, obj))
+            else:
+                cls.bulk_create_failed(adapter, item, error)
+        adapter.transaction_step(cls._modelname, len(valid))
+        try:
+            with transaction.atomic():
+                cls._model.objects.bulk_create([obj for _, obj in valid])
+        except IntegrityError:
+            # Something else got in the way, the regular create reports what it is.
+            one_by_one.extend(item for item, _ in valid)
+            valid = []
+        for (model, _, _), obj in valid:
+            model.pk = obj.pk
+        for (model, _, _), pk in existing:
+            model.pk = pk
+        if hasattr(cls, "tag_objects"):
+            cls.tag_objects(adapter, [obj.pk for _, obj in valid] + [pk for _, pk in existing])
+
+        for item in one_by_one:
+            model, ids, attrs = item
+            try:
+                created = super(BulkCreateMixin, cls).create(adapter, ids, attrs)  # pylint: disable=bad-super-call
+                # The regular create only returns the primary key of objects that already existed.
+                model.pk = created.pk or cls._model.objects.values_list("pk", flat=True).get(**ids)
+            except (ObjectCrudException, ObjectDoesNotExist, MultipleObjectsReturned, ValidationError) as error:
+                cls.bulk_create_failed(adapter, item, error)
+
+    @classmethod
+    def bulk_create_failed(cls, adapter: "UnifiNautobotAdapter", item: QueuedCreate, error: Exception):
+        """Report a queued model that could not be created, like DiffSync reports a failed create.
+
+        Args:
+            adapter (UnifiNautobotAdapter): The diffsync adapter.
+            item (QueuedCreate): The queued model.
+            error (Exception): Why the model could not be created.
+        """
+        model, ids, _ = item
+        adapter.job.logger.error("Failed to create %s %s: %s", cls._modelname, model, error)
+        model.set_status(DiffSyncStatus.ERROR, f"Failed to create {cls._modelname} {ids}: {error}")
+        adapter.remove(model)
+        if hasattr(cls, "device_key"):
+            adapter.device_failed(cls.device_key(ids))
+
+
+def _first_or_conflict(mapping: Dict[Any, Any], key, value):
+    """Map a key to a value, or to None when the key is not unique."""
+    mapping[key] = None if key in mapping else value
+
+
 class SiteModel(ActiveStatusMixin, UnifiModelMixin, NautobotModel):
     """Location model for sites."""
 
@@ -80,6 +521,7 @@ class SiteModel(ActiveStatusMixin, UnifiModelMixin, NautobotModel):
     _modelname = "site"
     _identifiers = ("name",)
     _attributes = ("location_type__name",)
+    _shared = True
 
     name: str
     status_id: uuid.UUID = None
@@ -96,6 +538,7 @@ class DeviceTypeModel(UnifiModelMixin, NautobotModel):
         "model",
     )
     _attributes = ("part_number",)
+    _shared = True
 
     manufacturer__name: str = UNIFI_MANUFACTURER
     model: str
@@ -103,7 +546,7 @@ class DeviceTypeModel(UnifiModelMixin, NautobotModel):
     part_number: str = ""
 
 
-class DeviceModel(ActiveStatusMixin, UnifiModelMixin, NautobotModel):
+class DeviceModel(DeviceFailureMixin, ActiveStatusMixin, UnifiModelMixin, NautobotModel):
     """Device model."""
 
     _model = Device
@@ -121,8 +564,10 @@ class DeviceModel(ActiveStatusMixin, UnifiModelMixin, NautobotModel):
         "platform__name",
         "primary_ip4__host",
         "primary_ip6__host",
+        "unifi_fingerprint",
     )
     _perform_delete = True
+    _device_lookup = ""
 
     name: str
     controller_managed_device_group__name: str = None
@@ -134,6 +579,7 @@ class DeviceModel(ActiveStatusMixin, UnifiModelMixin, NautobotModel):
     platform__name: str
     primary_ip4__host: Optional[str] = None
     primary_ip6__host: Optional[str] = None
+    unifi_fingerprint: Annotated[Optional[str], CustomFieldAnnotation(name="unifi_fingerprint")] = None
 
     status_id: uuid.UUID = None
 
@@ -143,7 +589,9 @@ class DeviceModel(ActiveStatusMixin, UnifiModelMixin, NautobotModel):
 
         This overridden method removes the primary IP addresses since those
         cannot be set until after the interfaces are created. The primary IPs
-        are set in the `sync_complete` callback of the adapter.
+        are set in the `sync_complete` callback of the adapter, as is the
+        fingerprint, once the interfaces and IP address assignments of the
+        device have synced.
 
         Args:
             adapter (UnifiNautobotAdapter): The nautobot sync adapter.
@@ -154,15 +602,52 @@ class DeviceModel(ActiveStatusMixin, UnifiModelMixin, NautobotModel):
         Returns:
             DeviceModel: The device model.
         """
-        if attrs["primary_ip4__host"] or attrs["primary_ip6__host"]:
-            adapter._primary_ips.append(
-                {
-                    "device": {**ids},
-                    "primary_ip4": attrs.pop("primary_ip4__host", None),
-                    "primary_ip6": attrs.pop("primary_ip4__host", None),
-                }
-            )
-        return super().create(adapter, ids, attrs)
+        adapter.queue_primary_ips(ids, cls._pop_primary_ips(attrs, skip_empty=True))
+        fingerprint = attrs.pop("unifi_fingerprint", None)
+        model = super().create(adapter, ids, attrs)
+        if fingerprint is not None:
+            adapter.queue_fingerprint(ids, fingerprint)
+            model.unifi_fingerprint = fingerprint
+        return model
+
+    def update(self, attrs):
+        """Update the device.
+
+        Like `create`, the primary IP addresses and the fingerprint are left to
+        the `sync_complete` callback of the adapter, which sets those of every
+        device at once.
+        """
+        ids = self.get_identifiers()
+        primary_ips = self._pop_primary_ips(attrs)
+        self.adapter.queue_primary_ips(ids, primary_ips)
+        fingerprint = attrs.pop("unifi_fingerprint", None)
+        model = super().update(attrs) if attrs else self
+        for field, host in primary_ips.items():
+            setattr(self, f"{field}__host", host)
+        if fingerprint is not None:
+            self.adapter.queue_fingerprint(ids, fingerprint)
+            self.unifi_fingerprint = fingerprint
+        return model
+
+    @staticmethod
+    def _pop_primary_ips(attrs, skip_empty: bool = False) -> Dict[str, Optional[str]]:
+        """Remove the primary IP addresses from the attributes.
+
+        Args:
+            attrs (dict[str, Any]): The attributes of a create or update.
+            skip_empty (bool, optional): Whether primary IP addresses that are not set are left out,
+                rather than cleared. Defaults to False.
+
+        Returns:
+            Dict[str, Optional[str]]: The hosts of the primary IP addresses, by device field.
+        """
+        primary_ips = {}
+        for field in ("primary_ip4", "primary_ip6"):
+            if f"{field}__host" in attrs:
+                host = attrs.pop(f"{field}__host")
+                if host or not skip_empty:
+                    primary_ips[field] = host
+        return primary_ips
 
 
 class DeviceGroupModel(UnifiModelMixin, NautobotModel):
@@ -175,12 +660,13 @@ class DeviceGroupModel(UnifiModelMixin, NautobotModel):
         "name",
     )
     _attributes = tuple()
+    _controller_lookup = "controller__name"
 
     controller__name: str
     name: str
 
 
-class InterfaceModel(ActiveStatusMixin, UnifiModelMixin, NautobotModel):
+class InterfaceModel(DeviceFailureMixin, ActiveStatusMixin, BulkCreateMixin, UnifiModelMixin, NautobotModel):
     """DeviceGroup model."""
 
     _model = Interface
@@ -197,6 +683,7 @@ class InterfaceModel(ActiveStatusMixin, UnifiModelMixin, NautobotModel):
         "unifi_port_id",
     )
     _perform_delete = True
+    _device_lookup = "device__"
 
     label: str
     name: str = ""
@@ -220,6 +707,65 @@ class InterfaceModel(ActiveStatusMixin, UnifiModelMixin, NautobotModel):
         attrs["name"] = ids["label"]
         return super().create(adapter, ids, attrs)
 
+    @classmethod
+    def bulk_prepare(cls, queued: List[QueuedCreate]):
+        """Build the new interfaces of a batch, with one query for their devices and one for their existing interfaces."""
+        device_keys = {
+            (
+                ids["device__name"],
+                ids["device__controller_managed_device_group__name"],
+                ids["device__controller_managed_device_group__controller__name"],
+            )
+            for _, ids, _ in queued
+        }
+        device_ids = {}
+        for pk, *key in Device.objects.filter(devices_condition(device_keys)).values_list(
+            "pk", "name", "controller_managed_device_group__name", "controller_managed_device_group__controller__name"
+        ):
+            _first_or_conflict(device_ids, tuple(key), pk)
+        labels, names = {}, set()
+        for pk, device_id, label, name in Interface.objects.filter(
+            device_id__in=[pk for pk in device_ids.values() if pk]
+        ).values_list("pk", "device_id", "label", "name"):
+            _first_or_conflict(labels, (device_id, label), pk)
+            names.add((device_id, name))
+
+        new, existing, one_by_one = [], [], []
+        for item in queued:
+            _, ids, attrs = item
+            device_id = device_ids.get(
+                (
+                    ids["device__name"],
+                    ids["device__controller_managed_device_group__name"],
+                    ids["device__controller_managed_device_group__controller__name"],
+                )
+            )
+            if device_id and labels.get((device_id, ids["label"])):
+                existing.append((item, labels[(device_id, ids["label"])]))
+            elif not device_id or (device_id, attrs["name"]) in names or (device_id, ids["label"]) in labels:
+                one_by_one.append(item)
+            else:
+                names.add((device_id, attrs["name"]))
+                labels[(device_id, ids["label"])] = None
+                interface = Interface(
+                    device_id=device_id,
+                    label=ids["label"],
+                    name=attrs["name"],
+                    type=attrs["type"],
+                    status_id=attrs["status_id"],
+                )
+                if attrs.get("unifi_port_id") is not None:
+                    interface._custom_field_data["unifi_port_id"] = attrs["unifi_port_id"]
+                new.append((item, interface))
+        return new, existing, one_by_one
+
+    @classmethod
+    def scope_queryset(cls, queryset, adapter: "UnifiNautobotAdapter"):
+        """Leave out the interfaces of devices that have not changed, and those the port policy skipped."""
+        queryset = super().scope_queryset(queryset, adapter)
+        queryset = exclude_devices(queryset, adapter.unchanged_devices, prefix=cls._device_lookup)
+        return exclude_interfaces(queryset, adapter.skipped_interfaces)
+
 
 class PrefixModel(ActiveStatusMixin, UnifiModelMixin, NautobotModel):
     """DiffSync model for Prefix."""
@@ -228,6 +774,7 @@ class PrefixModel(ActiveStatusMixin, UnifiModelMixin, NautobotModel):
     _modelname = "prefix"
     _identifiers = ("network", "prefix_length")
     _attributes = tuple()
+    _shared = True
 
     network: str
     prefix_length: int
@@ -242,7 +789,7 @@ class PrefixModel(ActiveStatusMixin, UnifiModelMixin, NautobotModel):
         return super().create(adapter, ids, attrs)
 
 
-class IPAddressModel(ActiveStatusMixin, UnifiModelMixin, NautobotModel):
+class IPAddressModel(ActiveStatusMixin, BulkCreateMixin, UnifiModelMixin, NautobotModel):
     """DiffSync model for IP Addresses."""
 
     _model = IPAddress
@@ -255,6 +802,7 @@ class IPAddressModel(ActiveStatusMixin, UnifiModelMixin, NautobotModel):
         "parent__network",
         "parent__prefix_length",
     )
+    _shared = True
 
     host: str
     mask_length: int
@@ -263,8 +811,62 @@ class IPAddressModel(ActiveStatusMixin, UnifiModelMixin, NautobotModel):
 
     status_id: uuid.UUID = None
 
+    @classmethod
+    def bulk_prepare(cls, queued: List[QueuedCreate]):
+        """Build the new IP addresses of a batch, with a query each for their parents, the parents' children and existing addresses.
 
-class IPAddressToInterfaceModel(NautobotModel):
+        Addresses whose parent has child prefixes are created one by one, so that `clean`
+        finds their closest parent.
+        """
+        networks = {(attrs["parent__network"], attrs["parent__prefix_length"]) for _, _, attrs in queued}
+        condition = Q(pk__in=[])
+        for network, prefix_length in networks:
+            condition |= Q(network=network, prefix_length=prefix_length)
+        parent_ids = {}
+        for pk, network, prefix_length in Prefix.objects.filter(condition).values_list(
+            "pk", "network", "prefix_length"
+        ):
+            _first_or_conflict(parent_ids, (network, prefix_length), pk)
+        nested = set(
+            Prefix.objects.filter(parent_id__in=[pk for pk in parent_ids.values() if pk]).values_list(
+                "parent_id", flat=True
+            )
+        )
+        addresses, taken = {}, set()
+        for pk, host, mask_length, parent_id in IPAddress.objects.filter(
+            host__in={ids["host"] for _, ids, _ in queued}
+        ).values_list("pk", "host", "mask_length", "parent_id"):
+            _first_or_conflict(addresses, (host, mask_length), pk)
+            taken.add((parent_id, host))
+
+        new, existing, one_by_one = [], [], []
+        for item in queued:
+            _, ids, attrs = item
+            parent_id = parent_ids.get((attrs["parent__network"], attrs["parent__prefix_length"]))
+            if addresses.get((ids["host"], ids["mask_length"])):
+                existing.append((item, addresses[(ids["host"], ids["mask_length"])]))
+            elif not parent_id or parent_id in nested or (parent_id, ids["host"]) in taken:
+                one_by_one.append(item)
+            else:
+                taken.add((parent_id, ids["host"]))
+                new.append(
+                    (
+                        item,
+                        IPAddress(
+                            host=ids["host"],
+                            mask_length=ids["mask_length"],
+                            ip_version=NetaddrIPAddress(ids["host"]).version,
+                            parent_id=parent_id,
+                            status_id=attrs["status_id"],
+                        ),
+                    )
+                )
+        return new, existing, one_by_one
+
+
+class IPAddressToInterfaceModel(
+    DeviceFailureMixin, BulkCreateMixin, TransactionChunkMixin, ScopedQuerysetMixin, NautobotModel
+):
     """DiffSync model for assigning IP Addresses to interfaces."""
 
     _model = IPAddressToInterface
@@ -278,9 +880,73 @@ class IPAddressToInterfaceModel(NautobotModel):
     )
 
     _attributes = tuple()
+    _device_lookup = "interface__device__"
 
     ip_address__host: str
     interface__label: str
     interface__device__name: str
     interface__device__controller_managed_device_group__name: str
     interface__device__controller_managed_device_group__controller__name: str
+
+    @classmethod
+    def bulk_prepare(cls, queued: List[QueuedCreate]):
+        """Build the new IP address assignments of a batch, with a query each for their addresses, interfaces and existing assignments."""
+        ip_ids = {}
+        for pk, host in IPAddress.objects.filter(
+            host__in={ids["ip_address__host"] for _, ids, _ in queued}
+        ).values_list("pk", "host"):
+            _first_or_conflict(ip_ids, host, pk)
+        device_keys = {
+            (
+                ids["interface__device__name"],
+                ids["interface__device__controller_managed_device_group__name"],
+                ids["interface__device__controller_managed_device_group__controller__name"],
+            )
+            for _, ids, _ in queued
+        }
+        interface_ids = {}
+        for pk, label, *device_key in Interface.objects.filter(
+            devices_condition(device_keys, prefix="device__"),
+            label__in={ids["interface__label"] for _, ids, _ in queued},
+        ).values_list(
+            "pk",
+            "label",
+            "device__name",
+            "device__controller_managed_device_group__name",
+            "device__controller_managed_device_group__controller__name",
+        ):
+            _first_or_conflict(interface_ids, (label, *device_key), pk)
+        assignments = {
+            (ip_address_id, interface_id): pk
+            for pk, ip_address_id, interface_id in IPAddressToInterface.objects.filter(
+                interface_id__in=[pk for pk in interface_ids.values() if pk]
+            ).values_list("pk", "ip_address_id", "interface_id")
+        }
+
+        new, existing, one_by_one = [], [], []
+        for item in queued:
+            _, ids, _ = item
+            ip_address_id = ip_ids.get(ids["ip_address__host"])
+            interface_id = interface_ids.get(
+                (
+                    ids["interface__label"],
+                    ids["interface__device__name"],
+                    ids["interface__device__controller_managed_device_group__name"],
+                    ids["interface__device__controller_managed_device_group__controller__name"],
+                )
+            )
+            if assignments.get((ip_address_id, interface_id)):
+                existing.append((item, assignments[(ip_address_id, interface_id)]))
+            elif not ip_address_id or not interface_id or (ip_address_id, interface_id) in assignments:
+                one_by_one.append(item)
+            else:
+                assignments[(ip_address_id, interface_id)] = None
+                new.append((item, IPAddressToInterface(ip_address_id=ip_address_id, interface_id=interface_id)))
+        return new, existing, one_by_one
+
+    @classmethod
+    def scope_queryset(cls, queryset, adapter: "UnifiNautobotAdapter"):
+        """Leave out the IP address assignments of devices that have not changed, and of skipped interfaces."""
+        queryset = super().scope_queryset(queryset, adapter)
+        queryset = exclude_devices(queryset, adapter.unchanged_devices, prefix=cls._device_lookup)
+        return exclude_interfaces(queryset, adapter.skipped_interfaces, prefix="interface__")
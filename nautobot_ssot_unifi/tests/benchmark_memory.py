@@ -0,0 +1,119 @@
+"""Measure the memory used by the DiffSync models the Unifi adapter loads.
+
+The adapter loads every device of a simulated controller, and the memory
+allocated while loading is traced. The string fields of all the loaded
+models are also counted, to show how many copies sharing (interning and
+reused identifier dictionaries) saves:
+
+    python -m nautobot_ssot_unifi.tests.benchmark_memory --sites 10 --devices 500 --ports 24
+"""
+
+import argparse
+import logging
+import sys
+import tracemalloc
+from typing import Any, Dict
+
+import nautobot
+
+
+def string_usage(adapter) -> Dict[str, int]:
+    """Count the string field values of every model of an adapter.
+
+    Args:
+        adapter (Adapter): The loaded adapter.
+
+    Returns:
+        Dict[str, int]: The number of string values (`references`) and of distinct string objects
+            (`objects`), the bytes those objects use (`bytes`) and the bytes the values would use if
+            none of them were shared (`unshared_bytes`).
+    """
+    references = unshared_bytes = 0
+    objects: Dict[int, int] = {}
+    for model_name in adapter.top_level:
+        for model in adapter.get_all(model_name):
+            for value in vars(model).values():
+                if isinstance(value, str):
+                    references += 1
+                    unshared_bytes += sys.getsizeof(value)
+                    objects[id(value)] = sys.getsizeof(value)
+    return {
+        "references": references,
+        "objects": len(objects),
+        "bytes": sum(objects.values()),
+        "unshared_bytes": unshared_bytes,
+    }
+
+
+def run(sites: int, devices: int, ports: int) -> Dict[str, Any]:
+    """Load a simulated controller into the Unifi adapter and measure its memory.
+
+    Args:
+        sites (int): The number of simulated sites.
+        devices (int): The number of devices per site.
+        ports (int): The number of ports per switch.
+
+    Returns:
+        Dict[str, Any]: The number of models loaded, the memory traced while loading and the string usage.
+    """
+    # pylint: disable=import-outside-toplevel
+    from nautobot_ssot_unifi.ssot.adapters import ControllerSource, UnifiAdapter
+    from nautobot_ssot_unifi.tests.simulator import ControllerSimulator
+    from nautobot_ssot_unifi.utils.unifi import get_hardware_catalog
+
+    class Job:  # pylint: disable=too-few-public-methods
+        """Stands in for the job the adapter runs in."""
+
+        logger = logging.getLogger(__name__)
+        hardware_models = get_hardware_catalog()
+
+    with ControllerSimulator(sites=sites, devices=devices, ports=ports) as simulator:
+        controller = ControllerSource(
+            name="benchmark",
+            default_location_type="Site",
+            default_location_name="Site",
+            client_options={
+                "host": simulator.host,
+                "port": simulator.port,
+                "scheme": "http",
+                "username": simulator.username,
+                "password": simulator.password,
+            },
+        )
+        tracemalloc.start()
+        adapter = UnifiAdapter(job=Job())
+        adapter.load([controller])
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "models": {model_name: len(adapter.get_all(model_name)) for model_name in adapter.top_level},
+        "memory": {"current": current, "peak": peak},
+        "strings": string_usage(adapter),
+    }
+
+
+def main():
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sites", type=int, default=10)
+    parser.add_argument("--devices", type=int, default=500, help="devices per site")
+    parser.add_argument("--ports", type=int, default=24, help="ports per switch")
+    args = parser.parse_args()
+
+    nautobot.setup()
+    results = run(args.sites, args.devices, args.ports)
+    strings = results["strings"]
+    print(f"Models: {results['models']}")  # noqa: T201
+    print(  # noqa: T201
+        f"Traced memory: {results['memory']['current'] / 2**20:.1f} MiB "
+        f"(peak {results['memory']['peak'] / 2**20:.1f} MiB)"
+    )
+    print(  # noqa: T201
+        f"String fields: {strings['references']:,} values in {strings['objects']:,} objects, "
+        f"{strings['bytes'] / 2**20:.1f} MiB instead of {strings['unshared_bytes'] / 2**20:.1f} MiB unshared"
+    )
+
+
+if __name__ == "__main__":
+    main()
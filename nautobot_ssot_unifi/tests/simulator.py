@@ -0,0 +1,452 @@
+"""A stand-in Unifi controller for tests and benchmarks.
+
+The simulator implements just enough of a (non UniFi OS) controller for
+the client: the login, `self/sites`, `stat/device` and `rest/networkconf`
+endpoints, and the site event websockets. The sites, devices and ports it
+serves are generated deterministically from a seed, so that a controller
+of any size can be used offline:
+
+    with ControllerSimulator(sites=50, devices=200, ports=24, seed=1) as simulator:
+        client = Client(host=simulator.host, port=simulator.port, scheme="http", ...)
+
+It can also be started on its own, for example to benchmark a development
+instance against it:
+
+    python -m nautobot_ssot_unifi.tests.simulator --sites 50 --devices 200 --port 8443
+"""
+
+import argparse
+import asyncio
+import csv
+import functools
+import ipaddress
+import json
+import random
+import secrets
+import threading
+import time
+from os import path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from aiohttp import web
+
+SESSION_COOKIE = "unifises"
+
+LOGIN_REQUIRED = {"meta": {"rc": "error", "msg": "api.err.LoginRequired"}, "data": []}
+
+# The device types the app knows how to sync (see `UNIFI_MAP`), and how common they are.
+DEVICE_TYPES = {"usw": 6, "uap": 3, "ugw": 1}
+
+
+@functools.lru_cache(maxsize=None)
+def _hardware_models() -> Dict[str, List[str]]:
+    """Get the known hardware models, grouped by the device types the app supports."""
+    models: Dict[str, List[str]] = {}
+    with open(path.join(path.dirname(path.dirname(__file__)), "hardware_models.csv"), encoding="utf-8") as csvfile:
+        for record in csv.DictReader(csvfile):
+            if record["type"] in DEVICE_TYPES:
+                models.setdefault(record["type"], []).append(record["model"])
+    return models
+
+
+class ControllerSimulator:  # pylint: disable=too-many-instance-attributes
+    """A Unifi controller serving generated sites and devices.
+
+    Attributes:
+        logins (int): The number of successful logins.
+        requests (Dict[str, int]): The number of requests received, by path.
+        peak_in_flight (int): The largest number of requests that were being handled at once.
+    """
+
+    def __init__(
+        self,
+        sites: int = 1,
+        devices: int = 10,
+        ports: int = 8,
+        seed: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        username: str = "admin",
+        password: str = "password",
+    ):  # pylint: disable=too-many-arguments
+        """Create a new simulator.
+
+        Args:
+            sites (int, optional): The number of sites. The first one is always called `default`.
+            devices (int, optional): The number of devices in each site.
+            ports (int, optional): The number of ports of each switch.
+            seed (int, optional): The seed all generated data is derived from.
+            latency (float, optional): How long (in seconds) the simulator waits before answering a request.
+            error_rate (float, optional): The fraction of `stat/device` requests answered with a 503 error.
+            username (str, optional): The username accepted by the login endpoint.
+            password (str, optional): The password accepted by the login endpoint.
+        """
+        self.sites = sites
+        self.devices = devices
+        self.ports = ports
+        self.seed = seed
+        self.latency = latency
+        self.error_rate = error_rate
+        self.username = username
+        self.password = password
+        self.host = "127.0.0.1"
+        self.port: Optional[int] = None
+        self.logins = 0
+        self.requests: Dict[str, int] = {}
+        self.peak_in_flight = 0
+        self._in_flight = 0
+        self._sessions = set()
+        self._failures: List[int] = []
+        self._errors = random.Random(seed)
+        self._bodies: Dict[str, bytes] = {}
+        self._changes: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._websockets: Dict[str, Set[web.WebSocketResponse]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """The URL of the running simulator."""
+        return f"http://{self.host}:{self.port}"
+
+    def site_names(self) -> List[str]:
+        """Get the names of the simulated sites."""
+        return ["default"] + [f"site{index:04d}" for index in range(1, self.sites)]
+
+    def get_sites(self) -> List[Dict[str, Any]]:
+        """Get the simulated sites, as returned by `self/sites`."""
+        return [
+            {"_id": f"{index:024x}", "name": name, "desc": name.title(), "role": "admin"}
+            for index, name in enumerate(self.site_names())
+        ]
+
+    def get_devices(self, site: str) -> List[Dict[str, Any]]:
+        """Get the simulated devices of a site, as returned by `stat/device`.
+
+        Args:
+            site (str): The name of the site.
+        """
+        site_index = self.site_names().index(site)
+        generator = random.Random(f"{self.seed}:{site}")
+        models = _hardware_models()
+        devices = [
+            self._device(generator, models, site, site_index * self.devices + index) for index in range(self.devices)
+        ]
+        for device in devices:
+            device.update(self._changes.get((site, device["mac"]), {}))
+        return devices
+
+    def get_networks(self, site: str) -> List[Dict[str, Any]]:
+        """Get the simulated networks of a site, as returned by `rest/networkconf`.
+
+        Args:
+            site (str): The name of the site.
+        """
+        site_index = self.site_names().index(site)
+        return [
+            {
+                "_id": f"{site_index:012x}{0:012x}",
+                "name": "Default",
+                "purpose": "corporate",
+                "ip_subnet": "10.0.0.1/16",
+                "site_id": f"{site_index:024x}",
+            }
+        ]
+
+    def _device(self, generator: random.Random, models, site: str, number: int) -> Dict[str, Any]:
+        device_type = generator.choices(list(DEVICE_TYPES), weights=list(DEVICE_TYPES.values()))[0]
+        model = generator.choice(models[device_type])
+        mac = ":".join(f"{byte:02x}" for byte in (0xF0, 0x9F, 0xC2, *number.to_bytes(3, "big")))
+        # Spread the management addresses over /24 networks, 250 devices each.
+        block, host = divmod(number, 250)
+        management_ip = ipaddress.IPv4Address("10.0.0.0") + (block << 8) + host + 2
+        if device_type == "usw":
+            port_table = [
+                {
+                    "name": f"Port {index}" if index <= self.ports - 2 else f"SFP {index - self.ports + 2}",
+                    "media": "GE" if index <= self.ports - 2 else "SFP",
+                    "port_idx": index,
+                    "up": generator.random() < 0.6,
+                    "enable": generator.random() < 0.95,
+                    "is_uplink": index == self.ports,
+                    "speed": 1000,
+                }
+                for index in range(1, self.ports + 1)
+            ]
+        elif device_type == "ugw":
+            port_table = [
+                {"name": name, "media": "GE", "port_idx": index, "up": True, "enable": True, "is_uplink": index == 1}
+                for index, name in enumerate(("WAN", "LAN", "WAN2"), start=1)
+            ]
+            port_table[0].update(
+                ip=str(ipaddress.IPv4Address("100.64.0.0") + 4 * number + 2), netmask="255.255.255.252"
+            )
+        else:
+            port_table = [{"name": "Main", "media": "GE", "port_idx": 1, "up": True, "enable": True, "is_uplink": True}]
+        return {
+            "_id": f"{number:024x}",
+            "mac": mac,
+            "name": f"{site}-{device_type}-{number:06d}",
+            "model": model,
+            "type": device_type,
+            "serial": mac.replace(":", "").upper(),
+            "version": "6.5.59.14777",
+            "state": 1,
+            "uptime": generator.randrange(86400 * 365),
+            "config_network": (
+                {"type": "static", "ip": str(management_ip), "netmask": "255.255.255.0"}
+                if generator.random() < 0.8
+                else {"type": "dhcp"}
+            ),
+            "port_table": port_table,
+        }
+
+    def fail_next(self, count: int = 1, status: int = 503):
+        """Answer the next `stat/device` requests with an error.
+
+        Args:
+            count (int, optional): The number of requests that fail.
+            status (int, optional): The HTTP status of the failures.
+        """
+        self._failures.extend([status] * count)
+
+    def expire_sessions(self):
+        """Invalidate all login sessions, as a controller restart would."""
+        self._sessions.clear()
+
+    def update_device(self, site: str, mac: str, **changes) -> Dict[str, Any]:
+        """Change a simulated device.
+
+        Args:
+            site (str): The name of the device's site.
+            mac (str): The MAC address of the device.
+            **changes: The device keys to change, such as `name` or `port_table`.
+
+        Returns:
+            Dict[str, Any]: The changed device.
+        """
+        self._changes.setdefault((site, mac), {}).update(changes)
+        self._bodies.pop(site, None)
+        return next(device for device in self.get_devices(site) if device["mac"] == mac)
+
+    def listeners(self, site: str) -> int:
+        """Get the number of websockets connected to a site's events."""
+        return len(self._websockets.get(site, ()))
+
+    def publish(self, site: str, message: Dict[str, Any]):
+        """Send a message to the websockets connected to a site's events.
+
+        The simulator must be running in its background thread.
+
+        Args:
+            site (str): The name of the site.
+            message (Dict[str, Any]): The message, with its `meta` and `data` keys.
+        """
+        data = json.dumps(message)
+
+        async def send():
+            for websocket in list(self._websockets.get(site, ())):
+                await websocket.send_str(data)
+
+        asyncio.run_coroutine_threadsafe(send(), self._loop).result()
+
+    def application(self) -> web.Application:
+        """Create the aiohttp application serving the simulated controller."""
+        application = web.Application(middlewares=[self._middleware])
+        application.router.add_get("/", self._root)
+        application.router.add_post("/api/login", self._login)
+        application.router.add_get("/api/self/sites", self._sites)
+        application.router.add_get("/api/s/{site}/stat/device", self._stat_device)
+        application.router.add_post("/api/s/{site}/stat/device", self._stat_device)
+        application.router.add_get("/api/s/{site}/rest/networkconf", self._networkconf)
+        application.router.add_get("/wss/s/{site}/events", self._events)
+        return application
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.requests[request.path] = self.requests.get(request.path, 0) + 1
+        self._in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return await handler(request)
+        finally:
+            self._in_flight -= 1
+
+    def _authenticated(self, request: web.Request) -> bool:
+        return request.cookies.get(SESSION_COOKIE) in self._sessions
+
+    async def _root(self, request: web.Request) -> web.Response:
+        # A classic controller redirects, a UniFi OS console answers with 200.
+        return web.Response(status=302, headers={"Location": "/manage"})
+
+    async def _login(self, request: web.Request) -> web.Response:
+        credentials = await request.json()
+        if credentials.get("username") != self.username or credentials.get("password") != self.password:
+            return web.json_response({"meta": {"rc": "error", "msg": "api.err.Invalid"}, "data": []}, status=400)
+        self.logins += 1
+        token = secrets.token_hex(16)
+        self._sessions.add(token)
+        response = web.json_response({"meta": {"rc": "ok"}, "data": []})
+        response.set_cookie(SESSION_COOKIE, token)
+        return response
+
+    async def _sites(self, request: web.Request) -> web.Response:
+        if not self._authenticated(request):
+            return web.json_response(LOGIN_REQUIRED, status=401)
+        return web.json_response({"meta": {"rc": "ok"}, "data": self.get_sites()})
+
+    async def _stat_device(self, request: web.Request) -> web.Response:
+        if self._failures:
+            return web.Response(status=self._failures.pop(0), headers={"Retry-After": "0"})
+        if self.error_rate and self._errors.random() < self.error_rate:
+            return web.Response(status=503)
+        if not self._authenticated(request):
+            return web.json_response(LOGIN_REQUIRED, status=401)
+        site = request.match_info["site"]
+        if site not in self.site_names():
+            return web.json_response({"meta": {"rc": "error", "msg": "api.err.NoSiteContext"}, "data": []}, status=400)
+        if request.method == "POST":
+            macs = set((await request.json()).get("macs", []))
+            devices = [device for device in self.get_devices(site) if device["mac"] in macs]
+            return web.json_response({"meta": {"rc": "ok"}, "data": devices})
+        if site not in self._bodies:
+            self._bodies[site] = json.dumps({"meta": {"rc": "ok"}, "data": self.get_devices(site)}).encode()
+        response = web.Response(body=self._bodies[site], content_type="application/json")
+        response.enable_compression()
+        return response
+
+    async def _networkconf(self, request: web.Request) -> web.Response:
+        if not self._authenticated(request):
+            return web.json_response(LOGIN_REQUIRED, status=401)
+        site = request.match_info["site"]
+        if site not in self.site_names():
+            return web.json_response({"meta": {"rc": "error", "msg": "api.err.NoSiteContext"}, "data": []}, status=400)
+        return web.json_response({"meta": {"rc": "ok"}, "data": self.get_networks(site)})
+
+    async def _events(self, request: web.Request) -> web.StreamResponse:
+        if not self._authenticated(request):
+            return web.Response(status=401)
+        site = request.match_info["site"]
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        self._websockets.setdefault(site, set()).add(websocket)
+        try:
+            async for _ in websocket:
+                pass
+        finally:
+            self._websockets[site].discard(websocket)
+        return websocket
+
+    async def start(self, port: int = 0):
+        """Start serving on the current event loop.
+
+        Args:
+            port (int, optional): The port to listen on. Defaults to any free port.
+        """
+        self._runner = web.AppRunner(self.application(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        """Stop serving."""
+        await self._runner.cleanup()
+
+    def __enter__(self) -> "ControllerSimulator":
+        """Start serving from a background thread."""
+        started = threading.Event()
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=serve, name="unifi-simulator", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Stop the background thread."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+async def benchmark(simulator: ControllerSimulator, **client_options) -> Dict[str, float]:
+    """Fetch every device of a running simulator with the Unifi client.
+
+    Args:
+        simulator (ControllerSimulator): The running simulator.
+        **client_options: Additional keyword arguments for the `Client`.
+
+    Returns:
+        Dict[str, float]: The number of devices fetched and how long it took (in seconds).
+    """
+    from nautobot_ssot_unifi.unifi import Client  # pylint: disable=import-outside-toplevel
+
+    client = Client(
+        host=simulator.host,
+        port=simulator.port,
+        username=simulator.username,
+        password=simulator.password,
+        scheme="http",
+        **client_options,
+    )
+    start = time.perf_counter()
+    try:
+        devices = 0
+        for site in await client.get_sites():
+            async for _ in client.for_site(site.name).iter_devices():
+                devices += 1
+    finally:
+        await client.logout()
+    return {"devices": devices, "seconds": time.perf_counter() - start}
+
+
+def main():
+    """Run the simulator from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sites", type=int, default=1)
+    parser.add_argument("--devices", type=int, default=10, help="devices per site")
+    parser.add_argument("--ports", type=int, default=8, help="ports per switch")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of device requests that fail")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--benchmark", action="store_true", help="fetch all devices once with the client and exit")
+    args = parser.parse_args()
+
+    simulator = ControllerSimulator(
+        sites=args.sites,
+        devices=args.devices,
+        ports=args.ports,
+        seed=args.seed,
+        latency=args.latency,
+        error_rate=args.error_rate,
+    )
+    simulator.host = args.host
+
+    async def run():
+        await simulator.start(args.port)
+        print(f"Simulating {args.sites} sites x {args.devices} devices on {simulator.url}")  # noqa: T201
+        try:
+            if args.benchmark:
+                print(await benchmark(simulator))  # noqa: T201
+            else:
+                await asyncio.Event().wait()
+        finally:
+            await simulator.stop()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
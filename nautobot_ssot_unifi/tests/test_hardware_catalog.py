@@ -0,0 +1,53 @@
+"""Test the Unifi hardware catalog."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from nautobot_ssot_unifi.utils.unifi import HARDWARE_MODELS_PATH, get_hardware_catalog
+
+
+class TestHardwareCatalog(unittest.TestCase):
+    """Test compiling and caching the hardware catalog."""
+
+    def test_resolve_models(self):
+        """Models resolve to the platform and role of their type, Lite and Flex switches to their own."""
+        catalog = get_hardware_catalog()
+        access_point = catalog.get("BZ2")
+        self.assertEqual(
+            ("uap", "UAP", "Unifi AP", "Access-Point"),
+            (
+                access_point.type,
+                access_point.sku,
+                access_point.platform,
+                access_point.role,
+            ),
+        )
+        switch_types = {catalog.get(model).type for model in ("US8P60", "USL8LP", "USMINI")}
+        self.assertEqual({"usw", "usw_lite", "usw_flex"}, switch_types)
+
+    def test_unknown_model(self):
+        """Unknown models get a (cached) default rather than raising."""
+        catalog = get_hardware_catalog()
+        unknown = catalog.get("NOPE1")
+        self.assertFalse(unknown.known)
+        self.assertEqual("unifi", unknown.type)
+        self.assertEqual("NOPE1", unknown.sku)
+        self.assertIs(unknown, catalog.get("NOPE1"))
+
+    def test_cache(self):
+        """The catalog is read once, and again when the file changes."""
+        with tempfile.TemporaryDirectory() as directory:
+            catalog_path = os.path.join(directory, "hardware_models.csv")
+            shutil.copyfile(HARDWARE_MODELS_PATH, catalog_path)
+            catalog = get_hardware_catalog(catalog_path)
+            self.assertIs(catalog, get_hardware_catalog(catalog_path))
+
+            with open(catalog_path, "a", encoding="utf-8") as csvfile:
+                csvfile.write("\nNEW1,uap,UAP-NEW,Access Point New\n")
+            os.utime(catalog_path, (0, os.stat(catalog_path).st_mtime + 1))
+            reloaded = get_hardware_catalog(catalog_path)
+            self.assertIsNot(catalog, reloaded)
+            self.assertIn("NEW1", reloaded)
+            self.assertNotIn("NEW1", catalog)
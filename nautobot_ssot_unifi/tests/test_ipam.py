@@ -0,0 +1,47 @@
+"""Test the IP address arithmetic."""
+
+import unittest
+
+from netaddr import AddrFormatError, IPNetwork
+
+from nautobot_ssot_unifi.utils.ipam import Address, AddressCache
+
+
+class TestAddressCache(unittest.TestCase):
+    """Test computing the networks of `ip`/`netmask` pairs."""
+
+    def test_same_as_netaddr(self):
+        """The addresses match those computed by netaddr."""
+        cache = AddressCache()
+        for ip, netmask in (
+            ("10.0.0.17", "255.255.255.0"),
+            ("10.0.0.17", "255.255.255.240"),
+            ("10.0.0.17", "255.255.255.255"),
+            ("10.0.0.17", "0.0.0.0"),
+            ("192.168.1.130", "255.255.128.0"),
+            ("192.168.1.130", "25"),
+            ("2001:db8::1:2", "64"),
+            ("2001:db8::1:2", "ffff:ffff:ffff:ffff::"),
+        ):
+            with self.subTest(ip=ip, netmask=netmask):
+                ip_network = IPNetwork(f"{ip}/{netmask}")
+                self.assertEqual(
+                    Address(str(ip_network.ip), str(ip_network.network), ip_network.prefixlen, ip_network.version),
+                    cache.get(ip, netmask),
+                )
+
+    def test_shared(self):
+        """Each pair is computed once, and the addresses of a network share its string."""
+        cache = AddressCache()
+        cache.resolve([("10.0.0.1", "255.255.255.0"), ("10.0.0.2", "255.255.255.0"), ("10.0.0.1", "255.255.255.0")])
+        self.assertEqual(2, len(cache))
+        first, second = cache.get("10.0.0.1", "255.255.255.0"), cache.get("10.0.0.2", "255.255.255.0")
+        self.assertIs(first, cache.get("10.0.0.1", "255.255.255.0"))
+        self.assertIs(first.network, second.network)
+
+    def test_invalid(self):
+        """Invalid pairs are rejected like netaddr rejects them."""
+        cache = AddressCache()
+        for ip, netmask in (("10.0.0.256", "255.255.255.0"), ("10.0.0.1", "33")):
+            with self.subTest(ip=ip, netmask=netmask), self.assertRaises(AddrFormatError):
+                cache.get(ip, netmask)
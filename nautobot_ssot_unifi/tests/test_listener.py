@@ -0,0 +1,92 @@
+"""Test the Unifi event listener."""
+
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from nautobot.core.testing import TransactionTestCase
+from nautobot.dcim.models import Device
+
+from nautobot_ssot_unifi.listener import EventListener, get_device_changes
+from nautobot_ssot_unifi.tests import test_unifi_adapter
+from nautobot_ssot_unifi.tests.simulator import ControllerSimulator
+
+
+class TestGetDeviceChanges(unittest.TestCase):
+    """Test finding the devices a websocket message is about."""
+
+    def test_complete_devices(self):
+        """Complete devices are used as they are, partial ones are fetched."""
+        device = {"mac": "f0:9f:c2:00:00:01", "name": "usw-1", "model": "US8", "serial": "1", "port_table": []}
+        devices, macs = get_device_changes(
+            {
+                "meta": {"rc": "ok", "message": "device:sync"},
+                "data": [device, {"mac": "f0:9f:c2:00:00:02", "state": 1}],
+            }
+        )
+        self.assertEqual([device], devices)
+        self.assertEqual({"f0:9f:c2:00:00:02"}, macs)
+
+    def test_device_events(self):
+        """The devices of device events are fetched, other events are ignored."""
+        devices, macs = get_device_changes(
+            {
+                "meta": {"rc": "ok", "message": "events"},
+                "data": [
+                    {"key": "EVT_SW_Connected", "sw": "f0:9f:c2:00:00:01"},
+                    {"key": "EVT_AP_Upgraded", "ap": "f0:9f:c2:00:00:02"},
+                    {"key": "EVT_WU_Connected", "user": "00:11:22:33:44:55"},
+                ],
+            }
+        )
+        self.assertEqual([], devices)
+        self.assertEqual({"f0:9f:c2:00:00:01", "f0:9f:c2:00:00:02"}, macs)
+
+    def test_other_messages(self):
+        """Messages about anything else are ignored."""
+        self.assertEqual(
+            ([], set()),
+            get_device_changes({"meta": {"rc": "ok", "message": "sta:sync"}, "data": [{"mac": "00:11:22:33:44:55"}]}),
+        )
+
+
+class TestEventListener(TransactionTestCase):
+    """Test syncing the devices a simulated controller reports."""
+
+    databases = ("default", "job_logs")
+
+    def test_debounce_and_sync(self):
+        """The devices of a burst of messages are fetched and synced together, once the debounce delay has passed."""
+        adapter_tests = test_unifi_adapter.TestUnifiAdapterTestCase
+        adapter_tests.create_controller("test controller")
+        with ControllerSimulator(sites=1, devices=5, ports=4, seed=1) as simulator:
+            listener = EventListener([adapter_tests.controller_source("test controller", simulator)], debounce=0.2)
+            devices = simulator.get_devices("default")[:2]
+
+            async def listen():
+                task = asyncio.ensure_future(listener.listen())
+                try:
+                    while not simulator.listeners("default"):
+                        await asyncio.sleep(0.01)
+                    for device in devices:
+                        message = {"meta": {"rc": "ok", "message": "device:sync"}, "data": [{"mac": device["mac"]}]}
+                        await asyncio.to_thread(simulator.publish, "default", message)
+                    deadline = time.monotonic() + 10
+                    while sync.call_count == 0 or len(listener.fingerprints) < len(devices):
+                        self.assertLess(time.monotonic(), deadline, "The devices were not synced")
+                        await asyncio.sleep(0.05)
+                finally:
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+
+            with mock.patch.object(listener, "sync_devices", wraps=listener.sync_devices) as sync:
+                asyncio.run(listen())
+
+        sync.assert_called_once()
+        self.assertEqual(1, simulator.requests["/api/s/default/stat/device"])
+        self.assertEqual(
+            {device["name"] for device in devices},
+            set(Device.objects.values_list("name", flat=True)),
+        )
+        self.assertEqual(2, len(listener.fingerprints))
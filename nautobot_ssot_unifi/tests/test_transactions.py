@@ -0,0 +1,124 @@
+"""Test committing the writes of a sync in chunks."""
+
+from unittest import mock
+
+from nautobot.core.testing import TransactionTestCase
+from nautobot.dcim.models import Device, Interface
+from nautobot.extras.models import JobResult, Tag
+
+from nautobot_ssot_unifi.const import UNIFI_SSOT_TAG
+from nautobot_ssot_unifi.jobs import UnifiDataSource
+from nautobot_ssot_unifi.ssot.adapters import UnifiAdapter, UnifiNautobotAdapter
+from nautobot_ssot_unifi.tests import test_unifi_adapter
+from nautobot_ssot_unifi.tests.simulator import ControllerSimulator
+from nautobot_ssot_unifi.utils.transactions import ChunkedTransaction
+from nautobot_ssot_unifi.utils.unifi import get_hardware_catalog
+
+
+class TestChunkedTransaction(TransactionTestCase):
+    """Test the ChunkedTransaction class."""
+
+    def test_chunks(self):
+        """A chunk is committed when it is full, and when the kind of objects changes."""
+        with ChunkedTransaction(2) as chunks:
+            for number in range(3):
+                chunks.step("tag")
+                Tag.objects.create(name=f"first {number}")
+            chunks.step("other tag")
+            Tag.objects.create(name="second")
+        self.assertEqual(3, chunks.chunks)
+        self.assertEqual(4, Tag.objects.filter(name__in=["first 0", "first 1", "first 2", "second"]).count())
+
+    def test_before_commit(self):
+        """The callback runs in each chunk before it is committed, and not in a chunk rolled back."""
+        committed = []
+        with self.assertRaises(RuntimeError), ChunkedTransaction(2) as chunks:
+            chunks.before_commit = lambda: committed.append(Tag.objects.filter(name__startswith="tag ").count())
+            for number in range(3):
+                chunks.step("tag")
+                Tag.objects.create(name=f"tag {number}")
+            raise RuntimeError
+        self.assertEqual([2], committed)
+
+    def test_rollback(self):
+        """A failure rolls back the current chunk, and the earlier chunks stay committed."""
+        with self.assertRaises(RuntimeError), ChunkedTransaction(2) as chunks:
+            for number in range(3):
+                chunks.step("tag")
+                Tag.objects.create(name=f"tag {number}")
+            raise RuntimeError
+        self.assertEqual(
+            ["tag 0", "tag 1"], sorted(Tag.objects.filter(name__startswith="tag ").values_list("name", flat=True))
+        )
+
+
+class TestChunkedTransactionsSync(TransactionTestCase):
+    """Test syncing through the chunked transactions of the Nautobot adapter."""
+
+    databases = ("default", "job_logs")
+
+    def setUp(self):  # pylint: disable=invalid-name
+        """Load the source adapter from a simulated controller."""
+        self.job = UnifiDataSource()
+        self.job.job_result = JobResult.objects.create(name=self.job.class_path, user=None)
+        self.job.hardware_models = get_hardware_catalog()
+        adapter_tests = test_unifi_adapter.TestUnifiAdapterTestCase
+        adapter_tests.create_controller("test controller")
+        self.source = UnifiAdapter(job=self.job)
+        with ControllerSimulator(sites=2, devices=5, ports=4, seed=1) as simulator:
+            self.source.load([adapter_tests.controller_source("test controller", simulator)])
+        self.target = UnifiNautobotAdapter(job=self.job, transaction_chunk_size=10)
+        self.target.load()
+
+    def test_sync(self):
+        """A chunk is committed when it is full, and when the model type changes."""
+        steps = []
+        step = ChunkedTransaction.step
+
+        def record_step(chunks, key, count=1):
+            step(chunks, key, count)
+            steps.append((chunks.chunks, key, count))
+
+        with mock.patch.object(ChunkedTransaction, "step", record_step), self.target.chunked_transactions():
+            self.source.sync_to(self.target)
+
+        chunks = {}
+        for number, key, count in steps:
+            chunks.setdefault(number, []).append((key, count))
+        self.assertEqual(list(range(1, len(chunks) + 1)), list(chunks))
+        for chunk in chunks.values():
+            self.assertEqual(1, len({key for key, _ in chunk}))
+            self.assertTrue(len(chunk) == 1 or sum(count for _, count in chunk) <= 10)
+        for number in range(1, len(chunks)):
+            previous, following = chunks[number], chunks[number + 1]
+            self.assertTrue(
+                previous[0][0] != following[0][0] or sum(count for _, count in previous) + following[0][1] > 10
+            )
+        # More chunks than model types, so some were committed because they were full.
+        self.assertGreater(len(chunks), len({key for _, key, _ in steps}))
+        self.assertEqual(
+            len(self.source.get_all("interface")), Interface.objects.filter(tags__name=UNIFI_SSOT_TAG).count()
+        )
+
+    def test_rollback(self):
+        """A failure rolls back the writes of the current chunk, and the earlier chunks stay committed and tagged."""
+        interfaces = 0
+        step = ChunkedTransaction.step
+
+        def fail_step(chunks, key, count=1):
+            nonlocal interfaces
+            step(chunks, key, count)
+            if key == "interface":
+                interfaces += count
+                # The second chunk of interfaces fails after two of its interfaces were written.
+                if interfaces == 13:
+                    raise RuntimeError
+
+        with self.assertRaises(RuntimeError), mock.patch.object(
+            ChunkedTransaction, "step", fail_step
+        ), self.target.chunked_transactions():
+            self.source.sync_to(self.target)
+        self.assertEqual(10, Interface.objects.count())
+        self.assertEqual(len(self.source.get_all("device")), Device.objects.count())
+        self.assertEqual(10, Interface.objects.filter(tags__name=UNIFI_SSOT_TAG).count())
+        self.assertEqual(len(self.source.get_all("device")), Device.objects.filter(tags__name=UNIFI_SSOT_TAG).count())
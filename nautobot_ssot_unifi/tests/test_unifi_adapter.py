@@ -1,21 +1,35 @@
 """Test Unifi adapter."""
 
-import json
-from unittest.mock import MagicMock
+import collections
+import logging
+import re
+import threading
+import unittest
 
-from nautobot.extras.models import JobResult
+from diffsync.enum import DiffSyncStatus
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from nautobot.dcim.models import (
+    Controller,
+    ControllerManagedDeviceGroup,
+    Device,
+    DeviceType,
+    Interface,
+    Location,
+    LocationType,
+    Manufacturer,
+)
+from nautobot.extras.models import JobLogEntry, JobResult, Role, Status, Tag
+from nautobot.ipam.models import IPAddress, IPAddressToInterface, Prefix
 from nautobot.core.testing import TransactionTestCase
-from nautobot_ssot_unifi.ssot.adapters import UnifiAdapter
+from nautobot_ssot_unifi.const import UNIFI_MANUFACTURER, UNIFI_SSOT_TAG
+from nautobot_ssot_unifi.ssot.adapters import ControllerSource, SiteStream, UnifiAdapter, UnifiNautobotAdapter
+from nautobot_ssot_unifi.ssot.models import DeviceModel, InterfaceModel, IPAddressModel, SiteModel
 from nautobot_ssot_unifi.jobs import UnifiDataSource
-
-
-def load_json(path):
-    """Load a json file."""
-    with open(path, encoding="utf-8") as file:
-        return json.loads(file.read())
-
-
-DEVICE_FIXTURE = load_json("./nautobot_ssot_unifi/tests/fixtures/get_devices.json")
+from nautobot_ssot_unifi.tests.benchmark_memory import string_usage
+from nautobot_ssot_unifi.tests.simulator import ControllerSimulator
+from nautobot_ssot_unifi.utils.nautobot import get_device_fingerprints
+from nautobot_ssot_unifi.utils.unifi import get_hardware_catalog
 
 
 class TestUnifiAdapterTestCase(TransactionTestCase):
@@ -25,22 +39,486 @@ class TestUnifiAdapterTestCase(TransactionTestCase):
 
     def setUp(self):  # pylint: disable=invalid-name
         """Initialize test case."""
-        self.unifi_client = MagicMock()
-        self.unifi_client.get_devices.return_value = DEVICE_FIXTURE
-
         self.job = UnifiDataSource()
         self.job.job_result = JobResult.objects.create(name=self.job.class_path, user=None)
-        self.unifi = UnifiAdapter(
-            job=self.job,
-            controller_name="test controller",
+        self.job.hardware_models = get_hardware_catalog()
+        self.unifi = UnifiAdapter(job=self.job)
+
+    @staticmethod
+    def controller_source(name, simulator):
+        """Get the source for loading a controller from the simulator."""
+        return ControllerSource(
+            name=name,
             default_location_type="site",
             default_location_name="Site",
+            client_options={
+                "host": simulator.host,
+                "port": simulator.port,
+                "scheme": "http",
+                "username": simulator.username,
+                "password": simulator.password,
+                "verify_cert": False,
+                "timeout": 30,
+            },
+        )
+
+    @staticmethod
+    def create_controller(name):
+        """Create a Nautobot controller at the `Site` location, and the location type of the sites."""
+        status = Status.objects.get(name="Active")
+        location_type, _ = LocationType.objects.get_or_create(name="site")
+        location, _ = Location.objects.get_or_create(
+            name="Site", location_type=location_type, defaults={"status": status}
         )
+        return Controller.objects.create(name=name, status=status, location=location)
 
     def test_data_loading(self):
         """Test Nautobot Ssot Unifi load() function."""
-        # self.unifi.load()
-        # self.assertEqual(
-        #     {dev["name"] for dev in DEVICE_FIXTURE},
-        #     {dev.get_unique_id() for dev in self.unifi.get_all("device")},
-        # )
+        with ControllerSimulator(sites=3, devices=10, ports=8, seed=1) as simulator:
+            self.unifi.load([self.controller_source("test controller", simulator)])
+            locations = {site: site for site in simulator.site_names()}
+            locations["default"] = "Site"
+            devices = {
+                device["name"]: (locations[site], device)
+                for site in simulator.site_names()
+                for device in simulator.get_devices(site)
+            }
+
+        self.assertEqual(set(locations.values()), {site.name for site in self.unifi.get_all("site")})
+        self.assertEqual(
+            {name: location for name, (location, _) in devices.items()},
+            {device.name: device.location__name for device in self.unifi.get_all("device")},
+        )
+        # One interface per port, plus the management interface of devices with a static address.
+        self.assertEqual(
+            sum(
+                len(device["port_table"]) + (device["config_network"]["type"] == "static")
+                for _, device in devices.values()
+            ),
+            len(self.unifi.get_all("interface")),
+        )
+
+    def test_multiple_controllers(self):
+        """Test loading several controllers at once."""
+        with ControllerSimulator(sites=2, devices=5, seed=1) as first, ControllerSimulator(
+            sites=3, devices=5, seed=2
+        ) as second:
+            self.unifi.load([self.controller_source("first", first), self.controller_source("second", second)])
+
+        self.assertEqual(
+            {("default", "first"), ("default", "second")},
+            {(group.name, group.controller__name) for group in self.unifi.get_all("device_group")},
+        )
+        # The `default` sites of both controllers are the same location.
+        self.assertEqual({"Site", "site0001", "site0002"}, {site.name for site in self.unifi.get_all("site")})
+        self.assertEqual(
+            {"first": 10, "second": 15},
+            {
+                controller: len(
+                    [
+                        device
+                        for device in self.unifi.get_all("device")
+                        if device.controller_managed_device_group__controller__name == controller
+                    ]
+                )
+                for controller in ("first", "second")
+            },
+        )
+
+    def test_max_concurrent_sites(self):
+        """No more than `max_concurrent_sites` sites of a controller are fetched at once."""
+        with ControllerSimulator(sites=6, devices=5, ports=4, seed=1, latency=0.05) as simulator:
+            unifi = UnifiAdapter(job=self.job, max_concurrent_sites=2)
+            unifi.load([self.controller_source("test controller", simulator)])
+        self.assertEqual(6, sum(path.endswith("/stat/device") for path in simulator.requests))
+        self.assertEqual(2, simulator.peak_in_flight)
+
+    def test_log_summary(self):
+        """The loaded objects are logged as a summary per site, rather than one by one."""
+        self.job.logger.setLevel(logging.DEBUG)
+        with ControllerSimulator(sites=2, devices=5, seed=1) as simulator:
+            self.unifi.load([self.controller_source("test controller", simulator)])
+
+        messages = set(
+            JobLogEntry.objects.filter(job_result=self.job.job_result, message__startswith="Added ").values_list(
+                "message", flat=True
+            )
+        )
+        self.assertIn("Added 5 devices on site site0001", messages)
+        self.assertIn("Added 2 sites", messages)
+        self.assertFalse([message for message in messages if message.startswith("Added device ")])
+
+    def test_small_fetch_queue(self):
+        """Every device is loaded when fetching has to wait for the devices to be loaded."""
+        unifi = UnifiAdapter(job=self.job, fetch_queue_size=1)
+        with ControllerSimulator(sites=3, devices=250, ports=4, seed=1) as simulator:
+            unifi.load([self.controller_source("test controller", simulator)])
+        self.assertEqual(750, len(unifi.get_all("device")))
+
+    def test_port_policy(self):
+        """Only the ports the policy selects are loaded as interfaces, and the others are recorded."""
+        with ControllerSimulator(sites=1, devices=20, ports=8, seed=1) as simulator:
+            self.unifi.load([self.controller_source("test controller", simulator)])
+            unifi = UnifiAdapter(job=self.job, port_policy="addressed")
+            unifi.load([self.controller_source("test controller", simulator)])
+        self.assertLess(len(unifi.get_all("interface")), len(self.unifi.get_all("interface")))
+        self.assertEqual(len(unifi.get_all("device")), len(self.unifi.get_all("device")))
+        self.assertEqual({}, self.unifi.skipped_interfaces)
+        skipped = sum(len(names) for names in unifi.skipped_interfaces.values())
+        self.assertEqual(len(self.unifi.get_all("interface")), len(unifi.get_all("interface")) + skipped)
+        with self.assertRaises(ValueError):
+            UnifiAdapter(job=self.job, port_policy="unused")
+
+    def test_skipped_interfaces(self):
+        """The interfaces the port policy left out, and their IP address assignments, are not loaded from Nautobot."""
+        self.create_controller("test controller")
+        with ControllerSimulator(sites=1, devices=20, ports=8, seed=1) as simulator:
+            self.unifi.load([self.controller_source("test controller", simulator)])
+            self.unifi.sync_to(UnifiNautobotAdapter(job=self.job))
+            unifi = UnifiAdapter(job=self.job, port_policy="up")
+            unifi.load([self.controller_source("test controller", simulator)])
+        self.assertTrue(unifi.skipped_interfaces)
+
+        target = UnifiNautobotAdapter(
+            job=self.job,
+            skipped_interfaces=unifi.skipped_interfaces,
+            controller_names=["test controller"],
+            source_adapter=unifi,
+        )
+        target.load()
+        # The IP addresses of the skipped interfaces are still in the source, without an assignment.
+        for model_name in ("interface", "ip_address", "ip_address_to_interface"):
+            self.assertEqual(
+                {model.get_unique_id() for model in unifi.get_all(model_name)},
+                {model.get_unique_id() for model in target.get_all(model_name)},
+                model_name,
+            )
+
+    def test_scope_to_controllers(self):
+        """Only the objects of the selected controllers, and the shared objects of the source, are loaded."""
+        tag = Tag.objects.get(name=UNIFI_SSOT_TAG)
+        status = Status.objects.get(name="Active")
+        manufacturer = Manufacturer.objects.get(name=UNIFI_MANUFACTURER)
+        role = Role.objects.get(name="Switch")
+        for number, name in enumerate(("first", "second"), start=1):
+            controller = self.create_controller(name)
+            group = ControllerManagedDeviceGroup.objects.create(name="default", controller=controller)
+            location = Location.objects.create(
+                name=f"{name} site", location_type=controller.location.location_type, status=status
+            )
+            device_type = DeviceType.objects.create(manufacturer=manufacturer, model=f"{name} model")
+            device = Device.objects.create(
+                name=f"{name} switch",
+                controller_managed_device_group=group,
+                location=location,
+                device_type=device_type,
+                role=role,
+                status=status,
+            )
+            interface = Interface.objects.create(device=device, name="Port 1", type="1000base-t", status=status)
+            prefix = Prefix.objects.create(prefix=f"10.{number}.0.0/24", status=status)
+            ip_address = IPAddress.objects.create(address=f"10.{number}.0.1/24", status=status)
+            interface.add_ip_addresses(ip_address)
+            for obj in (group, location, device_type, device, interface, prefix, ip_address):
+                obj.tags.add(tag)
+        # Shared objects the source has although no device uses them.
+        IPAddress.objects.create(address="10.1.0.9/24", status=status).tags.add(tag)
+        Location.objects.create(name="empty site", location_type=location.location_type, status=status).tags.add(tag)
+
+        source = UnifiAdapter(job=self.job)
+        for site in ("first site", "empty site"):
+            source.add(source.site(name=site, location_type__name="site"))
+        source.add(source.device_type(model="first model"))
+        source.add(source.prefix(network="10.1.0.0", prefix_length=24))
+        for host in ("10.1.0.1", "10.1.0.9"):
+            source.add(
+                source.ip_address(host=host, mask_length=24, parent__network="10.1.0.0", parent__prefix_length=24)
+            )
+        target = UnifiNautobotAdapter(job=self.job, controller_names=["first"], source_adapter=source)
+        target.load()
+        self.assertEqual(
+            [("default", "first")], [(group.name, group.controller__name) for group in target.get_all("device_group")]
+        )
+        self.assertEqual(["first switch"], [device.name for device in target.get_all("device")])
+        for model_name in ("site", "device_type", "prefix", "ip_address"):
+            self.assertEqual(
+                {model.get_unique_id() for model in source.get_all(model_name)},
+                {model.get_unique_id() for model in target.get_all(model_name)},
+                model_name,
+            )
+
+        # Without a source adapter, the shared objects are loaded by their tag alone.
+        target = UnifiNautobotAdapter(job=self.job, controller_names=["first"])
+        target.load()
+        self.assertEqual({"first site", "second site", "empty site"}, {site.name for site in target.get_all("site")})
+        self.assertEqual(
+            {"10.1.0.1", "10.1.0.9", "10.2.0.1"}, {ip_address.host for ip_address in target.get_all("ip_address")}
+        )
+
+    def test_reference_cache(self):
+        """The status and the tag of the created objects are looked up once per sync."""
+        LocationType.objects.create(name="site")
+        target = UnifiNautobotAdapter(job=self.job)
+        lookup = re.compile(r"extras_(?:status|tag)\W{0,2}\.\W{0,2}name\W{0,2} = ")
+        counts = []
+        for numbers in (range(1), range(1, 6)):
+            with CaptureQueriesContext(connection) as queries:
+                for number in numbers:
+                    SiteModel.create(target, {"name": f"site{number}"}, {"location_type__name": "site"})
+                target.apply_tags()
+            counts.append(len([query for query in queries.captured_queries if lookup.search(query["sql"])]))
+        self.assertEqual([2, 0], counts)
+
+    def test_bulk_tags(self):
+        """Tags are added and removed when the sync completes, with a query or two per content type."""
+        LocationType.objects.create(name="site")
+        target = UnifiNautobotAdapter(job=self.job)
+        for number in range(5):
+            SiteModel.create(target, {"name": f"site{number}"}, {"location_type__name": "site"})
+        tagged = Location.objects.filter(tags__name=UNIFI_SSOT_TAG)
+        self.assertEqual(0, tagged.count())
+        with CaptureQueriesContext(connection) as queries:
+            target.apply_tags()
+        self.assertEqual(5, tagged.count())
+        self.assertLessEqual(len(queries.captured_queries), 3)
+
+        target = UnifiNautobotAdapter(job=self.job)
+        target.load()
+        for site in target.get_all("site"):
+            site.delete()
+        self.assertEqual(5, tagged.count())
+        target.apply_tags()
+        self.assertEqual(0, tagged.count())
+        self.assertEqual(5, Location.objects.filter(name__startswith="site").count())
+
+    def test_bulk_create(self):
+        """Interfaces, IP addresses and their assignments created in bulk match the source."""
+        self.create_controller("test controller")
+        with ControllerSimulator(sites=1, devices=10, ports=8, seed=1) as simulator:
+            self.unifi.load([self.controller_source("test controller", simulator)])
+
+        target = UnifiNautobotAdapter(job=self.job, bulk_create=True)
+        target.load()
+        self.unifi.sync_to(target)
+        self.assertEqual(
+            len(self.unifi.get_all("interface")), Interface.objects.filter(tags__name=UNIFI_SSOT_TAG).count()
+        )
+        self.assertEqual(len(self.unifi.get_all("ip_address_to_interface")), IPAddressToInterface.objects.count())
+        reloaded = UnifiNautobotAdapter(job=self.job)
+        reloaded.load()
+        for model_name in ("interface", "ip_address", "ip_address_to_interface"):
+            self.assertEqual(len(self.unifi.get_all(model_name)), len(reloaded.get_all(model_name)), model_name)
+
+    def test_bulk_create_one_by_one(self):
+        """Objects that cannot be written in bulk get their primary key, or are reported when they fail."""
+        self.create_controller("test controller")
+        with ControllerSimulator(sites=1, devices=2, ports=4, seed=1) as simulator:
+            self.unifi.load([self.controller_source("test controller", simulator)])
+        self.unifi.sync_to(UnifiNautobotAdapter(job=self.job))
+        status = Status.objects.get(name="Active")
+        # An address whose parent has child prefixes, and an interface whose name is taken.
+        Prefix.objects.create(network="192.0.2.0", prefix_length=24, status=status)
+        Prefix.objects.create(network="192.0.2.16", prefix_length=28, status=status)
+        device = Device.objects.filter(tags__name=UNIFI_SSOT_TAG).first()
+        Interface.objects.create(device=device, name="conflict", label="other", type="1000base-t", status=status)
+
+        target = UnifiNautobotAdapter(job=self.job, bulk_create=True)
+        target.load()
+        device_model = next(model for model in target.get_all("device") if model.name == device.name)
+        ip_address = IPAddressModel.create(
+            target,
+            {"host": "192.0.2.5", "mask_length": 24},
+            {"parent__network": "192.0.2.0", "parent__prefix_length": 24},
+        )
+        target.add(ip_address)
+        interface = InterfaceModel.create(
+            target,
+            {"label": "conflict", **{f"device__{key}": value for key, value in device_model.get_identifiers().items()}},
+            {"type": "1000base-t", "unifi_port_id": 99},
+        )
+        target.add(interface)
+        target.flush_creates()
+
+        self.assertEqual(IPAddress.objects.get(host="192.0.2.5").pk, ip_address.pk)
+        self.assertEqual(DiffSyncStatus.ERROR, interface.get_status()[0])
+        self.assertIsNone(target.get_or_none("interface", interface.get_unique_id()))
+        self.assertEqual({DeviceModel.device_key(device_model.get_identifiers())}, target.failed_devices)
+
+    def test_primary_ips(self):
+        """The primary IP addresses of all the devices are set with a few queries."""
+        self.create_controller("test controller")
+        with ControllerSimulator(sites=1, devices=10, ports=8, seed=1) as simulator:
+            self.unifi.load([self.controller_source("test controller", simulator)])
+        self.unifi.sync_to(UnifiNautobotAdapter(job=self.job))
+
+        primary_ips = {
+            device.name: device.primary_ip4__host for device in self.unifi.get_all("device") if device.primary_ip4__host
+        }
+        self.assertTrue(primary_ips)
+        self.assertEqual(
+            primary_ips, dict(Device.objects.filter(primary_ip4__isnull=False).values_list("name", "primary_ip4__host"))
+        )
+
+        target = UnifiNautobotAdapter(job=self.job)
+        target.load()
+        for device in target.get_all("device"):
+            target.queue_primary_ips(device.get_identifiers(), {"primary_ip4": None})
+        with CaptureQueriesContext(connection) as queries:
+            target.set_primary_ips()
+        self.assertLessEqual(len(queries.captured_queries), 3)
+        self.assertFalse(Device.objects.filter(primary_ip4__isnull=False).exists())
+
+    def test_unchanged_devices(self):
+        """The interfaces and IP address assignments of devices that have not changed are neither loaded nor compared."""
+        self.create_controller("test controller")
+        with ControllerSimulator(sites=1, devices=10, ports=8, seed=1) as simulator:
+            source = self.controller_source("test controller", simulator)
+            self.unifi.load([source])
+            self.unifi.sync_to(UnifiNautobotAdapter(job=self.job))
+            fingerprints = get_device_fingerprints(["test controller"])
+            self.assertEqual(
+                {device.get_unique_id(): device.unifi_fingerprint for device in self.unifi.get_all("device")},
+                fingerprints,
+            )
+            unifi = UnifiAdapter(job=self.job, device_fingerprints=fingerprints)
+            unifi.load([source])
+
+        self.assertEqual(10, len(unifi.unchanged_devices))
+        self.assertEqual(10, len(unifi.get_all("device")))
+        self.assertEqual([], list(unifi.get_all("interface")))
+        self.assertEqual([], list(unifi.get_all("ip_address_to_interface")))
+        self.assertEqual(len(self.unifi.get_all("ip_address")), len(unifi.get_all("ip_address")))
+        target = UnifiNautobotAdapter(
+            job=self.job, unchanged_devices=unifi.unchanged_devices, skipped_interfaces=unifi.skipped_interfaces
+        )
+        target.load()
+        self.assertEqual([], list(target.get_all("interface")))
+        self.assertEqual([], list(target.get_all("ip_address_to_interface")))
+        self.assertFalse(unifi.diff_to(target).has_diffs())
+
+    def test_changed_device(self):
+        """Only the interfaces and IP address assignments of the device that changed are loaded and synced."""
+        self.create_controller("test controller")
+        with ControllerSimulator(sites=1, devices=10, ports=8, seed=1) as simulator:
+            source = self.controller_source("test controller", simulator)
+            self.unifi.load([source])
+            self.unifi.sync_to(UnifiNautobotAdapter(job=self.job))
+            device = simulator.get_devices("default")[0]
+            port_table = device["port_table"]
+            simulator.update_device(
+                "default", device["mac"], port_table=[{**port_table[0], "name": "Uplink"}, *port_table[1:]]
+            )
+            unifi = UnifiAdapter(job=self.job, device_fingerprints=get_device_fingerprints(["test controller"]))
+            unifi.load([source])
+
+        self.assertEqual(9, len(unifi.unchanged_devices))
+        self.assertEqual({device["name"]}, {interface.device__name for interface in unifi.get_all("interface")})
+        target = UnifiNautobotAdapter(
+            job=self.job, unchanged_devices=unifi.unchanged_devices, skipped_interfaces=unifi.skipped_interfaces
+        )
+        target.load()
+        self.assertEqual({device["name"]}, {interface.device__name for interface in target.get_all("interface")})
+        unifi.sync_to(target)
+        self.assertEqual(
+            {"Uplink"} | {port["name"] for port in port_table[1:]},
+            set(
+                Interface.objects.filter(device__name=device["name"])
+                .exclude(label="mgmt")
+                .values_list("label", flat=True)
+            ),
+        )
+        self.assertEqual(
+            {model.get_unique_id(): model.unifi_fingerprint for model in unifi.get_all("device")},
+            get_device_fingerprints(["test controller"]),
+        )
+
+    def test_failed_device_fingerprint(self):
+        """The fingerprint of a device that had a failed write is not stored."""
+        self.create_controller("test controller")
+        with ControllerSimulator(sites=1, devices=2, ports=4, seed=1) as simulator:
+            self.unifi.load([self.controller_source("test controller", simulator)])
+        self.unifi.sync_to(UnifiNautobotAdapter(job=self.job))
+
+        target = UnifiNautobotAdapter(job=self.job)
+        target.load()
+        failed, synced = target.get_all("device")
+        for device in (failed, synced):
+            target.queue_fingerprint(device.get_identifiers(), "changed")
+        target.device_failed(DeviceModel.device_key(failed.get_identifiers()))
+        target.set_fingerprints()
+        fingerprints = get_device_fingerprints(["test controller"])
+        self.assertEqual(failed.unifi_fingerprint, fingerprints[failed.get_unique_id()])
+        self.assertEqual("changed", fingerprints[synced.get_unique_id()])
+
+    def test_site_by_site(self):
+        """In site by site mode, Nautobot is only loaded with the objects of the site being synced."""
+        self.create_controller("test controller")
+        self.job.dryrun = False
+        self.job.sync = None
+        with ControllerSimulator(sites=2, devices=5, ports=4, seed=1) as simulator:
+            controller = self.controller_source("test controller", simulator)
+            # The first pass creates the objects, the second one finds those of each site in Nautobot.
+            for _ in range(2):
+                synced = {}
+                for _, site_name, devices in SiteStream([controller]):
+                    self.job.sync_site(controller, site_name, devices, {}, collections.Counter())
+                    synced[site_name] = (self.job.source_adapter, self.job.target_adapter)
+
+        self.assertEqual(set(simulator.site_names()), set(synced))
+        for site_name, (source, target) in synced.items():
+            self.assertEqual(
+                {device["name"] for device in simulator.get_devices(site_name)},
+                {device.name for device in target.get_all("device")},
+            )
+            self.assertEqual([controller.location_name(site_name)], [site.name for site in target.get_all("site")])
+            for model_name in source.top_level:
+                self.assertEqual(
+                    {model.get_unique_id() for model in source.get_all(model_name)},
+                    {model.get_unique_id() for model in target.get_all(model_name)},
+                    f"{model_name} of site {site_name}",
+                )
+            self.assertFalse(source.diff_to(target).has_diffs())
+
+    def test_shared_strings(self):
+        """Repeated identifier values are shared by the models rather than copied."""
+        with ControllerSimulator(sites=1, devices=10, ports=8, seed=1) as simulator:
+            self.unifi.load([self.controller_source("test controller", simulator)])
+
+        interfaces = self.unifi.get_all("interface")
+        devices = {device.name: device for device in self.unifi.get_all("device")}
+        for interface in interfaces:
+            self.assertIs(devices[interface.device__name].name, interface.device__name)
+        labels = {}
+        for interface in interfaces:
+            self.assertIs(labels.setdefault(interface.label, interface.label), interface.label)
+        benchmark = string_usage(self.unifi)
+        self.assertLess(benchmark["bytes"], benchmark["unshared_bytes"] / 2)
+
+
+class TestSiteStream(unittest.TestCase):
+    """Test fetching the sites of controllers one at a time."""
+
+    def test_all_sites(self):
+        """Every site of every controller is fetched in order, and the requests are recorded."""
+        with ControllerSimulator(sites=3, devices=20, ports=4, seed=1) as simulator:
+            first = TestUnifiAdapterTestCase.controller_source("first", simulator)
+            second = TestUnifiAdapterTestCase.controller_source("second", simulator)
+            stream = SiteStream([first, second])
+            sites = [(controller.name, site_name, len(devices)) for controller, site_name, devices in stream]
+        self.assertEqual(
+            [(controller, site, 20) for controller in ("first", "second") for site in simulator.site_names()],
+            sites,
+        )
+        self.assertEqual({"first", "second"}, set(stream.request_metrics))
+        self.assertEqual(1, stream.request_metrics["first"].summary()["login"]["requests"])
+
+    def test_stop_early(self):
+        """Fetching stops when the consumer leaves the loop."""
+        with ControllerSimulator(sites=5, devices=20, ports=4, seed=1) as simulator:
+            stream = SiteStream([TestUnifiAdapterTestCase.controller_source("test controller", simulator)])
+            sites = iter(stream)
+            next(sites)
+            sites.close()
+        self.assertNotIn("unifi-site-stream", [thread.name for thread in threading.enumerate()])
+        # The first site, the one waiting for the consumer and the one being handed over.
+        self.assertLessEqual(stream.request_metrics["test controller"].summary()["GET /stat/device"]["requests"], 3)
@@ -0,0 +1,232 @@
+"""Test the Unifi client against the controller simulator."""
+
+import asyncio
+import unittest
+from unittest import mock
+
+import aiohttp
+
+from nautobot_ssot_unifi.tests.simulator import ControllerSimulator
+from nautobot_ssot_unifi.unifi import Client, RetryPolicy
+
+
+class DictCache(dict):
+    """A cache with the Django cache `get`/`set` interface, kept in a dictionary."""
+
+    def set(self, key, value, timeout=None):  # pylint: disable=unused-argument
+        """Store a value."""
+        self[key] = value
+
+
+class TestClient(unittest.TestCase):
+    """Test fetching from a simulated controller."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start the simulator."""
+        cls.simulator = ControllerSimulator(sites=3, devices=20, ports=10, seed=1)
+        cls.simulator.__enter__()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the simulator."""
+        cls.simulator.__exit__(None, None, None)
+
+    def run_with_client(self, coroutine_function, **client_options):
+        """Run `coroutine_function(client)` with a new client connected to the simulator."""
+
+        async def run():
+            client = Client(
+                host=self.simulator.host,
+                port=self.simulator.port,
+                username=self.simulator.username,
+                password=self.simulator.password,
+                scheme="http",
+                retry_policy=RetryPolicy(backoff=0.01),
+                **client_options,
+            )
+            try:
+                return await coroutine_function(client)
+            finally:
+                await client.logout()
+
+        return asyncio.run(run())
+
+    def test_fetch_all_devices(self):
+        """Every device of every site is fetched, with a single login."""
+
+        async def fetch(client):
+            devices = {}
+            for site in await client.get_sites():
+                devices[site.name] = [device.name async for device in client.for_site(site.name).iter_devices()]
+            return devices
+
+        logins = self.simulator.logins
+        devices = self.run_with_client(fetch)
+        self.assertEqual(self.simulator.logins, logins + 1)
+        self.assertEqual(list(devices), self.simulator.site_names())
+        for site, names in devices.items():
+            self.assertEqual(names, [device["name"] for device in self.simulator.get_devices(site)])
+
+    def test_retry_failed_requests(self):
+        """Failed requests are retried."""
+        self.simulator.fail_next(2, status=503)
+        devices = self.run_with_client(lambda client: client.for_site("default").get_devices())
+        self.assertEqual(len(list(devices)), 20)
+
+    def test_metrics(self):
+        """Every request, retry and response is recorded per endpoint."""
+
+        async def fetch(client):
+            await client.get_sites()
+            self.simulator.fail_next(1, status=503)
+            await client.for_site("default").get_devices()
+            return client.metrics.summary()
+
+        summary = self.run_with_client(fetch)
+        self.assertEqual(1, summary["login"]["requests"])
+        self.assertEqual(1, summary["GET /self/sites"]["requests"])
+        devices = summary["GET /stat/device"]
+        self.assertEqual(2, devices["requests"])
+        self.assertEqual(1, devices["retries"])
+        self.assertEqual({"200": 1, "503": 1}, devices["statuses"])
+        self.assertGreater(devices["bytes"], 0)
+        self.assertEqual(2, devices["latency"]["count"])
+
+    def test_login_again(self):
+        """The client logs in again when its session has expired."""
+
+        async def fetch(client):
+            await client.for_site("default").get_devices()
+            self.simulator.expire_sessions()
+            return await client.for_site("site0001").get_devices()
+
+        logins = self.simulator.logins
+        devices = self.run_with_client(fetch)
+        self.assertEqual(len(list(devices)), 20)
+        self.assertEqual(self.simulator.logins, logins + 2)
+
+    def test_session_cache(self):
+        """A second client sharing the session cache reuses the session without logging in."""
+        cache = DictCache()
+        logins = self.simulator.logins
+        self.run_with_client(lambda client: client.get_sites(), session_cache=cache)
+        self.assertEqual(self.simulator.logins, logins + 1)
+        self.assertEqual(1, len(cache))
+
+        sites = self.run_with_client(lambda client: client.get_sites(), session_cache=cache)
+        self.assertEqual(self.simulator.site_names(), [site.name for site in sites])
+        self.assertEqual(self.simulator.logins, logins + 1)
+
+    def test_session_cache_expired(self):
+        """A restored session the controller rejects is replaced by a new login."""
+        cache = DictCache()
+        self.run_with_client(lambda client: client.get_sites(), session_cache=cache)
+        ((key, state),) = cache.items()
+        self.simulator.expire_sessions()
+
+        logins = self.simulator.logins
+        devices = self.run_with_client(lambda client: client.for_site("default").get_devices(), session_cache=cache)
+        self.assertEqual(len(list(devices)), 20)
+        self.assertEqual(self.simulator.logins, logins + 1)
+        self.assertNotEqual(state["cookies"], cache[key]["cookies"])
+
+    def test_endpoints(self):
+        """Only the endpoints the client was created with are requested."""
+
+        async def fetch(client):
+            await client.for_site("site0001").get_devices()
+            with self.assertRaises(ValueError):
+                await client.for_site("site0001").get_networks()
+
+        requests = dict(self.simulator.requests)
+        self.run_with_client(fetch)
+        self.assertEqual(
+            requests.get("/api/s/site0001/stat/device", 0) + 1, self.simulator.requests["/api/s/site0001/stat/device"]
+        )
+        self.assertNotIn("/api/s/site0001/rest/networkconf", self.simulator.requests)
+
+        networks = self.run_with_client(
+            lambda client: client.for_site("site0001").get_networks(), endpoints=("sites", "devices", "networks")
+        )
+        self.assertEqual(self.simulator.get_networks("site0001"), networks)
+        self.assertEqual(1, self.simulator.requests["/api/s/site0001/rest/networkconf"])
+
+    def test_memoized(self):
+        """An endpoint collection is requested once, however often (and concurrently) it is fetched."""
+
+        async def fetch(client):
+            site_client = client.for_site("site0002")
+            first, second = await asyncio.gather(site_client.fetch("devices"), site_client.fetch("devices"))
+            self.assertIs(first, second)
+            self.assertIs(first, await site_client.get_devices())
+
+        requests = self.simulator.requests.get("/api/s/site0002/stat/device", 0)
+        self.run_with_client(fetch)
+        self.assertEqual(requests + 1, self.simulator.requests["/api/s/site0002/stat/device"])
+
+    def test_unknown_endpoint(self):
+        """A client cannot be created with an endpoint it does not know."""
+        with self.assertRaises(ValueError):
+            Client(host=self.simulator.host, username="admin", password="password", endpoints=["sites", "unknown"])
+
+    def test_connector_options(self):
+        """The connection pool and DNS cache options are passed on to the connector."""
+
+        async def create():
+            with mock.patch("aiohttp.TCPConnector", wraps=aiohttp.TCPConnector) as connector:
+                client = Client(
+                    host=self.simulator.host,
+                    username="admin",
+                    password="password",
+                    connection_limit=12,
+                    connection_limit_per_host=3,
+                    keepalive_timeout=4.5,
+                    dns_cache_ttl=60,
+                )
+            try:
+                return (
+                    connector.call_args.kwargs,
+                    client.session.connector.limit,
+                    client.session.connector.limit_per_host,
+                )
+            finally:
+                await client.logout()
+
+        options, limit, limit_per_host = asyncio.run(create())
+        self.assertEqual(12, options["limit"])
+        self.assertEqual(3, options["limit_per_host"])
+        self.assertEqual(4.5, options["keepalive_timeout"])
+        self.assertTrue(options["use_dns_cache"])
+        self.assertEqual(60, options["ttl_dns_cache"])
+        self.assertEqual((12, 3), (limit, limit_per_host))
+
+    def test_uncompressed(self):
+        """Responses are also read when compression is turned off."""
+        devices = self.run_with_client(lambda client: client.for_site("site0002").get_devices(), compress=False)
+        self.assertEqual(len(list(devices)), 20)
+
+    def test_get_devices_by_mac(self):
+        """Only the requested devices are fetched."""
+        macs = [device["mac"] for device in self.simulator.get_devices("site0001")[3:5]]
+        devices = self.run_with_client(lambda client: client.for_site("site0001").get_devices_by_mac(macs))
+        self.assertEqual(
+            [device["name"] for device in self.simulator.get_devices("site0001")[3:5]],
+            [device.name for device in devices],
+        )
+
+    def test_listen(self):
+        """The messages of a site's websocket are received."""
+        message = {"meta": {"rc": "ok", "message": "device:sync"}, "data": [{"mac": "f0:9f:c2:00:00:01"}]}
+
+        async def listen(client):
+            messages = client.for_site("site0002").listen()
+            receive = asyncio.ensure_future(messages.__anext__())
+            while not self.simulator.listeners("site0002"):
+                await asyncio.sleep(0.01)
+            await asyncio.to_thread(self.simulator.publish, "site0002", message)
+            received = await receive
+            await messages.aclose()
+            return received
+
+        self.assertEqual(message, self.run_with_client(listen))
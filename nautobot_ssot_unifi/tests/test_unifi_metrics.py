@@ -0,0 +1,54 @@
+"""Test the Unifi request metrics."""
+
+import unittest
+
+from nautobot_ssot_unifi.unifi.metrics import Histogram, RequestMetrics
+
+
+class TestHistogram(unittest.TestCase):
+    """Test the latency histogram."""
+
+    def test_observe(self):
+        """Observations are counted in the first bucket they fit in."""
+        histogram = Histogram()
+        for seconds in (0.005, 0.01, 0.3, 0.3, 60):
+            histogram.observe(seconds)
+        summary = histogram.summary()
+        self.assertEqual(5, summary["count"])
+        self.assertEqual(2, summary["buckets"]["0.01"])
+        self.assertEqual(2, summary["buckets"]["0.5"])
+        self.assertEqual(1, summary["buckets"]["+Inf"])
+        self.assertEqual(0.005, summary["min"])
+        self.assertEqual(60, summary["max"])
+
+    def test_quantile(self):
+        """Quantiles are estimated as the upper bound of their bucket, capped by the largest observation."""
+        histogram = Histogram()
+        self.assertIsNone(histogram.quantile(0.5))
+        for _ in range(19):
+            histogram.observe(0.02)
+        histogram.observe(0.7)
+        self.assertEqual(0.025, histogram.quantile(0.5))
+        self.assertEqual(0.025, histogram.quantile(0.95))
+        self.assertEqual(0.7, histogram.quantile(1))
+
+
+class TestRequestMetrics(unittest.TestCase):
+    """Test the per endpoint metrics."""
+
+    def test_merge(self):
+        """The metrics of several clients add up."""
+        first, second = RequestMetrics(), RequestMetrics()
+        first.observe("GET /stat/device", 0.1, duration=0.3, status=200, size=1000)
+        second.observe("GET /stat/device", 0.2, status=503)
+        second.retried("GET /stat/device")
+        second.observe("GET /stat/device", 1.0)
+        first.merge(second)
+        summary = first.summary()["GET /stat/device"]
+        self.assertEqual(3, summary["requests"])
+        self.assertEqual(1, summary["retries"])
+        self.assertEqual(1, summary["errors"])
+        self.assertEqual({"200": 1, "503": 1}, summary["statuses"])
+        self.assertEqual(5000, summary["bytes_per_second"])
+        self.assertEqual(0.1, summary["latency"]["min"])
+        self.assertEqual(1.0, summary["duration"]["max"])
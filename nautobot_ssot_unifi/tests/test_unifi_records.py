@@ -0,0 +1,76 @@
+"""Test the compact Unifi device records."""
+
+import unittest
+
+from nautobot_ssot_unifi.tests.utils import load_fixture
+from nautobot_ssot_unifi.unifi.records import DeviceRecord, NetworkConfigRecord, PortRecord
+
+DEVICE_FIXTURE = load_fixture("get_devices.json")
+
+
+class TestDeviceRecord(unittest.TestCase):
+    """Test projecting raw stat/device items onto device records."""
+
+    def test_from_raw(self):
+        """The fields the app uses are projected from a raw device."""
+        record = DeviceRecord.from_raw(DEVICE_FIXTURE[0])
+        self.assertEqual("Core Switch", record.name)
+        self.assertEqual("US24P250", record.model)
+        self.assertEqual("F09FC2000001", record.serial)
+        self.assertEqual(
+            PortRecord(name="SFP 1", media="SFP", port_idx=25, ip="198.51.100.2", netmask="255.255.255.252", up=True),
+            record.ports[2],
+        )
+        self.assertEqual(
+            NetworkConfigRecord(type="static", ip="192.0.2.10", netmask="255.255.255.0"), record.config_network
+        )
+
+    def test_from_raw_defaults(self):
+        """Missing fields get their defaults."""
+        record = DeviceRecord.from_raw({"model": "U7PG2"})
+        self.assertEqual("", record.name)
+        self.assertEqual((), record.ports)
+        self.assertIsNone(record.config_network)
+        self.assertEqual("other", PortRecord.from_raw({"name": "Port 1", "port_idx": 1}).media)
+
+    def test_fingerprint(self):
+        """The fingerprint is stable, and changes with the site and the ports."""
+        record = DeviceRecord.from_raw(DEVICE_FIXTURE[0])
+        self.assertEqual(record.fingerprint("Site"), DeviceRecord.from_raw(DEVICE_FIXTURE[0]).fingerprint("Site"))
+        self.assertNotEqual(record.fingerprint("Site"), record.fingerprint("Other Site"))
+        changed = DeviceRecord.from_raw(
+            {**DEVICE_FIXTURE[0], "port_table": [{**DEVICE_FIXTURE[0]["port_table"][0], "name": "Uplink"}]}
+        )
+        self.assertNotEqual(record.fingerprint("Site"), changed.fingerprint("Site"))
+
+    def test_select_ports(self):
+        """Each port policy selects its ports."""
+        record = DeviceRecord.from_raw(DEVICE_FIXTURE[0])
+        self.assertEqual(["Port 1", "Port 2", "SFP 1"], [port.name for port in record.select_ports("all")])
+        self.assertEqual(["Port 1", "Port 2", "SFP 1"], [port.name for port in record.select_ports("enabled")])
+        self.assertEqual(["Port 1", "SFP 1"], [port.name for port in record.select_ports("up")])
+        self.assertEqual(["Port 1", "SFP 1"], [port.name for port in record.select_ports("addressed")])
+
+    def test_fingerprint_port_policy(self):
+        """The fingerprint depends on the port policy, and on port states only when the policy does."""
+        record = DeviceRecord.from_raw(DEVICE_FIXTURE[0])
+        self.assertNotEqual(record.fingerprint("Site"), record.fingerprint("Site", port_policy="up"))
+        # The state of a port only matters to the policies that select ports by it.
+        flapped = DeviceRecord.from_raw(
+            {**DEVICE_FIXTURE[0], "port_table": [{**port, "up": True} for port in DEVICE_FIXTURE[0]["port_table"]]}
+        )
+        self.assertEqual(record.fingerprint("Site"), flapped.fingerprint("Site"))
+        self.assertNotEqual(record.fingerprint("Site", port_policy="up"), flapped.fingerprint("Site", port_policy="up"))
+
+    def test_fingerprint_ignores_telemetry(self):
+        """Telemetry, such as the uptime, does not change the fingerprint."""
+        raw = {**DEVICE_FIXTURE[0], "uptime": 1, "stat": {}}
+        self.assertEqual(
+            DeviceRecord.from_raw(DEVICE_FIXTURE[0]).fingerprint(), DeviceRecord.from_raw(raw).fingerprint()
+        )
+
+    def test_slots(self):
+        """Records keep neither an instance dictionary nor the raw device."""
+        record = DeviceRecord.from_raw(DEVICE_FIXTURE[1])
+        self.assertFalse(hasattr(record, "__dict__"))
+        self.assertFalse(hasattr(record, "raw"))
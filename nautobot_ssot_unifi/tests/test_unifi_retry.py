@@ -0,0 +1,80 @@
+"""Test retrying, rate limiting and circuit breaking of Unifi requests."""
+
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from nautobot_ssot_unifi.unifi.retry import CircuitBreaker, CircuitOpenError, RetryPolicy, TokenBucket, TooManyRequests
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """Test the backoff between attempts."""
+
+    def test_delay_is_bounded(self):
+        """The delay is jittered below an exponentially growing, capped bound."""
+        policy = RetryPolicy(backoff=1, backoff_max=5)
+        for retry, bound in ((1, 1), (2, 2), (3, 4), (4, 5), (10, 5)):
+            for _ in range(20):
+                self.assertLessEqual(policy.delay(retry), bound)
+
+    def test_retry_after(self):
+        """The delay requested by the controller is respected, up to the maximum."""
+        policy = RetryPolicy(backoff_max=10)
+        self.assertEqual(policy.delay(1, TooManyRequests("slow down", retry_after=3)), 3)
+        self.assertEqual(policy.delay(1, TooManyRequests("slow down", retry_after=60)), 10)
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test the rate limiter."""
+
+    def test_burst_then_rate(self):
+        """Requests beyond the burst wait for tokens to be refilled."""
+
+        async def acquire(bucket, count):
+            for _ in range(count):
+                await bucket.acquire()
+
+        bucket = TokenBucket(rate=100, burst=5)
+        start = time.monotonic()
+        asyncio.run(acquire(bucket, 5))
+        self.assertLess(time.monotonic() - start, 0.02)
+        asyncio.run(acquire(bucket, 10))
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_disabled(self):
+        """A rate of 0 never waits."""
+        bucket = TokenBucket(rate=0)
+        with mock.patch("asyncio.sleep") as sleep:
+            asyncio.run(bucket.acquire())
+        sleep.assert_not_called()
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test the circuit breaker."""
+
+    def test_opens_after_threshold(self):
+        """Consecutive failures open the circuit, a success resets the count."""
+        breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.check()
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open)
+        with self.assertRaises(CircuitOpenError):
+            breaker.check()
+
+    def test_closes_after_timeout(self):
+        """Requests are let through again once the reset timeout has passed."""
+        breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertFalse(breaker.is_open)
+        breaker.check()
+
+    def test_disabled(self):
+        """A threshold of 0 never opens the circuit."""
+        breaker = CircuitBreaker(threshold=0)
+        for _ in range(100):
+            breaker.record_failure()
+        self.assertFalse(breaker.is_open)
@@ -0,0 +1,54 @@
+"""Test incremental parsing of Unifi responses."""
+
+import json
+import unittest
+
+from aiounifi.errors import LoginRequired
+
+from nautobot_ssot_unifi.tests.utils import load_fixture
+from nautobot_ssot_unifi.unifi.stream import ResponseStream
+
+DEVICE_FIXTURE = load_fixture("get_devices.json")
+
+
+def feed_in_chunks(body, size):
+    """Feed a response body to a new stream `size` bytes at a time."""
+    stream = ResponseStream()
+    items = []
+    for start in range(0, len(body), size):
+        items.extend(stream.feed(body[start : start + size]))
+    stream.close()
+    return stream, items
+
+
+class TestResponseStream(unittest.TestCase):
+    """Test the ResponseStream parser."""
+
+    def test_chunk_boundaries(self):
+        """Items are parsed whatever the size of the chunks, including inside strings."""
+        devices = DEVICE_FIXTURE + [{"name": 'quoted "{[" \\ name:', "port_table": [{"name": "\\"}]}]
+        body = json.dumps({"meta": {"rc": "ok"}, "data": devices, "extra": {"data": [{}]}}).encode()
+        for size in [1, 2, 3, 7, 64, len(body)]:
+            with self.subTest(size=size):
+                stream, items = feed_in_chunks(body, size)
+                self.assertEqual(devices, items)
+                self.assertEqual({"rc": "ok"}, stream.meta)
+
+    def test_items_before_end_of_response(self):
+        """An item is returned as soon as it has been received."""
+        body = json.dumps({"meta": {"rc": "ok"}, "data": DEVICE_FIXTURE}).encode()
+        first_end = body.index(b"radio_table")
+        stream = ResponseStream()
+        self.assertEqual([DEVICE_FIXTURE[0]], stream.feed(body[:first_end]))
+
+    def test_error(self):
+        """An error response raises the matching error."""
+        with self.assertRaises(LoginRequired):
+            ResponseStream().feed(b'{"meta": {"rc": "error", "msg": "api.err.LoginRequired"}, "data": []}')
+
+    def test_truncated(self):
+        """A response that ends early raises a ValueError."""
+        stream = ResponseStream()
+        stream.feed(json.dumps({"meta": {"rc": "ok"}, "data": DEVICE_FIXTURE}).encode()[:-10])
+        with self.assertRaises(ValueError):
+            stream.close()
@@ -0,0 +1,17 @@
+"""Helpers shared by the tests."""
+
+import json
+from os import path
+
+FIXTURES_DIR = path.join(path.dirname(__file__), "fixtures")
+
+
+def load_json(file_path):
+    """Load a json file."""
+    with open(file_path, encoding="utf-8") as file:
+        return json.loads(file.read())
+
+
+def load_fixture(name):
+    """Load a json file from the test fixtures."""
+    return load_json(path.join(FIXTURES_DIR, name))
@@ -1,7 +1,24 @@
 """Unifi client module."""
 
-from .client import Client
+from .client import DEFAULT_DNS_CACHE_TTL, ENDPOINTS, Client, Endpoint, SiteClient
+from .metrics import RequestMetrics
+from .records import PORT_POLICIES, DeviceRecord, NetworkConfigRecord, PortRecord
+from .retry import CircuitBreaker, CircuitOpenError, RetryPolicy, TokenBucket, TooManyRequests
 
 __all__ = [
+    "DEFAULT_DNS_CACHE_TTL",
+    "ENDPOINTS",
+    "PORT_POLICIES",
+    "CircuitBreaker",
+    "CircuitOpenError",
     "Client",
+    "DeviceRecord",
+    "Endpoint",
+    "NetworkConfigRecord",
+    "PortRecord",
+    "RequestMetrics",
+    "RetryPolicy",
+    "SiteClient",
+    "TokenBucket",
+    "TooManyRequests",
 ]
@@ -1,15 +1,118 @@
 """The unifi client definition for SSoT."""
 
-from typing import Iterable, TYPE_CHECKING
+import asyncio
+import contextlib
+import dataclasses
+import ssl
+import time
+from http import HTTPStatus
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
 
 import aiohttp
+import orjson
+from yarl import URL
 
 from aiounifi.controller import Controller as UnifiController
+from aiounifi.errors import (
+    BadGateway,
+    Forbidden,
+    LoginRequired,
+    RequestError,
+    ResponseError,
+    ServiceUnavailable,
+)
+from aiounifi.models.api import ApiRequest, TypedApiResponse
 from aiounifi.models.configuration import Configuration as UnifiConfiguration
+from aiounifi.models.device import DeviceListRequest
+from aiounifi.models.site import Site, SiteListRequest
 
-if TYPE_CHECKING:
-    from aiounifi.models.device import Device
-    from aiounifi.models.site import Site
+from .metrics import RequestMetrics
+from .records import DeviceRecord
+from .retry import RETRYABLE_ERRORS, CircuitBreaker, RetryPolicy, TokenBucket, TooManyRequests
+from .stream import ResponseStream
+
+
+@dataclasses.dataclass(frozen=True)
+class Endpoint:
+    """A collection that can be fetched from the Unifi controller.
+
+    Attributes:
+        name (str): The name callers use to opt into the endpoint.
+        api_request (ApiRequest): The request that lists the collection.
+        parse (callable, optional): Turns each raw item into the object that is returned, such
+            as an aiounifi model or a compact record. When not set, the raw dictionaries are returned.
+        per_site (bool): Whether the collection belongs to a site or to the whole controller.
+    """
+
+    name: str
+    api_request: ApiRequest
+    parse: Optional[Callable[[Dict[str, Any]], Any]] = None
+    per_site: bool = True
+
+
+ENDPOINTS = {
+    endpoint.name: endpoint
+    for endpoint in [
+        Endpoint("sites", SiteListRequest.create(), Site, per_site=False),
+        Endpoint("devices", DeviceListRequest.create(), DeviceRecord.from_raw),
+        Endpoint("networks", ApiRequest(method="get", path="/rest/networkconf")),
+    ]
+}
+
+DEFAULT_ENDPOINTS = ("sites", "devices")
+
+# How long (in seconds) the address of a controller is cached, also the default of the `dns_cache_ttl` setting.
+DEFAULT_DNS_CACHE_TTL = 300
+
+# The size of the pieces a streamed response body is read in.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_STATUS_ERRORS = {
+    HTTPStatus.UNAUTHORIZED: LoginRequired,
+    HTTPStatus.FORBIDDEN: Forbidden,
+    HTTPStatus.NOT_FOUND: ResponseError,
+    HTTPStatus.BAD_GATEWAY: BadGateway,
+    HTTPStatus.SERVICE_UNAVAILABLE: ServiceUnavailable,
+}
+
+
+@dataclasses.dataclass(kw_only=True)
+class Configuration(UnifiConfiguration):
+    """Controller configuration that is not limited to HTTPS.
+
+    Attributes:
+        scheme (str): The URL scheme (`http` or `https`) used to connect to the controller.
+    """
+
+    scheme: str = "https"
+
+    @property
+    def url(self) -> str:
+        """Represent the controller's base URL."""
+        return f"{self.scheme}://{self.host}:{self.port}"
+
+
+def _check_response(response: aiohttp.ClientResponse):
+    """Raise the same errors for a response that aiounifi would.
+
+    Rate limited (429) and server error (5xx) responses raise a
+    `RequestError` so that the request is retried.
+    """
+    message = f"Call {response.url} received {response.status} {response.reason}"
+    if response.status in _STATUS_ERRORS:
+        raise _STATUS_ERRORS[response.status](message)
+    if response.status == HTTPStatus.TOO_MANY_REQUESTS:
+        retry_after = response.headers.get("Retry-After", "")
+        raise TooManyRequests(message, retry_after=float(retry_after) if retry_after.isdigit() else None)
+    if response.status >= HTTPStatus.INTERNAL_SERVER_ERROR:
+        raise RequestError(message)
+    if response.content_type != "application/json":
+        raise ResponseError(f"Call {response.url} received {response.content_type} instead of JSON")
+
+
+def _endpoint_name(api_request: ApiRequest) -> str:
+    """Name the endpoint of a request in the metrics, for instance `GET /stat/device`."""
+    return f"{api_request.method.upper()} {api_request.path}"
 
 
 def require_login(method):
@@ -24,21 +127,149 @@ def require_login(method):
     """
 
     async def wrapper(self, *args, **kwargs):
-        if not self.logged_in:
-            await self.api.login()
-            await self.api.clients.update()
-            self.logged_in = True
+        await self.login()
         return await method(self, *args, **kwargs)
 
     return wrapper
 
 
-class Client:
-    """Unifi API client."""
+class EndpointMixin:
+    """Lazily fetched, memoized endpoint collections.
+
+    A collection is only requested from the controller the first time it
+    is asked for. Later (or concurrent) calls get the same result.
+    """
+
+    client: "Client"
+    api: UnifiController
+
+    def __init__(self):
+        """Initialize the collection cache."""
+        self._collections: Dict[str, "asyncio.Future[List[Any]]"] = {}
+
+    async def fetch(self, name: str) -> List[Any]:
+        """Get the items of an endpoint collection.
+
+        Args:
+            name (str): The name of the endpoint, as listed in `ENDPOINTS`.
+
+        Raises:
+            ValueError: If the client was not created with the endpoint enabled.
+
+        Returns:
+            List[Any]: The collection's items.
+        """
+        endpoint = self.client.get_endpoint(name)
+        if not endpoint.per_site and self is not self.client:
+            return await self.client.fetch(name)
+        if name not in self._collections:
+            self._collections[name] = asyncio.ensure_future(self._fetch(endpoint))
+        return await self._collections[name]
+
+    @require_login
+    async def _fetch(self, endpoint: Endpoint) -> List[Any]:
+        raw = await self.client.request(self.api, endpoint.api_request)
+        items = raw.get("data", [])
+        if endpoint.parse is not None:
+            # Replace each raw item in place so that it can be released as soon as it is parsed.
+            for index, item in enumerate(items):
+                items[index] = endpoint.parse(item)
+        return items
+
+    async def iterate(self, name: str) -> AsyncIterator[Any]:
+        """Stream the items of an endpoint collection.
+
+        Items are parsed as they arrive, so they can be processed before the
+        whole response has been received. Streamed collections are not
+        memoized, but a collection that has already been fetched is not
+        requested again.
+
+        Args:
+            name (str): The name of the endpoint, as listed in `ENDPOINTS`.
+
+        Raises:
+            ValueError: If the client was not created with the endpoint enabled.
+
+        Yields:
+            Any: The collection's items.
+        """
+        endpoint = self.client.get_endpoint(name)
+        if name in self._collections or (not endpoint.per_site and self is not self.client):
+            for item in await self.fetch(name):
+                yield item
+            return
+        await self.login()
+        async for item in self.client.stream(self.api, endpoint.api_request):
+            yield item if endpoint.parse is None else endpoint.parse(item)
+
+    async def iter_devices(self) -> AsyncIterator[DeviceRecord]:
+        """Stream the devices of the current site."""
+        async for device in self.iterate("devices"):
+            yield device
+
+    async def get_devices(self) -> Iterable[DeviceRecord]:
+        """Get an iterable of devices for the current site."""
+        return await self.fetch("devices")
+
+    async def get_networks(self) -> Iterable[Dict[str, Any]]:
+        """Get an iterable of network configurations for the current site."""
+        return await self.fetch("networks")
+
+    @require_login
+    async def get_devices_by_mac(self, macs: Iterable[str]) -> List[DeviceRecord]:
+        """Get some of the devices of the current site, bypassing the collection cache.
+
+        Args:
+            macs (Iterable[str]): The MAC addresses of the devices.
+
+        Returns:
+            List[DeviceRecord]: The devices that were found.
+        """
+        endpoint = self.client.get_endpoint("devices")
+        api_request = ApiRequest(method="post", path=endpoint.api_request.path, data={"macs": sorted(macs)})
+        raw = await self.client.request(self.api, api_request)
+        return [endpoint.parse(item) for item in raw.get("data", [])]
+
+    async def listen(self) -> AsyncIterator[Dict[str, Any]]:
+        """Receive the messages of the current site's event websocket.
+
+        Yields:
+            Dict[str, Any]: The decoded messages, with their `meta` and `data` keys.
+        """
+        await self.login()
+        async for message in self.client.websocket(self.api):
+            yield message
+
+
+class Client(EndpointMixin):
+    """Unifi API client.
+
+    The client only fetches the endpoint collections it was created with
+    (see `ENDPOINTS`), and each of them at most once per site. Every request
+    it sends is recorded in its `metrics`.
+    """
 
     def __init__(
-        self, host: str, username: str, password, port=443, verify_cert=True, timeout=30
-    ):  # pylint:disable=too-many-arguments
+        self,
+        host: str,
+        username: str,
+        password,
+        port=443,
+        verify_cert=True,
+        timeout=30,
+        session_cache=None,
+        session_cache_timeout: Optional[int] = None,
+        endpoints: Iterable[str] = DEFAULT_ENDPOINTS,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        scheme: str = "https",
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 0,
+        keepalive_timeout: float = 15,
+        dns_cache_ttl: Optional[int] = DEFAULT_DNS_CACHE_TTL,
+        compress: bool = True,
+    ):  # pylint:disable=too-many-arguments,too-many-locals
         """Create a new Unfi API client.
 
         Args:
@@ -49,22 +280,370 @@ class Client:
             verify_cert (bool, optional): Whether or not to perform TLS verification on the
                 certificate. Defaults to True.
             timeout (int, optional): The timeout (in seconds) for requests. Defaults to 30.
+            session_cache (optional): A cache (with the Django cache `get`/`set` interface) used to
+                persist the login session between clients. When not given, every client logs in.
+            session_cache_timeout (int, optional): How long (in seconds) a persisted session is kept
+                in the cache. Defaults to the cache's own default timeout.
+            endpoints (Iterable[str], optional): The names of the endpoints (see `ENDPOINTS`) the
+                client may fetch. Defaults to sites and devices.
+            retry_policy (RetryPolicy, optional): How failed requests are retried. Defaults to
+                `RetryPolicy()`.
+            rate_limiter (TokenBucket, optional): Limits the rate of requests sent to the controller.
+                Defaults to no limit.
+            circuit_breaker (CircuitBreaker, optional): Stops sending requests once the controller
+                keeps failing. Defaults to `CircuitBreaker()`.
+            scheme (str, optional): Either `https` or `http`. Defaults to `https`.
+            connection_limit (int, optional): The maximum number of open connections. 0 means no
+                limit. Defaults to 100.
+            connection_limit_per_host (int, optional): The maximum number of open connections to the
+                controller. 0 means no limit. Defaults to 0.
+            keepalive_timeout (float, optional): How long (in seconds) an idle connection is kept open
+                to be reused. Defaults to 15.
+            dns_cache_ttl (int, optional): How long (in seconds) the controller's address is cached.
+                `None` caches it for the lifetime of the client. Defaults to 300.
+            compress (bool, optional): Whether the controller is asked for compressed (gzip) responses.
+                Defaults to True.
         """
+        super().__init__()
+        unknown = set(endpoints) - set(ENDPOINTS)
+        if unknown:
+            raise ValueError(f"Unknown Unifi endpoints: {', '.join(sorted(unknown))}")
+        self.endpoints = frozenset(endpoints)
+        # The host is connected to by name, so that the certificate is verified against
+        # it (and sent as SNI) and the connector's DNS cache is used.
+        ssl_context = ssl.create_default_context() if verify_cert and scheme == "https" else False
         self.session = aiohttp.ClientSession(
-            connector=aiohttp.TCPConnector(verify_ssl=verify_cert),
+            connector=aiohttp.TCPConnector(
+                ssl=ssl_context,
+                limit=connection_limit,
+                limit_per_host=connection_limit_per_host,
+                keepalive_timeout=keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=dns_cache_ttl,
+            ),
             cookie_jar=aiohttp.CookieJar(unsafe=True),
             timeout=aiohttp.ClientTimeout(total=timeout),
+            headers={"Accept-Encoding": "gzip, deflate" if compress else "identity"},
         )
-        self.config = UnifiConfiguration(
+        self.config = Configuration(
             self.session,
             host=host,
             username=username,
             password=password,
             port=port,
             site="default",
+            ssl_context=ssl_context,
+            scheme=scheme,
         )
         self.api = UnifiController(self.config)
+        self.client = self
         self.logged_in = False
+        self.session_cache = session_cache
+        self.session_cache_timeout = session_cache_timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter or TokenBucket(rate=0)
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.metrics = RequestMetrics()
+        self._login_lock = asyncio.Lock()
+        self._login_generation = 0
+        self._sites: Dict[str, "SiteClient"] = {}
+
+    def get_endpoint(self, name: str) -> Endpoint:
+        """Get an endpoint the client was created with.
+
+        Args:
+            name (str): The name of the endpoint.
+
+        Raises:
+            ValueError: If the endpoint is not enabled for this client.
+
+        Returns:
+            Endpoint: The endpoint definition.
+        """
+        if name not in self.endpoints:
+            raise ValueError(f"The Unifi endpoint '{name}' is not enabled for this client")
+        return ENDPOINTS[name]
+
+    @property
+    def session_cache_key(self) -> str:
+        """The key the login session for this controller and user is cached under."""
+        return f"nautobot_ssot_unifi:session:{self.config.host}:{self.config.port}:{self.config.username}"
+
+    async def login(self):
+        """Log in to the controller unless the session is already logged in.
+
+        A login session persisted by an earlier client is reused when one is
+        found in the session cache. Concurrent callers wait on the same login
+        rather than each starting their own.
+        """
+        async with self._login_lock:
+            if not self.logged_in and not self._restore_session():
+                await self._authenticate()
+
+    async def _authenticate(self):
+        await self._retry(self._login, "login")
+        # Expired sessions are handled by `request` so that every site view
+        # shares a single re-authentication.
+        self.api.connectivity.can_retry_login = False
+        self.logged_in = True
+        self._login_generation += 1
+        self._save_session()
+
+    async def _login(self):
+        # aiounifi sends the login request itself, so only its outcome is known.
+        started = time.monotonic()
+        status = None
+        try:
+            await self.api.login()
+            status = HTTPStatus.OK
+        finally:
+            self.metrics.observe("login", time.monotonic() - started, status=status)
+
+    async def _reauthenticate(self, generation: int):
+        async with self._login_lock:
+            # Somebody else has already logged in again since the failed request was sent.
+            if generation != self._login_generation:
+                return
+            await self._authenticate()
+
+    def _restore_session(self) -> bool:
+        if self.session_cache is None:
+            return False
+        state: Optional[Dict[str, Any]] = self.session_cache.get(self.session_cache_key)
+        if not state:
+            return False
+        self.session.cookie_jar.update_cookies(state["cookies"], response_url=URL(self.config.url))
+        connectivity = self.api.connectivity
+        connectivity.is_unifi_os = state["is_unifi_os"]
+        connectivity.headers.clear()
+        connectivity.headers.update(state["headers"])
+        self.logged_in = True
+        return True
+
+    def _save_session(self):
+        if self.session_cache is None:
+            return
+        state = {
+            "cookies": {cookie.key: cookie.value for cookie in self.session.cookie_jar},
+            "headers": dict(self.api.connectivity.headers),
+            "is_unifi_os": self.api.connectivity.is_unifi_os,
+        }
+        if self.session_cache_timeout is None:
+            self.session_cache.set(self.session_cache_key, state)
+        else:
+            self.session_cache.set(self.session_cache_key, state, self.session_cache_timeout)
+
+    @contextlib.asynccontextmanager
+    async def _guard(self):
+        """Rate limit a request and keep track of its outcome in the circuit breaker."""
+        self.circuit_breaker.check()
+        await self.rate_limiter.acquire()
+        try:
+            yield
+        except RETRYABLE_ERRORS:
+            self.circuit_breaker.record_failure()
+            raise
+        self.circuit_breaker.record_success()
+
+    async def _retry(self, operation: Callable[[], Any], endpoint: str) -> Any:
+        """Run `operation` (a coroutine function) with rate limiting, retries and backoff.
+
+        Retries are counted in the metrics of `endpoint`.
+        """
+        retry = 0
+        while True:
+            try:
+                async with self._guard():
+                    return await operation()
+            except RETRYABLE_ERRORS as error:
+                retry += 1
+                if retry >= self.retry_policy.attempts:
+                    raise
+                await asyncio.sleep(self.retry_policy.delay(retry, error))
+                self.metrics.retried(endpoint)
+
+    async def request(self, api: UnifiController, api_request: ApiRequest) -> TypedApiResponse:
+        """Send a request using the logged in session.
+
+        Requests that fail with a transient error (a timeout, connection
+        error, 429 or 5xx response) are retried with exponential backoff.
+        If the controller answers with 401 (for instance because a persisted
+        session has expired) the client logs in again and the request is
+        retried once.
+
+        Args:
+            api (UnifiController): The aiounifi controller (and therefore site) to send the request to.
+            api_request (ApiRequest): The request to send.
+
+        Returns:
+            TypedApiResponse: The decoded response.
+        """
+        generation = self._login_generation
+        endpoint = _endpoint_name(api_request)
+        try:
+            return await self._retry(lambda: self._send(api, api_request), endpoint)
+        except LoginRequired:
+            await self._reauthenticate(generation)
+            self.metrics.retried(endpoint)
+            return await self._retry(lambda: self._send(api, api_request), endpoint)
+
+    async def stream(self, api: UnifiController, api_request: ApiRequest) -> AsyncIterator[Dict[str, Any]]:
+        """Send a request and parse the response's items while it is downloaded.
+
+        Like `request`, transient errors are retried and the client logs in
+        again when the controller rejects the session, as long as no items
+        have been yielded yet. A failure after that is raised.
+
+        Args:
+            api (UnifiController): The aiounifi controller (and therefore site) to send the request to.
+            api_request (ApiRequest): The request to send.
+
+        Yields:
+            Dict[str, Any]: The raw items of the response's `data` array.
+        """
+        generation = self._login_generation
+        retry = 0
+        while True:
+            yielded = False
+            try:
+                async with self._guard():
+                    async for item in self._stream(api, api_request):
+                        yielded = True
+                        yield item
+                return
+            except LoginRequired:
+                if yielded or generation is None:
+                    raise
+                await self._reauthenticate(generation)
+                generation = None
+            except RETRYABLE_ERRORS as error:
+                retry += 1
+                if yielded or retry >= self.retry_policy.attempts:
+                    raise
+                await asyncio.sleep(self.retry_policy.delay(retry, error))
+            self.metrics.retried(_endpoint_name(api_request))
+
+    @contextlib.asynccontextmanager
+    async def _open(self, api: UnifiController, api_request: ApiRequest):
+        """Send a request and check the response status.
+
+        The request is recorded in the client's metrics once the caller is
+        done with the response.
+        """
+        config = api.connectivity.config
+        url = config.url + api_request.full_path(config.site, api.connectivity.is_unifi_os)
+        started = time.monotonic()
+        latency = status = None
+        size = 0
+        try:
+            async with self.session.request(
+                api_request.method,
+                url,
+                json=api_request.data,
+                ssl=config.ssl_context,
+                headers=api.connectivity.headers,
+            ) as response:
+                latency = time.monotonic() - started
+                status = response.status
+                try:
+                    _check_response(response)
+                    yield response
+                finally:
+                    size = response.content.total_bytes
+        except aiohttp.ClientError as error:
+            raise RequestError(f"Error requesting data from {url}: {error}") from None
+        except asyncio.TimeoutError:
+            raise RequestError(f"Timed out requesting data from {url}") from None
+        finally:
+            duration = time.monotonic() - started
+            self.metrics.observe(
+                _endpoint_name(api_request),
+                duration if latency is None else latency,
+                duration=duration,
+                status=status,
+                size=size,
+            )
+
+    async def _send(self, api: UnifiController, api_request: ApiRequest) -> TypedApiResponse:
+        async with self._open(api, api_request) as response:
+            body = await response.read()
+        return api_request.decode(body)
+
+    async def _stream(self, api: UnifiController, api_request: ApiRequest) -> AsyncIterator[Dict[str, Any]]:
+        parser = ResponseStream()
+        async with self._open(api, api_request) as response:
+            async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                for item in parser.feed(chunk):
+                    yield item
+        parser.close()
+
+    async def websocket(self, api: UnifiController) -> AsyncIterator[Dict[str, Any]]:
+        """Connect to a site's event websocket and decode its messages.
+
+        If the controller rejects the session when connecting, the client
+        logs in again and connects once more. The websocket is not
+        reconnected once it has been established: when it is closed or
+        fails, the caller decides whether (and when) to connect again.
+
+        Args:
+            api (UnifiController): The aiounifi controller (and therefore site) to listen to.
+
+        Raises:
+            RequestError: When the websocket cannot be connected, fails or is closed by the controller.
+
+        Yields:
+            Dict[str, Any]: The decoded messages.
+        """
+        config = api.connectivity.config
+        url = (
+            URL(config.url)
+            .with_scheme("wss" if config.scheme == "https" else "ws")
+            .with_path(("/proxy/network" if api.connectivity.is_unifi_os else "") + f"/wss/s/{config.site}/events")
+        )
+        generation = self._login_generation
+        while True:
+            try:
+                async with self._guard():
+                    connection = await self._connect_websocket(api, url)
+                break
+            except LoginRequired:
+                if generation is None:
+                    raise
+                await self._reauthenticate(generation)
+                generation = None
+
+        async with connection:
+            async for message in connection:
+                if message.type == aiohttp.WSMsgType.TEXT:
+                    try:
+                        decoded = orjson.loads(message.data)
+                    except orjson.JSONDecodeError:
+                        continue
+                    yield decoded
+                elif message.type == aiohttp.WSMsgType.ERROR:
+                    raise RequestError(f"Error receiving from {url}: {connection.exception()}")
+        raise RequestError(f"The controller closed {url}")
+
+    async def _connect_websocket(self, api: UnifiController, url: URL) -> aiohttp.ClientWebSocketResponse:
+        started = time.monotonic()
+        status = None
+        try:
+            connection = await self.session.ws_connect(
+                url, ssl=api.connectivity.config.ssl_context, headers=api.connectivity.headers, heartbeat=15
+            )
+            status = HTTPStatus.SWITCHING_PROTOCOLS
+            return connection
+        except aiohttp.WSServerHandshakeError as error:
+            status = error.status
+            if error.status == HTTPStatus.UNAUTHORIZED:
+                raise LoginRequired(f"Call {url} received 401 Unauthorized") from None
+            raise RequestError(f"Error connecting to {url}: {error}") from None
+        except aiohttp.ClientError as error:
+            raise RequestError(f"Error connecting to {url}: {error}") from None
+        except asyncio.TimeoutError:
+            raise RequestError(f"Timed out connecting to {url}") from None
+        finally:
+            self.metrics.observe("websocket", time.monotonic() - started, status=status)
 
     async def logout(self):
         """Terminate the session."""
@@ -87,14 +666,55 @@ class Client:
     def current_site(self, site: str):
         self.config.site = site
 
-    @require_login
-    async def get_sites(self) -> Iterable["Site"]:
-        """Get an iterable of devices for the current site."""
-        await self.api.sites.update()
-        return self.api.sites.values()
+    def for_site(self, site: str) -> "SiteClient":
+        """Get a client view scoped to a single site.
 
-    @require_login
-    async def get_devices(self) -> Iterable["Device"]:
-        """Get an iterable of devices for the current site."""
-        await self.api.devices.update()
-        return self.api.devices.values()
+        Site views share this client's HTTP session and login, so any number
+        of them can be used concurrently without changing `current_site`.
+
+        Args:
+            site (str): The Unifi site name (not the description).
+
+        Returns:
+            SiteClient: The client view for the site.
+        """
+        if site not in self._sites:
+            self._sites[site] = SiteClient(self, site)
+        return self._sites[site]
+
+    async def get_sites(self) -> Iterable[Site]:
+        """Get an iterable of the controller's sites."""
+        return await self.fetch("sites")
+
+
+class SiteClient(EndpointMixin):
+    """Unifi API client view scoped to a single site.
+
+    Each site view has its own lightweight aiounifi controller and its own
+    collections, kept separate from every other site. The HTTP session,
+    cookies, CSRF token and enabled endpoints all come from the parent `Client`.
+    """
+
+    def __init__(self, client: Client, site: str):
+        """Create a new site view.
+
+        Args:
+            client (Client): The parent client that owns the session.
+            site (str): The Unifi site name.
+        """
+        super().__init__()
+        self.client = client
+        self.config = dataclasses.replace(client.config, site=site)
+        self.api = UnifiController(self.config)
+
+    @property
+    def site(self) -> str:
+        """The name of the site this view is scoped to."""
+        return self.config.site
+
+    async def login(self):
+        """Make sure the parent client is logged in and share its session state."""
+        await self.client.login()
+        connectivity = self.client.api.connectivity
+        self.api.connectivity.is_unifi_os = connectivity.is_unifi_os
+        self.api.connectivity.headers = connectivity.headers
@@ -0,0 +1,185 @@
+"""Instrumentation of the requests sent to a Unifi controller."""
+
+import bisect
+import collections
+import dataclasses
+from typing import Any, Counter, Dict, List, Optional
+
+# The upper bounds (in seconds) of the latency histogram buckets. Slower requests
+# fall in a last, unbounded bucket.
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+@dataclasses.dataclass
+class Histogram:
+    """A fixed bucket histogram of durations.
+
+    Attributes:
+        counts (List[int]): The number of observations per bucket of `LATENCY_BUCKETS`, plus
+            one for the observations slower than the last bucket.
+        total (float): The sum of all observations.
+        minimum (float, optional): The smallest observation.
+        maximum (float, optional): The largest observation.
+    """
+
+    counts: List[int] = dataclasses.field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    total: float = 0.0
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+
+    @property
+    def count(self) -> int:
+        """The number of observations."""
+        return sum(self.counts)
+
+    def observe(self, seconds: float):
+        """Add an observation."""
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.minimum = seconds if self.minimum is None else min(self.minimum, seconds)
+        self.maximum = seconds if self.maximum is None else max(self.maximum, seconds)
+
+    def merge(self, other: "Histogram"):
+        """Add the observations of another histogram."""
+        self.counts = [count + other_count for count, other_count in zip(self.counts, other.counts)]
+        self.total += other.total
+        for observation in (other.minimum, other.maximum):
+            if observation is not None:
+                self.minimum = observation if self.minimum is None else min(self.minimum, observation)
+                self.maximum = observation if self.maximum is None else max(self.maximum, observation)
+
+    def quantile(self, quantile: float) -> Optional[float]:
+        """Estimate a quantile as the upper bound of the bucket it falls in.
+
+        Args:
+            quantile (float): The quantile, between 0 and 1.
+
+        Returns:
+            float, optional: The estimate (capped by the largest observation), or None without observations.
+        """
+        if not self.count:
+            return None
+        rank = quantile * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.maximum)
+        return self.maximum
+
+    def summary(self) -> Dict[str, Any]:
+        """Summarize the histogram as a JSON serializable dictionary."""
+        buckets = {str(bound): count for bound, count in zip(LATENCY_BUCKETS, self.counts)}
+        buckets["+Inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "total": round(self.total, 6),
+            "mean": round(self.total / self.count, 6) if self.count else None,
+            "min": self.minimum,
+            "max": self.maximum,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": buckets,
+        }
+
+
+@dataclasses.dataclass
+class EndpointMetrics:
+    """The metrics of the requests sent to one endpoint.
+
+    Attributes:
+        requests (int): The number of requests sent, including retries.
+        retries (int): How many of the requests were retries.
+        errors (int): The number of requests that failed without a response (timeouts and connection errors).
+        statuses (Counter[int]): The number of responses per HTTP status code.
+        bytes (int): The number of (decompressed) response body bytes received.
+        latency (Histogram): The time from sending a request to receiving the response headers. This
+            is mostly the time the controller takes to answer.
+        duration (Histogram): The time from sending a request to receiving the whole response body.
+            The difference with `latency` is mostly the time the body takes to download.
+    """
+
+    requests: int = 0
+    retries: int = 0
+    errors: int = 0
+    statuses: Counter[int] = dataclasses.field(default_factory=collections.Counter)
+    bytes: int = 0
+    latency: Histogram = dataclasses.field(default_factory=Histogram)
+    duration: Histogram = dataclasses.field(default_factory=Histogram)
+
+    def merge(self, other: "EndpointMetrics"):
+        """Add the metrics of another run."""
+        self.requests += other.requests
+        self.retries += other.retries
+        self.errors += other.errors
+        self.statuses.update(other.statuses)
+        self.bytes += other.bytes
+        self.latency.merge(other.latency)
+        self.duration.merge(other.duration)
+
+    def summary(self) -> Dict[str, Any]:
+        """Summarize the metrics as a JSON serializable dictionary."""
+        download_time = self.duration.total - self.latency.total
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "bytes": self.bytes,
+            "bytes_per_second": round(self.bytes / download_time) if download_time > 0 else None,
+            "latency": self.latency.summary(),
+            "duration": self.duration.summary(),
+        }
+
+
+class RequestMetrics:
+    """Per endpoint metrics of the requests a client sends.
+
+    Endpoints are named after the request method and path, without the
+    site, (`GET /stat/device`) so that the requests of all the sites of
+    a controller add up.
+    """
+
+    def __init__(self):
+        """Create empty metrics."""
+        self.endpoints: Dict[str, EndpointMetrics] = collections.defaultdict(EndpointMetrics)
+
+    def observe(
+        self,
+        endpoint: str,
+        latency: float,
+        duration: Optional[float] = None,
+        status: Optional[int] = None,
+        size: int = 0,
+    ):
+        """Record a request.
+
+        Args:
+            endpoint (str): The name of the endpoint.
+            latency (float): The seconds until the response headers were received, or until the request failed.
+            duration (float, optional): The seconds until the whole response was received. Defaults to `latency`.
+            status (int, optional): The HTTP status of the response. None when there was no response.
+            size (int, optional): The number of response body bytes received.
+        """
+        metrics = self.endpoints[endpoint]
+        metrics.requests += 1
+        if status is None:
+            metrics.errors += 1
+        else:
+            metrics.statuses[status] += 1
+        metrics.bytes += size
+        metrics.latency.observe(latency)
+        metrics.duration.observe(latency if duration is None else duration)
+
+    def retried(self, endpoint: str):
+        """Record that the next request to an endpoint is a retry."""
+        self.endpoints[endpoint].retries += 1
+
+    def merge(self, other: "RequestMetrics"):
+        """Add the metrics of another client."""
+        for endpoint, metrics in other.endpoints.items():
+            self.endpoints[endpoint].merge(metrics)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Summarize the metrics as a JSON serializable dictionary, keyed by endpoint."""
+        return {endpoint: metrics.summary() for endpoint, metrics in sorted(self.endpoints.items())}
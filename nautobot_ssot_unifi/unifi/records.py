@@ -0,0 +1,173 @@
+"""Compact records of the Unifi data used by the SSoT adapters.
+
+The controller's `stat/device` response carries a lot of telemetry (radio
+tables, statistics, port counters and so on) that the sync never reads.
+Raw items are projected onto these records as soon as they are received so
+that only the synchronized fields are kept in memory. The values that repeat
+across devices (port names, media, models, netmasks) are interned, so that
+every record, and every DiffSync model built from it, shares a single copy.
+"""
+
+import hashlib
+import json
+import sys
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+
+class PortRecord(NamedTuple):
+    """A single entry of a device's port table.
+
+    Only the name, media, index and address are synchronized. The state of
+    the port (`enable`, `up` and `is_uplink`) decides whether it is
+    synchronized at all (see `PORT_POLICIES`).
+    """
+
+    name: str
+    media: str
+    port_idx: int
+    ip: Optional[str] = None
+    netmask: Optional[str] = None
+    enable: bool = True
+    up: bool = False
+    is_uplink: bool = False
+
+    @classmethod
+    def from_raw(cls, raw: Dict[str, Any]) -> "PortRecord":
+        """Project a raw port table entry onto a port record."""
+        netmask = raw.get("netmask")
+        return cls(
+            name=sys.intern(raw["name"]),
+            media=sys.intern(raw.get("media", "other")),
+            port_idx=raw["port_idx"],
+            ip=raw.get("ip"),
+            netmask=sys.intern(netmask) if netmask else netmask,
+            enable=raw.get("enable", True),
+            up=raw.get("up", False),
+            is_uplink=raw.get("is_uplink", False),
+        )
+
+
+# Which ports of a device are synchronized.
+PORT_POLICIES: Dict[str, Callable[[PortRecord], bool]] = {
+    # Every port.
+    "all": lambda port: True,
+    # The ports that are enabled.
+    "enabled": lambda port: port.enable,
+    # The ports with a link.
+    "up": lambda port: port.up,
+    # The ports with an IP address, and the uplinks.
+    "addressed": lambda port: bool(port.ip) or port.is_uplink,
+}
+
+
+class NetworkConfigRecord(NamedTuple):
+    """A device's management network configuration."""
+
+    type: str
+    ip: Optional[str] = None
+    netmask: Optional[str] = None
+
+    @classmethod
+    def from_raw(cls, raw: Optional[Dict[str, Any]]) -> Optional["NetworkConfigRecord"]:
+        """Project a raw `config_network` entry onto a network config record."""
+        if not raw:
+            return None
+        netmask = raw.get("netmask")
+        return cls(
+            type=sys.intern(raw.get("type", "")),
+            ip=raw.get("ip"),
+            netmask=sys.intern(netmask) if netmask else netmask,
+        )
+
+
+class DeviceRecord:
+    """The synchronized fields of a Unifi device."""
+
+    __slots__ = ("name", "model", "serial", "ports", "config_network")
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        serial: str,
+        ports: Tuple[PortRecord, ...] = (),
+        config_network: Optional[NetworkConfigRecord] = None,
+    ):  # pylint:disable=too-many-arguments
+        """Create a new device record.
+
+        Args:
+            name (str): The device name.
+            model (str): The Unifi model code, such as `US8P60`.
+            serial (str): The device serial number.
+            ports (Tuple[PortRecord, ...]): The device's port table.
+            config_network (NetworkConfigRecord, optional): The management network configuration.
+        """
+        self.name = name
+        self.model = model
+        self.serial = serial
+        self.ports = ports
+        self.config_network = config_network
+
+    @classmethod
+    def from_raw(cls, raw: Dict[str, Any]) -> "DeviceRecord":
+        """Project a raw `stat/device` item onto a device record."""
+        return cls(
+            name=raw.get("name", ""),
+            model=sys.intern(raw["model"]),
+            serial=raw.get("serial", ""),
+            ports=tuple(PortRecord.from_raw(port) for port in raw.get("port_table", [])),
+            config_network=NetworkConfigRecord.from_raw(raw.get("config_network")),
+        )
+
+    def select_ports(self, port_policy: str = "all") -> Tuple[PortRecord, ...]:
+        """Get the ports a port policy synchronizes.
+
+        Args:
+            port_policy (str, optional): The name of the policy, from `PORT_POLICIES`. Defaults to all ports.
+
+        Returns:
+            Tuple[PortRecord, ...]: The ports to synchronize.
+        """
+        if port_policy == "all":
+            return self.ports
+        policy = PORT_POLICIES[port_policy]
+        return tuple(port for port in self.ports if policy(port))
+
+    def fingerprint(self, *context: Any, port_policy: str = "all") -> str:
+        """Get a stable hash of the record's synchronized fields.
+
+        The hash covers the device attributes, the ports the port policy
+        synchronizes and the management network configuration. Two records
+        with the same fingerprint produce the same Nautobot objects.
+
+        Args:
+            *context (Any): Additional JSON serializable values that affect how the record is
+                synchronized (such as the location name) and that are included in the hash.
+            port_policy (str, optional): The name of the port policy, from `PORT_POLICIES`.
+                Defaults to all ports.
+
+        Returns:
+            str: The hex digest of the hash.
+        """
+        if port_policy != "all":
+            context += (port_policy,)
+        normalized = [
+            self.name,
+            self.model,
+            self.serial,
+            sorted(
+                (
+                    (port.name, port.media, port.port_idx, port.ip, port.netmask)
+                    for port in self.select_ports(port_policy)
+                ),
+                key=lambda port: port[2],
+            ),
+            self.config_network,
+            context,
+        ]
+        encoded = json.dumps(normalized, separators=(",", ":")).encode()
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+    def __repr__(self):
+        """Represent the record by its name and model."""
+        return f"{self.__class__.__name__}(name={self.name!r}, model={self.model!r})"
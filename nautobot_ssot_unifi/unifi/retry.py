@@ -0,0 +1,149 @@
+"""Retry, rate limiting and circuit breaking for Unifi controller requests."""
+
+import asyncio
+import dataclasses
+import random
+import time
+from typing import Optional
+
+from aiounifi.errors import AiounifiException, RequestError
+
+
+class TooManyRequests(RequestError):
+    """The controller is rate limiting requests (HTTP 429)."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        """Create a new error.
+
+        Args:
+            message (str): The error message.
+            retry_after (float, optional): How long (in seconds) the controller asked to wait.
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(AiounifiException):
+    """Requests are not sent because the controller has been failing."""
+
+
+# Errors that are likely to go away when the request is sent again. Timeouts,
+# connection errors, 429 and 5xx responses are all reported as a `RequestError`.
+RETRYABLE_ERRORS = (RequestError,)
+
+
+@dataclasses.dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    Attributes:
+        attempts (int): The total number of times a request is sent before giving up.
+        backoff (float): The base delay (in seconds) before the first retry.
+        backoff_max (float): The maximum delay (in seconds) between two attempts.
+    """
+
+    attempts: int = 4
+    backoff: float = 0.5
+    backoff_max: float = 30.0
+
+    def delay(self, retry: int, error: Optional[Exception] = None) -> float:
+        """Get how long to wait before a retry.
+
+        Args:
+            retry (int): The number of the retry, starting at 1.
+            error (Exception, optional): The error that caused the retry. When the controller
+                asked for a specific delay (`Retry-After`), that delay is used instead.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** (retry - 1)))  # nosec
+
+
+class TokenBucket:
+    """Limit the rate of requests sent to a controller.
+
+    Up to `burst` requests can be sent at once, after which requests are
+    sent at `rate` requests per second.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """Create a new token bucket.
+
+        Args:
+            rate (float): The sustained number of requests per second. A rate of 0 disables the limit.
+            burst (int, optional): The maximum number of requests sent at once. Defaults to `rate`.
+        """
+        self.rate = rate
+        self.burst = max(1, burst if burst is not None else int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a request may be sent."""
+        if not self.rate:
+            return
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """Stop sending requests to a controller that keeps failing.
+
+    After `threshold` consecutive failures the circuit opens and every
+    request fails immediately with `CircuitOpenError`. Once `reset_timeout`
+    has passed, requests are let through again: the first success closes
+    the circuit and another failure opens it again.
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0):
+        """Create a new circuit breaker.
+
+        Args:
+            threshold (int, optional): The number of consecutive failures that open the circuit.
+                A threshold of 0 disables the circuit breaker.
+            reset_timeout (float, optional): How long (in seconds) the circuit stays open.
+        """
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        """Whether requests are currently refused."""
+        return self._opened is not None and time.monotonic() - self._opened < self.reset_timeout
+
+    def check(self):
+        """Make sure a request may be sent.
+
+        Raises:
+            CircuitOpenError: When the circuit is open.
+        """
+        if self.is_open:
+            raise CircuitOpenError(
+                f"Not sending requests for {self.reset_timeout}s after {self.failures} consecutive failures"
+            )
+
+    def record_success(self):
+        """Record a successful request."""
+        self.failures = 0
+        self._opened = None
+
+    def record_failure(self):
+        """Record a failed request."""
+        self.failures += 1
+        if self.threshold and self.failures >= self.threshold:
+            self._opened = time.monotonic()
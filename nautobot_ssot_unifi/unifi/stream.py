@@ -0,0 +1,149 @@
+"""Incremental parsing of Unifi API responses.
+
+Unifi list responses have the form `{"meta": {...}, "data": [{...}, ...]}`.
+`ResponseStream` is fed the response body chunk by chunk and hands back
+every item of the `data` array as soon as the item is complete. That way
+an item can be processed (and released) before the rest of the response
+has been downloaded, and the whole response is never held in memory.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from aiounifi.errors import AiounifiException
+from aiounifi.models.api import ERRORS
+
+# Outside of the items only the top-level keys matter. This matches either a
+# complete string, a string that is cut off by the end of the buffer, or a
+# single structural character. Everything else (numbers, literals,
+# whitespace and commas) is skipped over.
+_TOKENS = re.compile(
+    rb'(?P<string>"(?:[^"\\]|\\.)*")|(?P<partial>"(?:[^"\\]|\\.)*\\?\Z)|(?P<structural>[{}\[\]:])',
+    re.DOTALL,
+)
+
+# Inside of the items only the nesting matters. This skips over everything
+# that is not a bracket, including complete strings, in a single match. It
+# stops in front of the next bracket or in front of a string that is cut
+# off by the end of the buffer.
+_SKIP = re.compile(rb'(?:[^"{}\[\]]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.DOTALL)
+
+
+class ResponseStream:
+    """Incremental parser for the items of a Unifi list response.
+
+    Only the `data` array items and the `meta` object are decoded. Items
+    that are not JSON objects are ignored.
+    """
+
+    def __init__(self, key: bytes = b"data"):
+        """Create a new response stream.
+
+        Args:
+            key (bytes, optional): The top-level key holding the array of items. Defaults to `data`.
+        """
+        self.key = key
+        self.meta: Optional[Dict[str, Any]] = None
+        self._buffer = b""
+        self._position = 0
+        self._depth = 0
+        self._last_string: Optional[bytes] = None
+        self._current_key: Optional[bytes] = None
+        self._in_items = False
+        self._capture_start: Optional[int] = None
+        self._capturing_meta = False
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        """Add the next chunk of the response body.
+
+        Args:
+            chunk (bytes): The next piece of the response body.
+
+        Raises:
+            AiounifiException: When the response `meta` reports an error.
+
+        Returns:
+            List[Dict[str, Any]]: The items completed by this chunk, in order.
+        """
+        self._buffer += chunk
+        buffer = self._buffer
+        position = self._position
+        items = []
+        while position < len(buffer):
+            if self._depth >= 2:
+                position = _SKIP.match(buffer, position).end()
+                if position == len(buffer) or buffer[position] == ord('"'):
+                    # Either done, or waiting for the rest of a string to arrive.
+                    break
+                token, start, position = buffer[position : position + 1], position, position + 1
+            else:
+                match = _TOKENS.search(buffer, position)
+                if match is None:
+                    position = len(buffer)
+                    break
+                if match.lastgroup == "partial":
+                    position = match.start()
+                    break
+                token, start, position = match.group(), match.start(), match.end()
+                if match.lastgroup == "string":
+                    if self._depth == 1:
+                        self._last_string = token[1:-1]
+                    continue
+            item = self._structural(token, start, position)
+            if item is not None:
+                items.append(item)
+        self._position = position
+        self._compact()
+        return items
+
+    def close(self):
+        """Signal that the whole response has been fed.
+
+        Raises:
+            ValueError: When the response was cut off.
+        """
+        if self._depth != 0 or self._buffer.strip():
+            raise ValueError("The Unifi response ended before the JSON document was complete")
+
+    def _structural(self, token: bytes, start: int, end: int) -> Optional[Dict[str, Any]]:
+        if token == b":":
+            if self._depth == 1:
+                self._current_key = self._last_string
+            return None
+        if token in (b"{", b"["):
+            self._depth += 1
+            if self._depth == 2:
+                if token == b"[":
+                    self._in_items = self._current_key == self.key
+                elif self._current_key == b"meta":
+                    self._capturing_meta = True
+                    self._capture_start = start
+            elif self._depth == 3 and self._in_items and token == b"{":
+                self._capture_start = start
+            return None
+
+        self._depth -= 1
+        if self._depth == 2 and self._in_items and self._capture_start is not None:
+            item = orjson.loads(self._buffer[self._capture_start : end])
+            self._capture_start = None
+            return item
+        if self._depth == 1:
+            self._in_items = False
+            if self._capturing_meta:
+                self._capturing_meta = False
+                self.meta = orjson.loads(self._buffer[self._capture_start : end])
+                self._capture_start = None
+                if self.meta.get("rc") == "error":
+                    raise ERRORS.get(self.meta.get("msg"), AiounifiException)({"meta": self.meta})
+        return None
+
+    def _compact(self):
+        """Drop the part of the buffer that has been parsed and is not needed any more."""
+        keep = self._position if self._capture_start is None else self._capture_start
+        if keep:
+            self._buffer = self._buffer[keep:]
+            self._position -= keep
+            if self._capture_start is not None:
+                self._capture_start -= keep
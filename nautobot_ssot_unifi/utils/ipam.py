@@ -0,0 +1,123 @@
+"""IP address arithmetic for the addresses reported by Unifi devices."""
+
+import dataclasses
+import socket
+import sys
+from typing import Dict, Iterable, Optional, Tuple
+
+from netaddr import IPNetwork
+
+_ALL_ONES = 0xFFFFFFFF
+
+
+@dataclasses.dataclass(frozen=True)
+class Address:
+    """An IP address with the network it belongs to.
+
+    Attributes:
+        host (str): The address.
+        network (str): The network address of its prefix.
+        prefix_length (int): The length of its prefix.
+        version (int): The IP version, 4 or 6.
+    """
+
+    host: str
+    network: str
+    prefix_length: int
+    version: int
+
+
+def _parse_ipv4_netmask(netmask: str) -> Optional[Tuple[int, int]]:
+    """Parse an IPv4 netmask, dotted (`255.255.255.0`) or as a prefix length (`24`).
+
+    Returns:
+        Tuple[int, int], optional: The mask and the prefix length, or None if it is not a valid IPv4 netmask.
+    """
+    if netmask.isdigit():
+        prefix_length = int(netmask)
+        if prefix_length > 32:
+            return None
+        return (_ALL_ONES << (32 - prefix_length)) & _ALL_ONES, prefix_length
+    try:
+        mask = int.from_bytes(socket.inet_pton(socket.AF_INET, netmask), "big")
+    except OSError:
+        return None
+    # A netmask is some ones followed by zeros, so its inverse plus one is a power of two.
+    hosts = (~mask & _ALL_ONES) + 1
+    if hosts & (hosts - 1):
+        return None
+    return mask, 32 - hosts.bit_length() + 1
+
+
+class AddressCache:
+    """Compute, and remember, the networks of the `ip`/`netmask` pairs of a sync.
+
+    Most devices of a site share a handful of networks and netmasks, so
+    netmasks are parsed once, IPv4 networks are computed by masking the
+    address as an integer, and each network string is shared by all of
+    its addresses. Anything that is not plain IPv4 is left to `netaddr`.
+    """
+
+    def __init__(self):
+        """Create an empty cache."""
+        self._addresses: Dict[Tuple[str, str], Address] = {}
+        self._netmasks: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._networks: Dict[Tuple[int, int], str] = {}
+
+    def __len__(self) -> int:
+        """The number of pairs computed."""
+        return len(self._addresses)
+
+    def get(self, ip: str, netmask: str) -> Address:
+        """Get the address of an `ip`/`netmask` pair.
+
+        Raises:
+            netaddr.AddrFormatError: When the pair is not a valid address.
+        """
+        try:
+            return self._addresses[(ip, netmask)]
+        except KeyError:
+            address = self._addresses[(ip, netmask)] = self._compute(ip, netmask)
+            return address
+
+    def resolve(self, pairs: Iterable[Tuple[str, str]]):
+        """Compute the addresses of many `ip`/`netmask` pairs, such as all those of a batch of devices, at once.
+
+        Raises:
+            netaddr.AddrFormatError: When a pair is not a valid address.
+        """
+        addresses = self._addresses
+        for pair in pairs:
+            if pair not in addresses:
+                addresses[pair] = self._compute(*pair)
+
+    def _compute(self, ip: str, netmask: str) -> Address:
+        try:
+            parsed_netmask = self._netmasks[netmask]
+        except KeyError:
+            parsed_netmask = self._netmasks[netmask] = _parse_ipv4_netmask(netmask)
+        if parsed_netmask is not None:
+            try:
+                host = int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+            except OSError:
+                pass
+            else:
+                mask, prefix_length = parsed_netmask
+                return Address(ip, self._network(host & mask, prefix_length), prefix_length, 4)
+
+        ip_network = IPNetwork(f"{ip}/{netmask}")
+        return Address(
+            str(ip_network.ip),
+            sys.intern(str(ip_network.network)),
+            ip_network.prefixlen,
+            ip_network.version,
+        )
+
+    def _network(self, network: int, prefix_length: int) -> str:
+        try:
+            return self._networks[(network, prefix_length)]
+        except KeyError:
+            string = self._networks[(network, prefix_length)] = sys.intern(
+                socket.inet_ntop(socket.AF_INET, network.to_bytes(4, "big"))
+            )
+            return string
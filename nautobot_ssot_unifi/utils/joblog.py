@@ -0,0 +1,125 @@
+"""Buffered job logging, for the many log records of a sync."""
+
+import collections
+import logging
+from typing import Counter, List, Optional, Tuple
+
+from django.utils import timezone
+
+from nautobot.core.utils.logging import sanitize
+from nautobot.extras.constants import JOB_LOG_MAX_GROUPING_LENGTH, JOB_LOG_MAX_LOG_OBJECT_LENGTH
+from nautobot.extras.models import JobLogEntry
+from nautobot.extras.models import jobs as job_models
+
+
+def _plural(name: str) -> str:
+    name = name.replace("_", " ")
+    return f"{name}es" if name.endswith("s") else f"{name}s"
+
+
+class JobLogBuffer:
+    """Collect the log records of a job and write them to the database in bulk.
+
+    Nautobot writes a `JobLogEntry` row, after looking up the job result,
+    for every record a job logs. This buffer formats the records as they
+    are logged (they still reach the job's logger, and so the worker's
+    console) and writes their rows with a single `bulk_create` when it is
+    flushed.
+
+    In summary mode, objects are counted with `added` rather than logged
+    one by one, and `close` logs a single record per kind of object and
+    scope, such as "Added 4,812 interfaces on site X".
+    """
+
+    def __init__(self, job, summarize: bool = True, flush_size: int = 500, grouping: str = "load"):
+        """Create a new buffer.
+
+        Args:
+            job: The job (or anything with a `logger`) that is logging. Without a `job_result`, records are
+                only sent to the logger.
+            summarize (bool, optional): Whether objects are counted rather than logged one by one. Defaults to True.
+            flush_size (int, optional): How many records are buffered before `full` is set. Defaults to 500.
+            grouping (str, optional): The grouping the records are stored under. Defaults to `load`.
+        """
+        self.logger: logging.Logger = job.logger
+        self.job_result = getattr(job, "job_result", None)
+        self.summarize = summarize
+        self.flush_size = flush_size
+        self.grouping = grouping[:JOB_LOG_MAX_GROUPING_LENGTH]
+        self._entries: List[JobLogEntry] = []
+        self._counts: Counter[Tuple[str, str]] = collections.Counter()
+
+    @property
+    def full(self) -> bool:
+        """Whether enough records are buffered to be worth flushing."""
+        return len(self._entries) >= self.flush_size
+
+    def log(self, level: int, message: str, *args, obj=None):
+        """Log a record, without writing it to the database yet.
+
+        Args:
+            level (int): The logging level.
+            message (str): The message, with `%` placeholders for `args`.
+            *args: The arguments of the message.
+            obj (optional): The object the record is about.
+        """
+        if not self.logger.isEnabledFor(level):
+            return
+        if self.job_result is None:
+            self.logger.log(level, message, *args)
+            return
+        self.logger.log(level, message, *args, extra={"skip_db_logging": True})
+        self._entries.append(
+            JobLogEntry(
+                job_result=self.job_result,
+                log_level=logging.getLevelName(level).lower(),
+                grouping=self.grouping,
+                message=sanitize(message % args if args else message),
+                created=timezone.now(),
+                log_object=str(obj)[:JOB_LOG_MAX_LOG_OBJECT_LENGTH] if obj else "",
+            )
+        )
+
+    def debug(self, message: str, *args, obj=None):
+        """Log a debug record."""
+        self.log(logging.DEBUG, message, *args, obj=obj)
+
+    def info(self, message: str, *args, obj=None):
+        """Log an info record."""
+        self.log(logging.INFO, message, *args, obj=obj)
+
+    def warning(self, message: str, *args, obj=None):
+        """Log a warning record."""
+        self.log(logging.WARNING, message, *args, obj=obj)
+
+    def error(self, message: str, *args, obj=None):
+        """Log an error record."""
+        self.log(logging.ERROR, message, *args, obj=obj)
+
+    def added(self, obj, scope: Optional[str] = None):
+        """Log that a DiffSync object was added, or count it in summary mode.
+
+        Args:
+            obj (DiffSyncModel): The object that was added.
+            scope (str, optional): Where the object belongs, such as "on site X", in the summary.
+        """
+        if self.summarize:
+            self._counts[(obj.get_type(), scope or "")] += 1
+        else:
+            self.debug("Added %s %s%s", obj.get_type(), obj, f" {scope}" if scope else "")
+
+    def flush(self):
+        """Write the buffered records to the database."""
+        entries, self._entries = self._entries, []
+        if not entries:
+            return
+        # Like `JobResult.log`, the rows are written outside of the job's transaction when possible.
+        using = job_models.JOB_LOGS if self.job_result.use_job_logs_db and job_models.JOB_LOGS else "default"
+        JobLogEntry.objects.using(using).bulk_create(entries, batch_size=self.flush_size)
+
+    def close(self):
+        """Log the summary of the counted objects and write every buffered record."""
+        for (kind, scope), count in sorted(self._counts.items()):
+            self.info("Added %s %s%s", f"{count:,}", _plural(kind), f" {scope}" if scope else "")
+        self._counts.clear()
+        self.flush()
@@ -1 +1,112 @@
 """Utility functions for working with Nautobot."""
+
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.cache import cache
+
+from nautobot.dcim.models import Controller, Device, Location, LocationType
+from nautobot.extras.choices import SecretsGroupAccessTypeChoices, SecretsGroupSecretTypeChoices
+from nautobot.extras.models import ExternalIntegration, SecretsGroup
+
+from nautobot_ssot_unifi.const import UNIFI_SSOT_TAG
+from nautobot_ssot_unifi.ssot.adapters import ControllerSource
+from nautobot_ssot_unifi.ssot.models import DeviceModel
+from nautobot_ssot_unifi.unifi import CircuitBreaker, RetryPolicy, TokenBucket
+
+PLUGIN_SETTINGS = settings.PLUGINS_CONFIG["nautobot_ssot_unifi"]
+
+
+def get_device_fingerprints(controller_names: Iterable[str]) -> Dict[str, str]:
+    """Get the fingerprints stored on the synchronized devices of some controllers.
+
+    Args:
+        controller_names (Iterable[str]): The names of the controllers.
+
+    Returns:
+        Dict[str, str]: The fingerprints, keyed by the unique ID of the device's DiffSync model.
+    """
+    devices = Device.objects.filter(
+        tags__name=UNIFI_SSOT_TAG,
+        controller_managed_device_group__controller__name__in=controller_names,
+        _custom_field_data__unifi_fingerprint__isnull=False,
+    ).values_list(
+        "name",
+        "controller_managed_device_group__name",
+        "controller_managed_device_group__controller__name",
+        "_custom_field_data__unifi_fingerprint",
+    )
+    return {
+        DeviceModel.create_unique_id(
+            name=name,
+            controller_managed_device_group__name=group_name,
+            controller_managed_device_group__controller__name=controller_name,
+        ): fingerprint
+        for name, group_name, controller_name, fingerprint in devices
+    }
+
+
+def get_controller_source(
+    controller: Controller,
+    default_location: Optional[Location] = None,
+    default_location_type: Optional[LocationType] = None,
+) -> ControllerSource:
+    """Get the location defaults and client options for loading a controller.
+
+    Args:
+        controller (Controller): The Nautobot controller, with its external integration.
+        default_location (Location, optional): The location of the Unifi site called `default`.
+            Defaults to the controller's location.
+        default_location_type (LocationType, optional): The location type of new locations.
+            Defaults to the type of the default location.
+
+    Returns:
+        ControllerSource: What the source adapter needs to load the controller.
+    """
+    external_integration: ExternalIntegration = controller.external_integration
+    url = urlparse(external_integration.remote_url)
+    secrets_group: SecretsGroup = external_integration.secrets_group
+    username = secrets_group.get_secret_value(
+        access_type=SecretsGroupAccessTypeChoices.TYPE_HTTP, secret_type=SecretsGroupSecretTypeChoices.TYPE_USERNAME
+    )
+    password = secrets_group.get_secret_value(
+        access_type=SecretsGroupAccessTypeChoices.TYPE_HTTP, secret_type=SecretsGroupSecretTypeChoices.TYPE_PASSWORD
+    )
+
+    default_location = default_location or controller.location
+    default_location_type = default_location_type or default_location.location_type
+    return ControllerSource(
+        name=controller.name,
+        default_location_type=default_location_type.name,
+        default_location_name=default_location.name,
+        client_options={
+            "host": url.hostname,
+            "port": url.port or (443 if url.scheme == "https" else 80),
+            "scheme": url.scheme,
+            "username": username,
+            "password": password,
+            "verify_cert": external_integration.verify_ssl,
+            "timeout": external_integration.timeout,
+            "session_cache": cache,
+            "session_cache_timeout": PLUGIN_SETTINGS["session_cache_timeout"],
+            "retry_policy": RetryPolicy(
+                attempts=PLUGIN_SETTINGS["retry_attempts"],
+                backoff=PLUGIN_SETTINGS["retry_backoff"],
+                backoff_max=PLUGIN_SETTINGS["retry_backoff_max"],
+            ),
+            "rate_limiter": TokenBucket(
+                rate=PLUGIN_SETTINGS["requests_per_second"],
+                burst=PLUGIN_SETTINGS["request_burst"],
+            ),
+            "circuit_breaker": CircuitBreaker(
+                threshold=PLUGIN_SETTINGS["circuit_breaker_threshold"],
+                reset_timeout=PLUGIN_SETTINGS["circuit_breaker_timeout"],
+            ),
+            "connection_limit": PLUGIN_SETTINGS["connection_limit"],
+            "connection_limit_per_host": PLUGIN_SETTINGS["connection_limit_per_host"],
+            "keepalive_timeout": PLUGIN_SETTINGS["keepalive_timeout"],
+            "dns_cache_ttl": PLUGIN_SETTINGS["dns_cache_ttl"],
+            "compress": PLUGIN_SETTINGS["compress_responses"],
+        },
+    )
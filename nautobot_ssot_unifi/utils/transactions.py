@@ -0,0 +1,86 @@
+"""Chunked transactions, for the many writes of a sync."""
+
+import sys
+from typing import Callable, Optional
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+class ChunkedTransaction:
+    """Commit the writes of a sync in transactions of a limited number of objects.
+
+    `step` is called before objects are written. The current transaction is
+    committed, and a new one started, when it already holds `size` objects or
+    when the kind of objects written (such as the model type) changes. The
+    writes are committed a chunk at a time rather than one by one, and a
+    failure only rolls back the chunk it happened in.
+
+    Used as a context manager: the last chunk is committed when the block
+    exits, or rolled back when it raises.
+    """
+
+    def __init__(self, size: int, using: str = DEFAULT_DB_ALIAS, before_commit: Optional[Callable[[], None]] = None):
+        """Create a new chunked transaction.
+
+        Args:
+            size (int): The number of objects after which a chunk is committed. A single step of more
+                objects (such as a bulk create batch) is never split.
+            using (str, optional): The database alias. Defaults to the default database.
+            before_commit (Callable[[], None], optional): Called in each chunk right before it is committed,
+                to write what was deferred about its objects (such as their tags). It must not call `step`.
+        """
+        self.size = size
+        self.using = using
+        self.before_commit = before_commit
+        self.chunks = 0
+        self._atomic: Optional[transaction.Atomic] = None
+        self._key: Optional[str] = None
+        self._count = 0
+
+    def __enter__(self) -> "ChunkedTransaction":
+        """Start chunking; the first chunk is opened by the first step."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Commit the last chunk, or roll it back if the block (or `before_commit`) raised."""
+        if exc_type is None:
+            try:
+                self.commit()
+            except BaseException:
+                self._rollback(*sys.exc_info())
+                raise
+        else:
+            self._rollback(exc_type, exc_value, traceback)
+        return False
+
+    def step(self, key: str, count: int = 1):
+        """Count objects about to be written, starting a new chunk when needed.
+
+        Args:
+            key (str): The kind of objects, a chunk only holds objects of one kind.
+            count (int, optional): The number of objects. Defaults to 1.
+        """
+        if self._atomic is not None and (key != self._key or self._count + count > self.size):
+            self.commit()
+        if self._atomic is None:
+            self._atomic = transaction.atomic(using=self.using)
+            self._atomic.__enter__()  # pylint: disable=unnecessary-dunder-call
+            self._key = key
+            self._count = 0
+            self.chunks += 1
+        self._count += count
+
+    def commit(self):
+        """Commit the current chunk, if any."""
+        if self._atomic is None:
+            return
+        if self.before_commit is not None:
+            self.before_commit()
+        atomic, self._atomic = self._atomic, None
+        atomic.__exit__(None, None, None)
+
+    def _rollback(self, exc_type, exc_value, traceback):
+        """Roll back the current chunk, if any."""
+        atomic, self._atomic = self._atomic, None
+        if atomic is not None:
+            atomic.__exit__(exc_type, exc_value, traceback)
@@ -1 +1,146 @@
 """Utility functions for working with Unifi."""
+
+import csv
+import dataclasses
+import os
+import threading
+from os import path
+from typing import Dict, Iterable, Optional, Tuple
+
+from nautobot_ssot_unifi.const import UNIFI_DEFAULT_TYPE, UNIFI_MAP
+
+HARDWARE_MODELS_PATH = path.join(path.dirname(path.dirname(__file__)), "hardware_models.csv")
+
+
+@dataclasses.dataclass(frozen=True)
+class HardwareModel:
+    """A Unifi hardware model, resolved to what its devices are synced as.
+
+    Attributes:
+        model (str): The model code the controller reports, such as `US8P60`.
+        sku (str): The SKU, used as the device type's part number.
+        name (str): The marketing name.
+        type (str): The `UNIFI_MAP` type of the model's devices.
+        platform (str): The name of the Nautobot platform of the model's devices.
+        role (str): The name of the Nautobot role of the model's devices.
+        known (bool): Whether the model is in the hardware catalog.
+    """
+
+    model: str
+    sku: str
+    name: str
+    type: str
+    platform: str
+    role: str
+    known: bool = True
+
+    @classmethod
+    def from_record(cls, record: Dict[str, str]) -> "HardwareModel":
+        """Resolve a `hardware_models.csv` record (model, type, sku and name)."""
+        return cls(
+            model=record["model"],
+            sku=record["sku"],
+            name=record["name"],
+            known=True,
+            **cls._classify(resolve_type(record["type"], record["name"])),
+        )
+
+    @classmethod
+    def default(cls, model: str) -> "HardwareModel":
+        """Get the hardware model of a model code that is not in the catalog."""
+        return cls(model=model, sku=model, name=model, known=False, **cls._classify(UNIFI_DEFAULT_TYPE))
+
+    @staticmethod
+    def _classify(unifi_type: str) -> Dict[str, str]:
+        if unifi_type not in UNIFI_MAP:
+            unifi_type = UNIFI_DEFAULT_TYPE
+        return {
+            "type": unifi_type,
+            "platform": UNIFI_MAP[unifi_type]["platform"],
+            "role": UNIFI_MAP[unifi_type]["role"],
+        }
+
+
+def resolve_type(unifi_type: str, name: str) -> str:
+    """Tell the Lite and Flex switches, which have their own platforms, from the other switches.
+
+    Args:
+        unifi_type (str): The type from the hardware catalog, such as `usw` or `uap`.
+        name (str): The marketing name of the model.
+
+    Returns:
+        str: The type, as used in `UNIFI_MAP`.
+    """
+    if unifi_type == "usw":
+        lower_name = name.lower()
+        if "lite" in lower_name:
+            return "usw_lite"
+        if "flex" in lower_name:
+            return "usw_flex"
+    return unifi_type
+
+
+class HardwareCatalog:
+    """The known Unifi hardware models, keyed by model code."""
+
+    def __init__(self, records: Iterable[Dict[str, str]]):
+        """Compile the catalog.
+
+        Args:
+            records (Iterable[Dict[str, str]]): The `hardware_models.csv` records.
+        """
+        self._models: Dict[str, HardwareModel] = {
+            record["model"]: HardwareModel.from_record(record) for record in records
+        }
+        self._defaults: Dict[str, HardwareModel] = {}
+
+    def __contains__(self, model: str) -> bool:
+        """Whether a model code is in the catalog."""
+        return model in self._models
+
+    def __len__(self) -> int:
+        """The number of models in the catalog."""
+        return len(self._models)
+
+    def get(self, model: str) -> HardwareModel:
+        """Get a hardware model.
+
+        Args:
+            model (str): The model code the controller reports.
+
+        Returns:
+            HardwareModel: The hardware model, or a default one (see `HardwareModel.default`) for
+                model codes that are not in the catalog.
+        """
+        try:
+            return self._models[model]
+        except KeyError:
+            if model not in self._defaults:
+                self._defaults[model] = HardwareModel.default(model)
+            return self._defaults[model]
+
+
+_catalog_lock = threading.Lock()
+_catalogs: Dict[str, Tuple[float, HardwareCatalog]] = {}
+
+
+def get_hardware_catalog(catalog_path: Optional[str] = None) -> HardwareCatalog:
+    """Get the hardware catalog.
+
+    The catalog is read and compiled once per process, and again when the
+    file has been modified since.
+
+    Args:
+        catalog_path (str, optional): The path of the CSV file. Defaults to the app's `hardware_models.csv`.
+
+    Returns:
+        HardwareCatalog: The compiled catalog.
+    """
+    catalog_path = catalog_path or HARDWARE_MODELS_PATH
+    mtime = os.stat(catalog_path).st_mtime
+    with _catalog_lock:
+        cached = _catalogs.get(catalog_path)
+        if cached is None or cached[0] != mtime:
+            with open(catalog_path, encoding="utf-8") as csvfile:
+                cached = _catalogs[catalog_path] = (mtime, HardwareCatalog(csv.DictReader(csvfile)))
+        return cached[1]